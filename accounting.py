@@ -0,0 +1,245 @@
+"""Fungsi akuntansi (jurnal & akun) yang bekerja pada koneksi yang sedang dipakai."""
+import threading
+from collections import namedtuple
+from datetime import date, timedelta
+
+import db
+
+# Bagan akun standar: (kode, nama, tipe, saldo normal)
+INITIAL_ACCOUNTS = [
+    (1000, 'Kas', 'Aset', 'Debit'),
+    (1010, 'Bank', 'Aset', 'Debit'),
+    (1020, 'Piutang Usaha', 'Aset', 'Debit'),
+    (1030, 'Persediaan Bahan Baku', 'Aset', 'Debit'),
+    (1040, 'Aktiva Tetap', 'Aset', 'Debit'),
+    (2000, 'Utang Usaha', 'Liabilitas', 'Kredit'),
+    (2010, 'Utang Gaji', 'Liabilitas', 'Kredit'),
+    (3000, 'Modal Pemilik', 'Ekuitas', 'Kredit'),
+    (3010, 'Laba Ditahan', 'Ekuitas', 'Kredit'),
+    (4000, 'Pendapatan Penjualan', 'Pendapatan', 'Kredit'),
+    (5000, 'Harga Pokok Penjualan', 'Beban', 'Debit'),
+    (6000, 'Beban Gaji', 'Beban', 'Debit'),
+    (6010, 'Beban Listrik & Air', 'Beban', 'Debit'),
+    (6020, 'Beban Sewa', 'Beban', 'Debit'),
+    (6030, 'Beban Lain-lain', 'Beban', 'Debit'),
+    (7000, 'Pendapatan Lain-lain', 'Pendapatan', 'Kredit')
+]
+
+
+def create_journal_entry(conn, entry_date, description, entries, transaction_id=None, expense_id=None):
+    """Menulis satu jurnal dan baris-barisnya; melempar ValueError bila tidak seimbang.
+
+    Pemanggil bertanggung jawab atas lingkup transaksi (lihat `ConnectionPool.transaction`).
+    """
+    lines = [(entry['account_id'], entry.get('debit', 0), entry.get('kredit', 0)) for entry in entries]
+    total_debit = sum(debit for _, debit, _ in lines)
+    total_kredit = sum(kredit for _, _, kredit in lines)
+    if round(total_debit, 2) != round(total_kredit, 2):
+        raise ValueError(f"Jurnal tidak seimbang! Debit: {total_debit}, Kredit: {total_kredit}")
+
+    c = conn.execute("INSERT INTO journal_entries (entry_date, description, transaction_id, expense_id) VALUES (?, ?, ?, ?)",
+                     (entry_date, description, transaction_id, expense_id))
+    journal_entry_id = c.lastrowid
+    conn.executemany("INSERT INTO journal_items (journal_entry_id, account_id, debit, kredit) VALUES (?, ?, ?, ?)",
+                     [(journal_entry_id, account_id, debit, kredit) for account_id, debit, kredit in lines])
+    return journal_entry_id
+
+
+# Peran akun yang dipakai kode posting -> (nama akun, kode akun cadangan bila namanya diubah)
+ACCOUNT_ROLES = {
+    'cash': ('Kas', 1000),
+    'bank': ('Bank', 1010),
+    'inventory': ('Persediaan Bahan Baku', 1030),
+    'revenue': ('Pendapatan Penjualan', 4000),
+    'cogs': ('Harga Pokok Penjualan', 5000),
+    'other_revenue': ('Pendapatan Lain-lain', 7000),
+}
+
+
+class Account(namedtuple('Account', 'id code name type normal_balance')):
+    @property
+    def label(self):
+        return f"{self.code} - {self.name}"
+
+
+class AccountRegistry:
+    """Indeks bagan akun (per id, nama, kode dan tipe) yang dimuat sekali dari tabel accounts."""
+
+    def __init__(self, rows):
+        self.accounts = sorted((Account(*row) for row in rows), key=lambda acc: (acc.code is None, acc.code, acc.id))
+        self.by_id = {acc.id: acc for acc in self.accounts}
+        self.by_name = {acc.name: acc for acc in self.accounts}
+        self.by_code = {acc.code: acc for acc in self.accounts}
+
+    def role(self, role):
+        """Id akun untuk peran posting ('cash', 'bank', 'revenue', 'cogs', 'inventory', ...)."""
+        name, code = ACCOUNT_ROLES[role]
+        acc = self.by_name.get(name) or self.by_code.get(code)
+        if acc is None:
+            raise KeyError(f"Akun '{name}' ({code}) tidak ditemukan di Daftar Akun.")
+        return acc.id
+
+    def id_of(self, name):
+        """Id akun berdasarkan nama, atau None bila tidak ada."""
+        acc = self.by_name.get(name)
+        return acc.id if acc else None
+
+    def of_type(self, *account_types):
+        return [acc for acc in self.accounts if acc.type in account_types]
+
+    def options(self, *account_types):
+        """{"kode - nama": id} untuk selectbox; semua akun bila tipe tidak diberikan."""
+        accounts = self.of_type(*account_types) if account_types else self.accounts
+        return {acc.label: acc.id for acc in accounts}
+
+
+_registries = {}
+_registry_lock = threading.Lock()
+
+
+def get_registry(pool):
+    """Registry akun untuk database `pool`; dimuat ulang hanya setelah `invalidate_registry`."""
+    registry = _registries.get(pool.path)
+    if registry is None:
+        with _registry_lock:
+            registry = _registries.get(pool.path)
+            if registry is None:
+                with pool.connection() as conn:
+                    rows = conn.execute("SELECT id, account_code, account_name, account_type, normal_balance FROM accounts").fetchall()
+                registry = _registries[pool.path] = AccountRegistry(rows)
+    return registry
+
+
+def invalidate_registry(pool):
+    """Dipanggil setelah akun ditambah, diubah atau dihapus."""
+    with _registry_lock:
+        _registries.pop(pool.path, None)
+
+
+class TrialBalanceRow(namedtuple('TrialBalanceRow', 'account debit kredit balance')):
+    pass
+
+
+class TrialBalance:
+    """Neraca saldo semua akun per tanggal, dihitung dengan satu query ber-GROUP BY."""
+
+    def __init__(self, registry, totals):
+        self.rows = []
+        for acc in registry.accounts:
+            debit, kredit = totals.get(acc.id, (0.0, 0.0))
+            balance = debit - kredit if acc.normal_balance == 'Debit' else kredit - debit
+            self.rows.append(TrialBalanceRow(acc, debit, kredit, balance))
+        self.by_name = {row.account.name: row for row in self.rows}
+
+    def of_type(self, *account_types):
+        return [row for row in self.rows if row.account.type in account_types]
+
+    def total(self, *account_types):
+        return sum(row.balance for row in self.of_type(*account_types))
+
+    def balance(self, account_name):
+        row = self.by_name.get(account_name)
+        return row.balance if row else 0.0
+
+    def net_income(self):
+        """Laba bersih = total saldo akun Pendapatan - total saldo akun Beban."""
+        return self.total('Pendapatan') - self.total('Beban')
+
+
+_MOVEMENT_QUERY = """
+    SELECT ji.account_id,
+           SUM(CASE WHEN ji.debit > 0 THEN ji.debit ELSE 0 END),
+           SUM(CASE WHEN ji.kredit > 0 THEN ji.kredit ELSE 0 END)
+    FROM journal_items ji
+    JOIN journal_entries je ON ji.journal_entry_id = je.id
+"""
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _movements(conn, start=None, end=None):
+    """{account_id: (debit, kredit)} untuk baris jurnal dengan start <= entry_date < end."""
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("je.entry_date >= ?"); params.append(start.isoformat())
+    if end is not None:
+        # Rentang setengah terbuka: entry_date bisa berupa 'YYYY-MM-DD' atau 'YYYY-MM-DD HH:MM:SS'
+        conditions.append("je.entry_date < ?"); params.append(end.isoformat())
+    query = _MOVEMENT_QUERY + (" WHERE " + " AND ".join(conditions) if conditions else "") + " GROUP BY ji.account_id"
+    return {account_id: (debit or 0.0, kredit or 0.0) for account_id, debit, kredit in conn.execute(query, params)}
+
+
+def _add_totals(base, delta):
+    totals = dict(base)
+    for account_id, (debit, kredit) in delta.items():
+        old_debit, old_kredit = totals.get(account_id, (0.0, 0.0))
+        totals[account_id] = (old_debit + debit, old_kredit + kredit)
+    return totals
+
+
+def _snapshot(conn, period):
+    return {account_id: (debit, kredit) for account_id, debit, kredit in
+            conn.execute("SELECT account_id, debit, kredit FROM account_balance_snapshots WHERE period = ?", (period,))}
+
+
+def ensure_snapshots(conn, today=None):
+    """Membangun snapshot saldo bulanan yang belum ada, sampai bulan terakhir yang sudah tutup.
+
+    Hanya bulan sesudah snapshot terakhir yang masih valid yang dihitung, masing-masing dengan
+    satu query rentang tanggal. Sebaiknya dipanggil di dalam transaksi. Mengembalikan jumlah bulan yang dibangun.
+    """
+    last_closed = _month_start(today or date.today()) - timedelta(days=1)
+    latest = conn.execute("SELECT MAX(period) FROM account_balance_snapshots").fetchone()[0]
+    if latest is not None:
+        month = _next_month(date.fromisoformat(f"{latest}-01"))
+        totals = _snapshot(conn, latest)
+    else:
+        first_entry = conn.execute("SELECT MIN(entry_date) FROM journal_entries").fetchone()[0]
+        if first_entry is None:
+            return 0
+        month = date.fromisoformat(first_entry[:7] + "-01")
+        totals = {}
+    built = 0
+    while month <= last_closed:
+        totals = _add_totals(totals, _movements(conn, month, _next_month(month)))
+        conn.executemany("INSERT OR REPLACE INTO account_balance_snapshots (period, account_id, debit, kredit) VALUES (?, ?, ?, ?)",
+                         [(month.strftime("%Y-%m"), account_id, debit, kredit) for account_id, (debit, kredit) in totals.items()])
+        month = _next_month(month)
+        built += 1
+    return built
+
+
+def refresh_snapshots(pool, today=None):
+    """ensure_snapshots untuk halaman laporan: kunci tulis hanya diambil bila memang ada bulan yang perlu dibangun."""
+    last_closed = (_month_start(today or date.today()) - timedelta(days=1)).strftime("%Y-%m")
+    with pool.connection() as conn:
+        latest, has_entries = conn.execute("""
+            SELECT (SELECT MAX(period) FROM account_balance_snapshots), EXISTS (SELECT 1 FROM journal_entries WHERE entry_date < ?)
+        """, (_month_start(today or date.today()).isoformat(),)).fetchone()
+    if (latest is not None and latest >= last_closed) or (latest is None and not has_entries):
+        return 0
+    return db.run_in_transaction(pool, ensure_snapshots, today)
+
+
+def trial_balance(conn, registry, as_of=None, use_snapshots=True):
+    """Saldo debit/kredit/normal setiap akun sampai akhir hari `as_of` (date), atau seluruhnya bila None.
+
+    Bila ada snapshot bulan sebelum `as_of`, hanya baris jurnal sesudah snapshot itu yang dijumlahkan.
+    """
+    if as_of is None:
+        return TrialBalance(registry, _movements(conn))
+    end = as_of + timedelta(days=1)
+    checkpoint = None
+    if use_snapshots:
+        checkpoint = conn.execute("SELECT MAX(period) FROM account_balance_snapshots WHERE period < ?",
+                                  (as_of.strftime("%Y-%m"),)).fetchone()[0]
+    if checkpoint is None:
+        return TrialBalance(registry, _movements(conn, end=end))
+    delta_start = _next_month(date.fromisoformat(f"{checkpoint}-01"))
+    return TrialBalance(registry, _add_totals(_snapshot(conn, checkpoint), _movements(conn, delta_start, end)))
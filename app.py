@@ -1,229 +1,40 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
 from datetime import datetime, date, timedelta
-import plotly.graph_objects as go
 import urllib.parse
-import bcrypt
-from fpdf import FPDF
 import random
+import accounting
+import bootstrap
+import catalog as catalogs
+import db
+import export
+import history
+import ledger
+import payroll
+import perf
+import receipts
+import reports
+import sales
+import search
+import stock
+from db import DB
 
 # --- KONFIGURASI DAN INISIALISASI ---
-DB = "pos.db"
+# pandas, plotly, bcrypt dan importer diimpor di halaman yang memakainya (fpdf di receipts.py),
+# supaya form login tampil tanpa memuat modul berat; ukur dengan `python bench.py startup`
 st.set_page_config(layout="wide", page_title="Bali Nice - Dream Coffee & Eatry")
 
+@st.cache_resource
+def get_pool():
+    """Satu pool koneksi per proses, dipakai ulang di setiap rerun dan sesi."""
+    return db.ConnectionPool(DB)
+
 # =====================================================================
 # --- FUNGSI MIGRASI & INISIALISASI DATABASE ---
 # =====================================================================
-def update_db_schema(conn):
-    """Memeriksa dan memperbarui skema database jika diperlukan."""
-    c = conn.cursor()
-
-    # Employees table updates
-    c.execute("PRAGMA table_info(employees)")
-    emp_columns = {info[1] for info in c.fetchall()}
-    if 'password' not in emp_columns: c.execute("ALTER TABLE employees ADD COLUMN password TEXT")
-    if 'role' not in emp_columns: c.execute("ALTER TABLE employees ADD COLUMN role TEXT")
-    if 'is_active' not in emp_columns: c.execute("ALTER TABLE employees ADD COLUMN is_active BOOLEAN DEFAULT 1")
-    if 'hourly_wage' in emp_columns:
-         c.execute("ALTER TABLE employees RENAME TO employees_old")
-         c.execute("""CREATE TABLE employees (
-             id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, wage_amount REAL, 
-             wage_period TEXT, password TEXT, role TEXT, is_active BOOLEAN DEFAULT 1
-         )""")
-         c.execute("INSERT INTO employees (id, name, wage_amount, wage_period, is_active) SELECT id, name, hourly_wage, 'Per Jam', 1 FROM employees_old")
-         c.execute("DROP TABLE employees_old")
-         st.toast("Skema database karyawan telah diperbarui.")
-
-    # Expenses table updates
-    c.execute("PRAGMA table_info(expenses)")
-    exp_columns = {info[1] for info in c.fetchall()}
-    if 'category' not in exp_columns:
-        c.execute("ALTER TABLE expenses ADD COLUMN category TEXT DEFAULT 'Lainnya'")
-        st.toast("Skema database pengeluaran telah diperbarui.")
-    # NEW: Add account_id to expenses for accounting integration
-    if 'account_id' not in exp_columns:
-        c.execute("ALTER TABLE expenses ADD COLUMN account_id INTEGER")
-        st.toast("Skema database pengeluaran telah diperbarui dengan account_id.")
-
-    conn.commit()
-
-def insert_initial_data(conn):
-    """Membuat akun default jika belum ada."""
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM employees WHERE name = 'admin'")
-    if c.fetchone()[0] == 0:
-        st.info("Akun admin tidak ditemukan, membuat akun default...")
-        initial_users = [
-            ('admin', bcrypt.hashpw('admin'.encode('utf8'), bcrypt.gensalt()), 'Admin', 0, 'Per Bulan', 1),
-            ('operator', bcrypt.hashpw('operator'.encode('utf8'), bcrypt.gensalt()), 'Operator', 0, 'Per Jam', 1)
-        ]
-        c.executemany("INSERT INTO employees (name, password, role, wage_amount, wage_period, is_active) VALUES (?, ?, ?, ?, ?, ?)", initial_users)
-        conn.commit()
-        st.success("Akun awal (admin/admin, operator/operator) berhasil dibuat.")
-        st.rerun()
-
-def insert_initial_products(conn):
-    """Memasukkan daftar produk awal jika tabel produk kosong."""
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM products")
-    if c.fetchone()[0] == 0:
-        st.info("Daftar produk tidak ditemukan, menambahkan produk awal...")
-        products = [
-            ("Espresso", 10000), ("Americano", 11000), ("Orange Americano", 14000),
-            ("Lemon Americano", 14000), ("Cocof (BN Signature)", 15000), ("Coffee Latte", 15000),
-            ("Cappuccino", 15000), ("Spanish Latte", 16000), ("Caramel Latte", 16000),
-            ("Vanilla Latte", 16000), ("Hazelnut Latte", 16000), ("Butterscotch Latte", 16000),
-            ("Tiramisu Latte", 16000), ("Mocca Latte", 16000), ("Coffee Chocolate", 18000),
-            ("Taro Coffee Latte", 18000), ("Coffee Gula Aren", 18000), ("Lychee Coffee", 20000),
-            ("Markisa Coffee", 20000), ("Raspberry Latte", 20000), ("Strawberry Latte", 20000),
-            ("Manggo Latte", 20000), ("Bubblegum Latte", 20000),
-            ("Lemon Tea", 10000), ("Lychee Tea", 10000), ("Milk Tea", 12000),
-            ("Green Tea", 14000), ("Thai Tea", 14000), ("Melon Susu", 14000),
-            ("Manggo Susu", 15000), ("Mocca Susu", 15000), ("Orange Susu", 15000),
-            ("Taro Susu", 15000), ("Coklat Susu", 15000), ("Vanilla Susu", 15000),
-            ("Strawberry Susu", 15000), ("Matcha Susu", 18000), ("Blueberry Susu", 18000),
-            ("Bubblegum Susu", 18000), ("Raspberry Susu", 18000), ("Grenadine Susu", 14000),
-            ("Banana Susu", 16000),
-            ("Melon Soda", 10000), ("Manggo Soda", 12000), ("Orange Soda", 12000),
-            ("Strawberry Soda", 12000), ("Bluesky Soda", 14000), ("Banana Soda", 16000),
-            ("Grenadine Soda", 14000), ("Blueberry Soda", 16000), ("Coffee Bear", 16000),
-            ("Mocca Soda", 16000), ("Raspberry Soda", 16000), ("Coffee Soda", 17000),
-            ("Strawberry Coffee Soda", 18000), ("Melon Blue Sky", 18000), ("Blue Manggo Soda", 18000),
-            ("Nasi Goreng Kampung", 10000), ("Nasi Goreng Biasa", 10000), ("Nasi Goreng Ayam", 18000),
-            ("Nasi Ayam Sambal Matah", 13000), ("Nasi Ayam Penyet", 13000), ("Nasi Ayam Teriyaki", 15000),
-            ("Mie Goreng", 12000), ("Mie Rebus", 12000), ("Mie Nyemek", 12000), ("Bihun Goreng", 12000),
-            ("Burger Telur", 10000), ("Burger Ayam", 12000), ("Burger Telur + Keju", 13000),
-            ("Burger Telur + Ayam", 15000), ("Burger Ayam + Telur + Keju", 18000),
-            ("Roti Bakar Coklat", 10000), ("Roti Bakar Strawberry", 10000), ("Roti Bakar Srikaya", 10000),
-            ("Roti Bakar Coklat Keju", 12000),
-            ("Kentang Goreng", 12000), ("Nugget", 12000), ("Sosis", 12000),
-            ("Mix Platter Jumbo", 35000), ("Tahu/Tempe", 5000),
-            ("Double Shoot", 3000), ("Yakult", 3000), ("Mineral Water", 4000),
-            ("Mineral Water Gelas", 500), ("Nasi Putih", 3000), ("Le Mineralle", 4000)
-        ]
-        c.executemany("INSERT INTO products (name, price) VALUES (?, ?)", products)
-        conn.commit()
-        st.success("Daftar produk awal berhasil ditambahkan.")
-        st.rerun()
-
-# NEW: Insert initial Chart of Accounts
-def insert_initial_accounts(conn):
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM accounts")
-    if c.fetchone()[0] == 0:
-        st.info("Daftar akun tidak ditemukan, menambahkan akun standar...")
-        initial_accounts = [
-            (1000, 'Kas', 'Aset', 'Debit'),
-            (1010, 'Bank', 'Aset', 'Debit'),
-            (1020, 'Piutang Usaha', 'Aset', 'Debit'),
-            (1030, 'Persediaan Bahan Baku', 'Aset', 'Debit'),
-            (1040, 'Aktiva Tetap', 'Aset', 'Debit'),
-            (2000, 'Utang Usaha', 'Liabilitas', 'Kredit'),
-            (2010, 'Utang Gaji', 'Liabilitas', 'Kredit'),
-            (3000, 'Modal Pemilik', 'Ekuitas', 'Kredit'),
-            (3010, 'Laba Ditahan', 'Ekuitas', 'Kredit'),
-            (4000, 'Pendapatan Penjualan', 'Pendapatan', 'Kredit'),
-            (5000, 'Harga Pokok Penjualan', 'Beban', 'Debit'),
-            (6000, 'Beban Gaji', 'Beban', 'Debit'),
-            (6010, 'Beban Listrik & Air', 'Beban', 'Debit'),
-            (6020, 'Beban Sewa', 'Beban', 'Debit'),
-            (6030, 'Beban Lain-lain', 'Beban', 'Debit'),
-            (7000, 'Pendapatan Lain-lain', 'Pendapatan', 'Kredit')
-        ]
-        c.executemany("INSERT INTO accounts (account_code, account_name, account_type, normal_balance) VALUES (?, ?, ?, ?)", initial_accounts)
-        conn.commit()
-        st.success("Daftar akun awal berhasil ditambahkan.")
-        st.rerun()
-
-
-def init_db():
-    conn = sqlite3.connect(DB)
-    c = conn.cursor()
-    c.execute("""CREATE TABLE IF NOT EXISTS employees (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, wage_amount REAL, 
-        wage_period TEXT, password TEXT, role TEXT, is_active BOOLEAN DEFAULT 1
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS ingredients (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, unit TEXT,
-        cost_per_unit REAL, stock REAL, pack_weight REAL DEFAULT 0.0, pack_price REAL DEFAULT 0.0
-    )""")
-    c.execute("CREATE TABLE IF NOT EXISTS products (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, price REAL)")
-    c.execute("""CREATE TABLE IF NOT EXISTS recipes (
-        product_id INTEGER, ingredient_id INTEGER, qty_per_unit REAL, PRIMARY KEY (product_id, ingredient_id)
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS transactions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, transaction_date TEXT, total_amount REAL, 
-        payment_method TEXT, employee_id INTEGER
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS transaction_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, transaction_id INTEGER, product_id INTEGER, 
-        quantity INTEGER, price_per_unit REAL
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS expenses (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, category TEXT, 
-        description TEXT, amount REAL, payment_method TEXT, account_id INTEGER
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS attendance (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id INTEGER, check_in TEXT, check_out TEXT
-    )""")
-    # NEW TABLES FOR ACCOUNTING AND ERP FEATURES
-    c.execute("""CREATE TABLE IF NOT EXISTS accounts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        account_code INTEGER UNIQUE,
-        account_name TEXT UNIQUE,
-        account_type TEXT, -- e.g., Aset, Liabilitas, Ekuitas, Pendapatan, Beban
-        normal_balance TEXT -- e.g., Debit, Kredit
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS journal_entries (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        entry_date TEXT,
-        description TEXT,
-        transaction_id INTEGER, -- Link to transactions table
-        expense_id INTEGER, -- Link to expenses table
-        FOREIGN KEY (transaction_id) REFERENCES transactions(id),
-        FOREIGN KEY (expense_id) REFERENCES expenses(id)
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS journal_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        journal_entry_id INTEGER,
-        account_id INTEGER,
-        debit REAL DEFAULT 0.0,
-        kredit REAL DEFAULT 0.0,
-        FOREIGN KEY (journal_entry_id) REFERENCES journal_entries(id),
-        FOREIGN KEY (account_id) REFERENCES accounts(id)
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS customers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE,
-        address TEXT,
-        phone TEXT,
-        email TEXT
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS suppliers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE,
-        address TEXT,
-        phone TEXT,
-        email TEXT
-    )""")
-    c.execute("""CREATE TABLE IF NOT EXISTS fixed_assets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        asset_name TEXT,
-        acquisition_date TEXT,
-        acquisition_cost REAL,
-        useful_life_years INTEGER,
-        salvage_value REAL,
-        depreciation_method TEXT, -- e.g., Straight-line
-        current_book_value REAL
-    )""")
-
-    update_db_schema(conn)
-    conn.commit()
-    insert_initial_data(conn)
-    insert_initial_products(conn) 
-    insert_initial_accounts(conn) # NEW: Insert initial accounts
-    conn.close()
+@st.cache_resource
+def init_db(path=DB):
+    """Skema & data awal sekali per proses dan file database (bootstrap.py), bukan di setiap rerun."""
+    return bootstrap.run(get_pool())
 
 # =====================================================================
 # --- BAGIAN LOGIN ---
@@ -257,13 +68,10 @@ def check_login():
             username = st.text_input("Username").lower()
             password = st.text_input("Password", type="password")
             if st.form_submit_button("Login"):
-                conn = sqlite3.connect(DB)
-                c = conn.cursor()
-                c.execute("SELECT id, password, role FROM employees WHERE name = ? AND is_active = 1", (username,))
-                user_data = c.fetchone()
-                conn.close()
+                user_data = db.run_query(get_pool(), "SELECT id, password, role FROM employees WHERE name = ? AND is_active = 1", (username,), fetch='one')
                 if user_data and user_data[1] is not None:
                     user_id, hashed_password_from_db, role = user_data
+                    import bcrypt
                     if bcrypt.checkpw(password.encode('utf8'), hashed_password_from_db):
                         st.session_state.logged_in = True; st.session_state.user_id = user_id
                         st.session_state.username = username; st.session_state.role = role
@@ -449,200 +257,79 @@ def run_main_app():
 
 
     # --- Fungsi Helper ---
+    pool = get_pool()
+
     def run_query(query, params=(), fetch=None):
-        conn = sqlite3.connect(DB)
-        c = conn.cursor()
-        c.execute(query, params)
-        if fetch == 'one': result = c.fetchone()
-        elif fetch == 'all': result = c.fetchall()
-        else: result = None
-        conn.commit()
-        conn.close()
-        return result
+        return db.run_query(pool, query, params, fetch)
 
     def get_df(query, params=()):
-        conn = sqlite3.connect(DB)
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        return df
+        return db.get_df(pool, query, params)
+
+    def page_cursors(name, filter_key):
+        """Tumpukan kursor keyset per halaman riwayat; direset ke halaman pertama bila filter berubah."""
+        if st.session_state.get(f'{name}_filter_key') != filter_key:
+            st.session_state[f'{name}_filter_key'], st.session_state[f'{name}_cursors'] = filter_key, [None]
+        return st.session_state[f'{name}_cursors']
+
+    def page_nav(name, cursors, page, count):
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        if col_prev.button("⬅️ Sebelumnya", disabled=len(cursors) == 1, use_container_width=True, key=f"{name}_prev"):
+            cursors.pop(); st.rerun()
+        col_page.caption(f"Halaman {len(cursors)} · {count} baris")
+        if col_next.button("Berikutnya ➡️", disabled=page.next_cursor is None, use_container_width=True, key=f"{name}_next"):
+            cursors.append(page.next_cursor); st.rerun()
+
+    def attendance_picker(label, key):
+        """Selectbox absensi dengan pencarian (nama, ID atau tanggal); hanya memuat maksimal 20 baris."""
+        term = st.text_input("Cari absensi (nama karyawan, ID atau tanggal YYYY-MM-DD)", key=f"{key}_term")
+        with pool.connection() as conn:
+            options = {att_id: f"ID: {att_id} - {name} ({check_in})" for att_id, name, check_in in history.attendance_search(conn, term)}
+        if not options:
+            return None
+        return st.selectbox(label, list(options), format_func=options.get, key=key)
+
+    def search_picker(kind, label, key, placeholder="Cari..."):
+        """Typeahead data master lewat indeks FTS5 (search.py): awalan kata & toleran salah ketik, maksimal 10 hasil.
+
+        Mengembalikan (kata kunci, id terpilih atau None)."""
+        term = st.text_input(label, key=f"{key}_term", placeholder=placeholder)
+        if not term:
+            return term, None
+        with pool.connection() as conn:
+            hits = search.search(conn, term, [kind])
+        options = {hit.id: f"{hit.title} · {hit.detail.strip()}" if hit.detail.strip() else hit.title for hit in hits}
+        if not options:
+            return term, None
+        return term, st.selectbox(f"Hasil pencarian ({len(options)})", list(options), format_func=options.get, key=key)
+
+    # Bagan akun dimuat sekali per proses; panggil accounting.invalidate_registry(pool) setelah akun diubah
+    accounts = accounting.get_registry(pool)
 
     # --- NEW: Accounting Functions ---
     def create_journal_entry(entry_date, description, entries, transaction_id=None, expense_id=None):
-        conn = sqlite3.connect(DB)
-        c = conn.cursor()
         try:
-            c.execute("BEGIN TRANSACTION")
-            c.execute("INSERT INTO journal_entries (entry_date, description, transaction_id, expense_id) VALUES (?, ?, ?, ?)",
-                      (entry_date, description, transaction_id, expense_id))
-            journal_entry_id = c.lastrowid
-
-            total_debit = 0
-            total_kredit = 0
-            for entry in entries:
-                account_id = entry['account_id']
-                debit = entry.get('debit', 0)
-                kredit = entry.get('kredit', 0)
-                c.execute("INSERT INTO journal_items (journal_entry_id, account_id, debit, kredit) VALUES (?, ?, ?, ?)",
-                          (journal_entry_id, account_id, debit, kredit))
-                total_debit += debit
-                total_kredit += kredit
-            
-            if round(total_debit, 2) != round(total_kredit, 2):
-                raise ValueError(f"Jurnal tidak seimbang! Debit: {total_debit}, Kredit: {total_kredit}")
-
-            conn.commit()
+            # Bila dipanggil di dalam transaksi lain (mis. pengeluaran), jurnal menjadi SAVEPOINT di transaksi itu
+            def post(conn):
+                accounting.create_journal_entry(conn, entry_date, description, entries, transaction_id, expense_id)
+                # Jurnal bertanggal mundur menghapus snapshot bulan terkait (trigger); bangun ulang bulan-bulan itu saja
+                accounting.ensure_snapshots(conn)
+            db.run_in_transaction(pool, post)
             return True, "Jurnal berhasil dibuat."
         except Exception as e:
-            conn.rollback()
             return False, f"Gagal membuat jurnal: {e}"
-        finally:
-            conn.close()
-
-    def get_account_balance(account_id, end_date=None):
-        conn = sqlite3.connect(DB)
-        query = """
-            SELECT 
-                SUM(CASE WHEN ji.debit > 0 THEN ji.debit ELSE 0 END) AS total_debit,
-                SUM(CASE WHEN ji.kredit > 0 THEN ji.kredit ELSE 0 END) AS total_kredit,
-                a.normal_balance
-            FROM journal_items ji
-            JOIN journal_entries je ON ji.journal_entry_id = je.id
-            JOIN accounts a ON ji.account_id = a.id
-            WHERE ji.account_id = ?
-        """
-        params = [account_id]
-        if end_date:
-            query += " AND je.entry_date <= ?"
-            params.append(end_date)
-        
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-
-        if df.empty or df['total_debit'].isnull().all():
-            return 0.0
-
-        total_debit = df['total_debit'].iloc[0] if df['total_debit'].iloc[0] is not None else 0.0
-        total_kredit = df['total_kredit'].iloc[0] if df['total_kredit'].iloc[0] is not None else 0.0
-        normal_balance = df['normal_balance'].iloc[0]
-
-        if normal_balance == 'Debit':
-            balance = total_debit - total_kredit
-        else: # Kredit
-            balance = total_kredit - total_debit
-        return balance
 
     # --- Fungsi Logika Bisnis ---
     def process_atomic_sale(cart, payment_method, employee_id, cash_received=0):
-        conn = sqlite3.connect(DB)
-        c = conn.cursor()
-        try:
-            c.execute("BEGIN TRANSACTION")
-            insufficient_items, products_map = [], {row['name']: {'id': row['id'], 'price': row['price']} for _, row in get_df("SELECT id, name, price FROM products").iterrows()}
-            for product_name, qty in cart.items():
-                product_id = products_map[product_name]['id']
-                c.execute("SELECT i.name, i.stock, r.qty_per_unit FROM recipes r JOIN ingredients i ON r.ingredient_id = i.id WHERE r.product_id=?", (product_id,))
-                for ing_name, stock, qty_per_unit in c.fetchall():
-                    if stock < qty_per_unit * qty: insufficient_items.append(f"{ing_name} untuk {product_name}")
-            if insufficient_items: raise ValueError(f"Stok tidak cukup: {', '.join(insufficient_items)}")
-            total_amount = sum(products_map[name]['price'] * qty for name, qty in cart.items())
-            c.execute("INSERT INTO transactions (transaction_date, total_amount, payment_method, employee_id) VALUES (?, ?, ?, ?)", (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), total_amount, payment_method, employee_id))
-            transaction_id = c.lastrowid
-            for product_name, qty in cart.items():
-                product_info = products_map[product_name]
-                c.execute("INSERT INTO transaction_items (transaction_id, product_id, quantity, price_per_unit) VALUES (?, ?, ?, ?)", (transaction_id, product_info['id'], qty, product_info['price']))
-                c.execute("SELECT ingredient_id, qty_per_unit FROM recipes WHERE product_id=?", (product_info['id'],))
-                for ing_id, qty_per_unit in c.fetchall():
-                    c.execute("UPDATE ingredients SET stock = stock - ? WHERE id=?", (qty_per_unit * qty, ing_id))
-            
-            # NEW: Create Journal Entry for Sale
-            journal_entries = []
-            # Debit Cash/Bank/Piutang Usaha
-            if payment_method == 'Cash':
-                cash_account_id = run_query("SELECT id FROM accounts WHERE account_name = 'Kas'", fetch='one')[0]
-                journal_entries.append({'account_id': cash_account_id, 'debit': total_amount})
-            elif payment_method == 'Qris' or payment_method == 'Card':
-                bank_account_id = run_query("SELECT id FROM accounts WHERE account_name = 'Bank'", fetch='one')[0]
-                journal_entries.append({'account_id': bank_account_id, 'debit': total_amount})
-            # else: # Assume Piutang Usaha for other methods or if not specified
-            #     ar_account_id = run_query("SELECT id FROM accounts WHERE account_name = 'Piutang Usaha'", fetch='one')[0]
-            #     journal_entries.append({'account_id': ar_account_id, 'debit': total_amount})
-
-            # Kredit Pendapatan Penjualan
-            sales_revenue_account_id = run_query("SELECT id FROM accounts WHERE account_name = 'Pendapatan Penjualan'", fetch='one')[0]
-            journal_entries.append({'account_id': sales_revenue_account_id, 'kredit': total_amount})
-
-            # Jurnal HPP (Cost of Goods Sold) - ini lebih kompleks karena butuh HPP per produk
-            # Untuk sementara, kita bisa asumsikan HPP dihitung terpisah atau diabaikan dulu
-            # atau kita bisa ambil total modal dari fungsi laporan
-            total_modal_sale = 0
-            for product_name, qty in cart.items():
-                product_id = products_map[product_name]['id']
-                hpp_product_df = get_df("SELECT SUM(r.qty_per_unit * i.cost_per_unit) as hpp FROM recipes r JOIN ingredients i ON r.ingredient_id = i.id WHERE r.product_id=?", (product_id,))
-                hpp_per_unit = hpp_product_df['hpp'].iloc[0] if not hpp_product_df.empty and hpp_product_df['hpp'].iloc[0] is not None else 0
-                total_modal_sale += hpp_per_unit * qty
-            
-            if total_modal_sale > 0:
-                hpp_account_id = run_query("SELECT id FROM accounts WHERE account_name = 'Harga Pokok Penjualan'", fetch='one')[0]
-                inventory_account_id = run_query("SELECT id FROM accounts WHERE account_name = 'Persediaan Bahan Baku'", fetch='one')[0] # Asumsi ini akun persediaan
-                journal_entries.append({'account_id': hpp_account_id, 'debit': total_modal_sale})
-                journal_entries.append({'account_id': inventory_account_id, 'kredit': total_modal_sale})
-
-            success_journal, msg_journal = create_journal_entry(
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                f"Penjualan Transaksi #{transaction_id}",
-                journal_entries,
-                transaction_id=transaction_id
-            )
-            if not success_journal:
-                raise ValueError(f"Gagal membuat jurnal penjualan: {msg_journal}")
-
-            conn.commit()
-            change = cash_received - total_amount if payment_method == 'Cash' and cash_received > 0 else 0
-            return True, "Pesanan berhasil diproses!", transaction_id, change
-        except Exception as e:
-            conn.rollback()
-            return False, str(e), None, 0
-        finally: conn.close()
-
-    def generate_receipt_pdf(transaction_id):
-        conn = sqlite3.connect(DB)
-        transaction = pd.read_sql_query("SELECT * FROM transactions WHERE id = ?", conn, params=(transaction_id,)).iloc[0]
-        items_df = pd.read_sql_query("SELECT p.name, ti.quantity, ti.price_per_unit FROM transaction_items ti JOIN products p ON ti.product_id = p.id WHERE ti.transaction_id = ?", conn, params=(transaction_id,))
-        conn.close()
-        pdf = FPDF(); pdf.add_page(); pdf.set_font("Arial", 'B', 16)
-        pdf.cell(0, 10, 'Bali Nice - Dream Coffee & Eatry', 0, 1, 'C'); pdf.set_font("Arial", '', 10)
-        pdf.cell(0, 5, 'Struk Pembayaran', 0, 1, 'C'); pdf.ln(5); pdf.set_font("Arial", '', 12)
-        pdf.cell(0, 8, f"No. Transaksi: {transaction['id']}", 0, 1)
-        pdf.cell(0, 8, f"Tanggal: {transaction['transaction_date']}", 0, 1); pdf.ln(5); pdf.set_font("Arial", 'B', 12)
-        pdf.cell(100, 10, 'Produk', 1); pdf.cell(30, 10, 'Qty', 1); pdf.cell(50, 10, 'Subtotal', 1, 1); pdf.set_font("Arial", '', 12)
-        for _, item in items_df.iterrows():
-            pdf.cell(100, 10, item['name'], 1); pdf.cell(30, 10, str(item['quantity']), 1); pdf.cell(50, 10, f"Rp {item['quantity'] * item['price_per_unit']:,.0f}", 1, 1)
-        pdf.ln(10); pdf.set_font("Arial", 'B', 14)
-        pdf.cell(130, 10, 'Total', 1); pdf.cell(50, 10, f"Rp {transaction['total_amount']:,.0f}", 1, 1)
-        pdf.cell(130, 10, 'Metode Bayar', 1); pdf.cell(50, 10, transaction['payment_method'], 1, 1)
-        return bytes(pdf.output())
+        # Cek stok, item, pengurangan stok dan jurnal dalam satu transaksi (lihat sales.py)
+        return sales.process_sale(pool, cart, payment_method, employee_id, cash_received)
 
     def delete_transaction(transaction_id):
-        conn = sqlite3.connect(DB)
-        c = conn.cursor()
         try:
-            c.execute("BEGIN TRANSACTION")
-            c.execute("SELECT product_id, quantity FROM transaction_items WHERE transaction_id=?", (transaction_id,))
-            for product_id, quantity in c.fetchall():
-                c.execute("SELECT ingredient_id, qty_per_unit FROM recipes WHERE product_id=?", (product_id,))
-                for ing_id, qty_per_unit in c.fetchall():
-                    c.execute("UPDATE ingredients SET stock = stock + ? WHERE id=?", (qty_per_unit * quantity, ing_id))
-            c.execute("DELETE FROM transaction_items WHERE transaction_id=?", (transaction_id,))
-            c.execute("DELETE FROM transactions WHERE id=?", (transaction_id,))
-            # NEW: Delete associated journal entries
-            c.execute("DELETE FROM journal_items WHERE journal_entry_id IN (SELECT id FROM journal_entries WHERE transaction_id = ?)", (transaction_id,))
-            c.execute("DELETE FROM journal_entries WHERE transaction_id = ?", (transaction_id,))
-            conn.commit()
+            db.run_in_transaction(pool, sales.delete_sale, transaction_id)
+            receipts.invalidate(pool, transaction_id)
             return True, "Transaksi berhasil dihapus dan stok dikembalikan."
         except Exception as e:
-            conn.rollback()
             return False, f"Gagal menghapus transaksi: {e}"
-        finally: conn.close()
 
     # --- Menu Sidebar ---
     # --- PERUBAHAN: Urutan menu ergonomis ---
@@ -651,6 +338,7 @@ def run_main_app():
         "📜 Riwayat Transaksi", 
         "📦 Manajemen Stok", 
         "🍔 Manajemen Produk", 
+        "📥 Impor Data",
         "💸 Pengeluaran",
         "📊 Laporan", 
         "💰 HPP", 
@@ -662,72 +350,30 @@ def run_main_app():
     ]
     if st.session_state.role == 'Admin':
         menu_options.append("🕒 Riwayat Absensi")
+        menu_options.append("⏱️ Performa")
     menu_options.append("🗑️ Kelola & Hapus Data") # Selalu di akhir
     
     menu = st.sidebar.radio("Pilih Menu", menu_options)
+    perf.set_page(menu)  # query & waktu rerun dicatat per halaman (bila instrumentasi menyala)
 
     # --- Halaman Kasir (POS) ---
     if menu == "🛒 Kasir":
         st.header("🌺 Kasir (Point of Sale)")
         if 'cart' not in st.session_state: st.session_state.cart = {}
-        
-        # Use columns for better layout
-        col1, col2 = st.columns([3, 2]) # Adjusted column ratio for more product space
 
-        with col1:
-            st.subheader("Katalog Produk")
-            search_term = st.text_input("Cari Nama Produk...", key="product_search", placeholder="Ketik nama produk...")
-            
-            query, params = ("SELECT name, price FROM products ORDER BY name", ())
-            if search_term: 
-                query, params = "SELECT name, price FROM products WHERE name LIKE ? ORDER BY name", (f'%{search_term}%',)
-            
-            products = run_query(query, params, fetch='all')
-            
-            if products:
-                # Dynamic columns based on screen width or preference
-                num_cols = 4 
-                cols = st.columns(num_cols) 
-                for i, (name, price) in enumerate(products):
-                    with cols[i % num_cols]:
-                        # Use a container for each product button for better visual separation
-                        with st.container(border=True):
-                            st.markdown(f"**{name}**")
-                            st.markdown(f"Rp {price:,.0f}")
-                            if st.button("Tambah", key=f"prod_{name}", use_container_width=True):
-                                st.session_state.cart[name] = st.session_state.cart.get(name, 0) + 1
-                                st.toast(f"'{name}' ditambahkan ke keranjang!"); st.rerun()
-            else: 
-                st.info("Produk tidak ditemukan.")
+        # Klik Tambah/Hapus, pencarian dan input pembayaran hanya merender ulang fragment masing-masing
+        # (st.fragment), bukan seluruh skrip (init, CSS, menu). Katalog & keranjang berbagi satu fragment
+        # karena Streamlit hanya merender ulang fragment pemilik widget yang diklik.
+        def add_to_cart(name):
+            st.session_state.cart[name] = st.session_state.cart.get(name, 0) + 1
+            st.toast(f"'{name}' ditambahkan ke keranjang!")
 
-        with col2:
-            st.subheader("Keranjang Belanja")
-            if not st.session_state.cart: 
-                st.info("Keranjang masih kosong. Silakan pilih produk dari katalog.")
-            else:
-                total_price = 0
-                products_df = get_df("SELECT name, price FROM products")
-                
-                # Display cart items in a more structured way
-                st.markdown("---")
-                st.markdown("**Daftar Item:**")
-                for name, qty in list(st.session_state.cart.items()):
-                    price = products_df[products_df['name'] == name]['price'].iloc[0]
-                    subtotal = price * qty
-                    total_price += subtotal
-                    
-                    cart_col1, cart_col2, cart_col3 = st.columns([3, 1.5, 1])
-                    with cart_col1:
-                        st.write(f"**{name}** (x{qty})")
-                    with cart_col2:
-                        st.write(f"Rp {subtotal:,.0f}")
-                    with cart_col3:
-                        if st.button("Hapus", key=f"del_{name}", use_container_width=True):
-                            del st.session_state.cart[name]
-                            st.rerun()
-                st.markdown("---")
-                st.metric("Total Harga", f"Rp {total_price:,.0f}")
+        def remove_from_cart(name):
+            st.session_state.cart.pop(name, None)
 
+        @st.fragment
+        def payment_panel(total_price):
+            with perf.fragment(menu, "pembayaran"):
                 with st.expander("Proses Pembayaran", expanded=True):
                     payment_method = st.selectbox("Metode Pembayaran", ["Cash", "Qris", "Card"])
                     cash_received = 0
@@ -745,27 +391,103 @@ def run_main_app():
                             if payment_method == 'Cash': st.info(f"Kembalian: Rp {change_amount:,.0f}")
                             st.session_state.last_transaction_id = transaction_id; st.session_state.cart = {}
                         else: st.error(f"Gagal: {message}")
+                        # Satu rerun penuh per penjualan: keranjang & struk di fragment induk ikut diperbarui
                         st.rerun()
 
-            if 'last_transaction_id' in st.session_state and st.session_state.last_transaction_id:
-                st.markdown("---")
-                st.subheader("Opsi Transaksi Terakhir")
-                last_id = st.session_state.last_transaction_id
-                pdf_bytes = generate_receipt_pdf(last_id)
-                
-                col_receipt_btn1, col_receipt_btn2 = st.columns(2)
-                with col_receipt_btn1:
-                    st.download_button(label="📄 Cetak Struk (PDF)", data=pdf_bytes, file_name=f"struk_{last_id}.pdf", mime="application/pdf", use_container_width=True)
-                with col_receipt_btn2:
-                    if st.button("❌ Batalkan Pesanan", use_container_width=True, type="primary"):
-                        success, message = delete_transaction(last_id)
-                        if success: st.success(message); del st.session_state['last_transaction_id']
-                        else: st.error(message)
-                        st.rerun()
-                st.caption("Membatalkan pesanan akan menghapus riwayat transaksi dan mengembalikan stok bahan baku.")
+        @st.fragment
+        def receipt_panel():
+            with perf.fragment(menu, "struk"):
+                # Struk dirender sekali per transaksi lalu diambil dari cache (receipts.py) di setiap rerun
+                pdf_bytes = receipts.get_receipt(pool, st.session_state.last_transaction_id, 'pdf') if st.session_state.get('last_transaction_id') else None
+                if pdf_bytes is not None:
+                    st.markdown("---")
+                    st.subheader("Opsi Transaksi Terakhir")
+                    last_id = st.session_state.last_transaction_id
+                    paper = st.radio("Kertas printer thermal", ["58 mm", "80 mm"], horizontal=True, key="receipt_paper")
+                    escpos_bytes = receipts.get_receipt(pool, last_id, 'escpos' + paper[:2])
+
+                    col_receipt_btn1, col_receipt_btn2, col_receipt_btn3 = st.columns(3)
+                    with col_receipt_btn1:
+                        st.download_button(label="📄 Cetak Struk (PDF)", data=pdf_bytes, file_name=f"struk_{last_id}.pdf", mime="application/pdf", use_container_width=True)
+                    with col_receipt_btn2:
+                        st.download_button(label="🧾 Struk Thermal (ESC/POS)", data=escpos_bytes, file_name=f"struk_{last_id}_{paper[:2]}mm.bin", mime="application/octet-stream", use_container_width=True)
+                    with col_receipt_btn3:
+                        if st.button("❌ Batalkan Pesanan", use_container_width=True, type="primary"):
+                            success, message = delete_transaction(last_id)
+                            if success: st.success(message); del st.session_state['last_transaction_id']
+                            else: st.error(message)
+                            st.rerun()
+                    st.caption("Membatalkan pesanan akan menghapus riwayat transaksi dan mengembalikan stok bahan baku.")
+
+        @st.fragment
+        def pos_panel():
+            with perf.fragment(menu, "katalog & keranjang"):
+                # Use columns for better layout
+                col1, col2 = st.columns([3, 2]) # Adjusted column ratio for more product space
+
+                # Katalog & harga dari cache proses (catalog.py), tanpa query SQLite selama katalog tidak berubah
+                catalog = catalogs.get_catalog(pool)
+
+                with col1:
+                    st.subheader("Katalog Produk")
+                    search_term = st.text_input("Cari Nama Produk...", key="product_search", placeholder="Ketik nama produk...")
+                    ranked = None
+                    if search_term:
+                        # Kata kunci dicari di indeks FTS5 (awalan, salah ketik); nama & harga tetap dari katalog cache
+                        with pool.connection() as conn:
+                            ranked = search.ids(conn, search_term, 'product', limit=40)
+                    # Grid kartu (nama + label harga per kolom) di-cache di snapshot katalog
+                    layout = catalog.layout(ranked, columns=4)
+                    
+                    if any(layout):
+                        cols = st.columns(len(layout)) 
+                        for col, cards in zip(cols, layout):
+                            with col:
+                                for name, label in cards:
+                                    # Use a container for each product button for better visual separation
+                                    with st.container(border=True):
+                                        st.markdown(label)
+                                        st.button("Tambah", key=f"prod_{name}", use_container_width=True, on_click=add_to_cart, args=(name,))
+                    else: 
+                        st.info("Produk tidak ditemukan.")
+
+                with col2:
+                    st.subheader("Keranjang Belanja")
+                    if not st.session_state.cart: 
+                        st.info("Keranjang masih kosong. Silakan pilih produk dari katalog.")
+                    else:
+                        total_price = 0
+                        
+                        # Display cart items in a more structured way
+                        st.markdown("---")
+                        st.markdown("**Daftar Item:**")
+                        for name, qty in list(st.session_state.cart.items()):
+                            if name not in catalog.id_by_name:
+                                # Produk dihapus/diganti nama setelah masuk keranjang
+                                del st.session_state.cart[name]; st.warning(f"'{name}' sudah tidak ada di katalog dan dikeluarkan dari keranjang.")
+                                continue
+                            price = catalog.price(catalog.id_by_name[name])
+                            subtotal = price * qty
+                            total_price += subtotal
+                            
+                            cart_col1, cart_col2, cart_col3 = st.columns([3, 1.5, 1])
+                            with cart_col1:
+                                st.write(f"**{name}** (x{qty})")
+                            with cart_col2:
+                                st.write(f"Rp {subtotal:,.0f}")
+                            with cart_col3:
+                                st.button("Hapus", key=f"del_{name}", use_container_width=True, on_click=remove_from_cart, args=(name,))
+                        st.markdown("---")
+                        st.metric("Total Harga", f"Rp {total_price:,.0f}")
+                        payment_panel(total_price)
+
+                    receipt_panel()
+
+        pos_panel()
 
     # --- Halaman Manajemen Stok ---
     elif menu == "📦 Manajemen Stok":
+        import pandas as pd
         st.header("🌴 Manajemen Stok Bahan")
         low_stock_threshold = 10 
         low_stock_df = get_df(f"SELECT name, stock, unit FROM ingredients WHERE stock <= {low_stock_threshold}")
@@ -774,21 +496,28 @@ def run_main_app():
             st.warning(f"⚠️ **Perhatian!** Bahan berikut hampir habis (stok <= {low_stock_threshold}):")
             st.dataframe(low_stock_df, use_container_width=True)
         
-        tabs = st.tabs(["📊 Daftar Bahan", "➕ Tambah Bahan", "✏️ Edit Bahan"])
+        tabs = st.tabs(["📊 Daftar Bahan", "➕ Tambah Bahan", "✏️ Edit Bahan", "🔁 Mutasi Stok", "📅 Stok per Tanggal"])
         
         with tabs[0]:
             st.subheader("Daftar Bahan Saat Ini")
             search_ing = st.text_input("Cari Nama Bahan...", key="ingredient_search", placeholder="Ketik nama bahan...")
             query, params = ("SELECT id, name AS 'Nama', unit AS 'Unit', stock AS 'Stok', cost_per_unit AS 'HPP/Unit', pack_price AS 'Harga Kemasan', pack_weight AS 'Berat Kemasan' FROM ingredients", ())
-            if search_ing: query += " WHERE name LIKE ?"; params = (f'%{search_ing}%',)
-            st.dataframe(get_df(query, params).style.format({'HPP/Unit': 'Rp {:,.2f}', 'Harga Kemasan': 'Rp {:,.2f}'}), use_container_width=True)
+            ranked = None
+            if search_ing:
+                with pool.connection() as conn:
+                    ranked = search.ids(conn, search_ing, 'ingredient')
+                query += f" WHERE id IN ({','.join('?' * len(ranked))})" if ranked else " WHERE 0"; params = tuple(ranked)
+            ingredients_df = get_df(query, params)
+            if ranked:
+                ingredients_df = ingredients_df.sort_values('id', key=lambda ids: ids.map(ranked.index))
+            st.dataframe(ingredients_df.style.format({'HPP/Unit': 'Rp {:,.2f}', 'Harga Kemasan': 'Rp {:,.2f}'}), use_container_width=True)
         
         with tabs[1]:
             st.subheader("Tambah Bahan Baru")
             with st.form("add_ingredient_form"):
                 name = st.text_input("Nama Bahan", placeholder="Contoh: Biji Kopi Arabika")
                 unit = st.text_input("Satuan/Unit (e.g., gr, ml, pcs)", placeholder="Contoh: gram")
-                stock = st.number_input("Jumlah Stok Awal", value=0.0, format="%.2f")
+                stock_qty = st.number_input("Jumlah Stok Awal", value=0.0, format="%.2f")
                 
                 st.markdown("---")
                 st.info("Kalkulator Harga Pokok per Satuan (HPP/Unit)")
@@ -800,23 +529,30 @@ def run_main_app():
                 
                 if st.form_submit_button("Tambah Bahan"):
                     if name and unit:
-                        run_query("INSERT INTO ingredients (name, unit, cost_per_unit, stock, pack_weight, pack_price) VALUES (?, ?, ?, ?, ?, ?)", (name, unit, cost_per_unit, stock, pack_weight, pack_price))
+                        def add_ingredient(conn):
+                            # Stok awal masuk buku mutasi (stock.py), bukan ditulis langsung ke kolom stok
+                            ingredient_id = conn.execute("INSERT INTO ingredients (name, unit, cost_per_unit, stock, pack_weight, pack_price) VALUES (?, ?, ?, 0, ?, ?)",
+                                                         (name, unit, cost_per_unit, pack_weight, pack_price)).lastrowid
+                            stock.set_levels(conn, {ingredient_id: stock_qty}, "Stok awal")
+                        db.run_in_transaction(pool, add_ingredient)
                         st.success(f"Bahan '{name}' berhasil ditambahkan."); st.rerun()
                     else:
                         st.error("Nama dan Satuan Bahan tidak boleh kosong.")
         
         with tabs[2]:
             st.subheader("Edit Bahan")
-            search_term = st.text_input("Ketik nama bahan untuk diedit", key="edit_ing_search", placeholder="Cari bahan...")
+            search_term, ingredient_id = search_picker('ingredient', "Ketik nama bahan untuk diedit", "edit_ing_search", "Cari bahan...")
             
             if search_term:
-                ingredient_data = run_query("SELECT * FROM ingredients WHERE name LIKE ?", (f'%{search_term}%',), fetch='one')
+                ingredient_data = run_query("SELECT * FROM ingredients WHERE id = ?", (ingredient_id,), fetch='one') if ingredient_id else None
                 if ingredient_data:
                     with st.form("edit_ingredient_form"):
                         st.info(f"Mengedit data untuk: **{ingredient_data[1]}**")
                         name = st.text_input("Nama Bahan", value=ingredient_data[1])
                         unit = st.text_input("Satuan/Unit", value=ingredient_data[2])
-                        stock = st.number_input("Jumlah Stok", value=float(ingredient_data[4]), format="%.2f")
+                        # Hanya tampilan: koreksi stok lewat tab Mutasi Stok, supaya penjualan sejak form dibuka tidak tertimpa
+                        st.number_input("Jumlah Stok", value=float(ingredient_data[4] or 0), format="%.2f", disabled=True,
+                                        help="Stok dikoreksi lewat tab 🔁 Mutasi Stok (penerimaan, terbuang, hitung fisik).")
                         pack_price = st.number_input("Harga Beli per Kemasan (Rp)", value=float(ingredient_data[6]), format="%.2f")
                         pack_weight = st.number_input("Isi/Berat per Kemasan", value=float(ingredient_data[5]), format="%.2f")
                         
@@ -824,13 +560,60 @@ def run_main_app():
                         st.metric("Harga Pokok per Satuan", f"Rp {cost_per_unit:,.2f}")
                         
                         if st.form_submit_button("Simpan Perubahan"):
-                            run_query("UPDATE ingredients SET name=?, unit=?, cost_per_unit=?, stock=?, pack_weight=?, pack_price=? WHERE id=?", (name, unit, cost_per_unit, stock, pack_weight, pack_price, ingredient_data[0]))
+                            def update_ingredient(conn):
+                                conn.execute("UPDATE ingredients SET name=?, unit=?, cost_per_unit=?, pack_weight=?, pack_price=? WHERE id=?", (name, unit, cost_per_unit, pack_weight, pack_price, ingredient_data[0]))
+                            db.run_in_transaction(pool, update_ingredient)
                             st.success(f"Bahan '{name}' diperbarui."); st.rerun()
                 else:
                     st.warning("Bahan tidak ditemukan. Silakan cek kembali nama yang dimasukkan.")
             else:
                 st.info("Ketik nama bahan di atas untuk mulai mengedit.")
 
+        with tabs[3]:
+            st.subheader("Catat Mutasi Stok")
+            _, movement_ing_id = search_picker('ingredient', "Cari bahan", "movement_ing_search", "Cari bahan...")
+            if movement_ing_id:
+                with st.form("stock_movement_form"):
+                    movement_labels = {'receipt': "Penerimaan barang (+)", 'waste': "Bahan terbuang (-)", 'adjustment': "Hitung fisik (stok menjadi)"}
+                    movement_kind = st.radio("Jenis Mutasi", list(movement_labels), format_func=movement_labels.get, horizontal=True)
+                    movement_qty = st.number_input("Jumlah", min_value=0.0, format="%.2f")
+                    movement_note = st.text_input("Catatan", placeholder="Contoh: PO #123 dari pemasok / susu basi")
+                    if st.form_submit_button("Simpan Mutasi"):
+                        def record_movement(conn):
+                            if movement_kind == 'adjustment':
+                                stock.set_levels(conn, {movement_ing_id: movement_qty}, movement_note or "Hitung fisik")
+                            else:
+                                stock.record(conn, movement_kind, {movement_ing_id: movement_qty if movement_kind == 'receipt' else -movement_qty}, note=movement_note or None)
+                        db.run_in_transaction(pool, record_movement)
+                        st.success("Mutasi stok dicatat."); st.rerun()
+                with pool.connection() as conn:
+                    recent_movements = stock.movements(conn, movement_ing_id, limit=50)
+                st.markdown("**Mutasi Terakhir**")
+                st.dataframe(pd.DataFrame([(moved_at, stock.KINDS[kind], qty, transaction_id, note) for moved_at, kind, qty, transaction_id, note in recent_movements],
+                                          columns=['Waktu', 'Jenis', 'Jumlah', 'ID Transaksi', 'Catatan']).style.format({'Jumlah': '{:+,.2f}'}),
+                             use_container_width=True, hide_index=True)
+
+        with tabs[4]:
+            st.subheader("Stok per Tanggal")
+            as_of_day = st.date_input("Stok pada akhir tanggal", value=date.today(), key="stock_as_of")
+            with pool.connection() as conn:
+                as_of_rows = stock.balances_as_of(conn, as_of_day)
+            st.dataframe(pd.DataFrame([(name, unit, qty) for _, name, unit, qty in as_of_rows], columns=['Bahan', 'Unit', 'Stok']).style.format({'Stok': '{:,.2f}'}),
+                         use_container_width=True, hide_index=True)
+
+            st.subheader("Pemakaian Bahan")
+            col_usage_start, col_usage_end = st.columns(2)
+            usage_start = col_usage_start.date_input("Dari", value=date.today().replace(day=1), key="usage_start")
+            usage_end = col_usage_end.date_input("Sampai", value=date.today(), key="usage_end")
+            with pool.connection() as conn:
+                usage = stock.consumption(conn, usage_start, usage_end)
+            if usage:
+                st.dataframe(pd.DataFrame([{'Bahan': name, 'Unit': unit, **{label: kinds.get(kind, 0.0) for kind, label in stock.KINDS.items()},
+                                            'Perubahan Bersih': sum(kinds.values())} for _, name, unit, kinds in usage]).style.format(precision=2),
+                             use_container_width=True, hide_index=True)
+            else:
+                st.info("Tidak ada mutasi stok pada rentang tanggal ini.")
+
     # --- Halaman Manajemen Produk ---
     elif menu == "🍔 Manajemen Produk":
         st.header("🍛 Manajemen Produk & Resep")
@@ -853,9 +636,9 @@ def run_main_app():
         
         with tabs[2]:
             st.subheader("Edit Produk")
-            search_term = st.text_input("Ketik nama produk untuk diedit", key="edit_prod_search", placeholder="Cari produk...")
+            search_term, product_id = search_picker('product', "Ketik nama produk untuk diedit", "edit_prod_search", "Cari produk...")
             if search_term:
-                prod_data = run_query("SELECT * FROM products WHERE name LIKE ?", (f'%{search_term}%',), fetch='one')
+                prod_data = run_query("SELECT * FROM products WHERE id = ?", (product_id,), fetch='one') if product_id else None
                 if prod_data:
                     with st.form("edit_product_form"):
                         st.info(f"Mengedit data untuk: **{prod_data[1]}**")
@@ -904,43 +687,47 @@ def run_main_app():
 
     # --- Halaman Riwayat Transaksi ---
     elif menu == "📜 Riwayat Transaksi":
+        import pandas as pd
         st.header("🌊 Riwayat Transaksi")
         
         col_search, col_filter = st.columns([2, 1])
         with col_search:
             search_id = st.text_input("Cari dengan ID Transaksi...", placeholder="Ketik ID transaksi...")
+            cashiers = dict(run_query("SELECT id, name FROM employees ORDER BY name", fetch='all') or [])
+            col_cashier, col_method = st.columns(2)
+            cashier_id = col_cashier.selectbox("Kasir", [None, *cashiers], format_func=lambda x: "Semua" if x is None else cashiers[x])
+            method = col_method.selectbox("Metode Bayar", ["Semua", "Cash", "Qris", "Card"])
+            col_min, col_max = st.columns(2)
+            min_total = col_min.number_input("Total Minimal (Rp)", min_value=0, step=1000)
+            max_total = col_max.number_input("Total Maksimal (Rp, 0 = tanpa batas)", min_value=0, step=1000)
         with col_filter:
-            # Optional: Add date range filter for transactions
             today = date.today()
             default_start = today.replace(day=1)
             transaction_start_date = st.date_input("Dari Tanggal", default_start)
             transaction_end_date = st.date_input("Sampai Tanggal", today)
 
-        query = "SELECT t.id AS 'ID', t.transaction_date AS 'Waktu', t.total_amount AS 'Total', t.payment_method AS 'Metode', e.name AS 'Kasir' FROM transactions t JOIN employees e ON t.employee_id = e.id WHERE 1=1"
-        params = []
+        # Keyset pagination: simpan kursor tiap halaman yang sudah dibuka; ganti filter = kembali ke halaman pertama
+        filters = dict(transaction_id=int(search_id) if search_id.isdigit() else None, employee_id=cashier_id,
+                       payment_method=None if method == "Semua" else method,
+                       min_total=min_total or None, max_total=max_total or None)
+        cursors = page_cursors('history', (transaction_start_date, transaction_end_date, tuple(filters.values())))
+        with pool.connection() as conn:
+            page = history.transaction_page(conn, transaction_start_date, transaction_end_date, cursors[-1], **filters)
+        transactions_df = pd.DataFrame(page.rows, columns=['ID', 'Waktu', 'Total', 'Metode', 'Kasir'])
 
-        if search_id.isdigit(): 
-            query += " AND t.id = ?"
-            params.append(int(search_id))
-        
-        query += " AND t.transaction_date BETWEEN ? AND ?"
-        params.append(transaction_start_date.strftime("%Y-%m-%d 00:00:00"))
-        params.append(transaction_end_date.strftime("%Y-%m-%d 23:59:59"))
+        st.dataframe(transactions_df.style.format({'Total': 'Rp {:,.0f}'}), use_container_width=True, hide_index=True)
+        page_nav('history', cursors, page, len(transactions_df))
 
-        query += " ORDER BY t.id DESC"
-        transactions_df = get_df(query, params)
-        
-        st.dataframe(transactions_df.style.format({'Total': 'Rp {:,.0f}'}), use_container_width=True)
-        
         st.markdown("---")
         st.subheader("Kelola Transaksi")
         if not transactions_df.empty:
-            selected_id = st.selectbox("Pilih ID dari tabel di atas untuk melihat detail atau menghapus", options=transactions_df['ID'].tolist(), key="selected_trans_id")
+            selected_id = st.selectbox("Pilih ID dari halaman ini untuk melihat detail atau menghapus", options=transactions_df['ID'].tolist(), key="selected_trans_id")
             if selected_id:
                 col_detail, col_action = st.columns(2)
                 with col_detail:
                     st.markdown(f"#### Detail Item Transaksi #{selected_id}:")
-                    items_df = get_df("SELECT p.name AS 'Produk', ti.quantity AS 'Jumlah', ti.price_per_unit AS 'Harga Satuan', (ti.quantity * ti.price_per_unit) AS 'Subtotal' FROM transaction_items ti JOIN products p ON ti.product_id = p.id WHERE ti.transaction_id = ?", (selected_id,))
+                    with pool.connection() as conn:
+                        items_df = pd.DataFrame(history.transaction_items(conn, selected_id), columns=['Produk', 'Jumlah', 'Harga Satuan', 'Subtotal'])
                     st.dataframe(items_df.style.format({'Harga Satuan': 'Rp {:,.0f}', 'Subtotal': 'Rp {:,.0f}'}), use_container_width=True)
                 with col_action:
                     st.markdown("#### Opsi:")
@@ -955,6 +742,8 @@ def run_main_app():
 
     # --- Halaman Laporan (REVISI BESAR) ---
     elif menu == "📊 Laporan":
+        import pandas as pd
+        import plotly.graph_objects as go
         st.header("📈 Laporan & Analisa Bisnis")
         
         col_date1, col_date2 = st.columns(2)
@@ -963,46 +752,24 @@ def run_main_app():
         with col_date2:
             end_date = st.date_input("Tanggal Akhir", date.today())
         
-        start_datetime, end_datetime = datetime.combine(start_date, datetime.min.time()), datetime.combine(end_date, datetime.max.time())
-        
         st.subheader("Ringkasan Kinerja Bisnis")
         
-        trans_df = get_df("SELECT * FROM transactions WHERE transaction_date BETWEEN ? AND ?", (start_datetime.strftime("%Y-%m-%d %H:%M:%S"), end_datetime.strftime("%Y-%m-%d %H:%M:%S")))
         expenses_df = get_df("SELECT * FROM expenses WHERE date BETWEEN ? AND ?", (start_date.isoformat(), end_date.isoformat()))
         
-        salary_details = []
-        total_gaji = 0
-        employees_df = get_df("SELECT id, name, wage_amount, wage_period FROM employees WHERE is_active = 1")
-        attendance_df = get_df("SELECT * FROM attendance WHERE check_in BETWEEN ? AND ?", (start_datetime.strftime("%Y-%m-%d %H:%M:%S"), end_datetime.strftime("%Y-%m-%d %H:%M:%S")))
-        
-        if not attendance_df.empty:
-            attendance_df['check_in'] = pd.to_datetime(attendance_df['check_in'])
-            attendance_df['check_out'] = pd.to_datetime(attendance_df['check_out'])
-            for _, emp in employees_df.iterrows():
-                emp_attendance = attendance_df[attendance_df['employee_id'] == emp['id']].copy()
-                if not emp_attendance.empty:
-                    emp_salary = 0
-                    if emp['wage_period'] == 'Per Jam':
-                        emp_attendance['duration'] = (emp_attendance['check_out'] - emp_attendance['check_in']).dt.total_seconds() / 3600
-                        total_hours = emp_attendance['duration'].sum()
-                        emp_salary = total_hours * emp['wage_amount']
-                        salary_details.append({'Karyawan': emp['name'], 'Detail': f'{total_hours:.2f} jam kerja', 'Total Gaji': emp_salary})
-                    elif emp['wage_period'] == 'Per Hari':
-                        work_days = emp_attendance['check_in'].dt.date.nunique()
-                        emp_salary = work_days * emp['wage_amount']
-                        salary_details.append({'Karyawan': emp['name'], 'Detail': f'{work_days} hari kerja', 'Total Gaji': emp_salary})
-                    elif emp['wage_period'] == 'Per Bulan':
-                        days_in_range = (end_date - start_date).days + 1
-                        emp_salary = (emp['wage_amount'] / 30) * days_in_range
-                        salary_details.append({'Karyawan': emp['name'], 'Detail': f'{days_in_range} hari dalam rentang', 'Total Gaji': emp_salary})
-                    total_gaji += emp_salary
+        with pool.connection() as conn:
+            payroll_lines = payroll.compute(conn, start_date, end_date)
+        total_gaji = sum(line.salary for line in payroll_lines)
+        salary_details = [{'Karyawan': line.name, 'Detail': payroll.detail(line, start_date, end_date), 'Total Gaji': line.salary}
+                          for line in payroll_lines if line.wage_period in ('Per Jam', 'Per Hari', 'Per Bulan')]
         salary_df = pd.DataFrame(salary_details)
 
-        total_pendapatan = trans_df['total_amount'].sum()
-        total_modal = 0
-        if not trans_df.empty:
-            items_df = get_df(f"SELECT ti.quantity, r.qty_per_unit, i.cost_per_unit FROM transaction_items ti JOIN recipes r ON ti.product_id = r.product_id JOIN ingredients i ON r.ingredient_id = i.id WHERE ti.transaction_id IN ({','.join(map(str, trans_df['id']))})")
-            if not items_df.empty: total_modal = (items_df['quantity'] * items_df['qty_per_unit'] * items_df['cost_per_unit']).sum()
+        # Pendapatan, HPP dan tren harian dari rekap harian (rollups.py), bukan dari transaksi mentah
+        with pool.connection() as conn:
+            daily_df = pd.DataFrame(reports.daily_totals(conn, start_date, end_date), columns=['day', 'revenue', 'tx_count', 'items_qty', 'cogs'])
+            laris_df = pd.DataFrame(reports.best_sellers(conn, start_date, end_date), columns=['Produk', 'Jumlah Terjual'])
+            profit_summary = pd.DataFrame(reports.most_profitable(conn, start_date, end_date), columns=['name', 'profit'])
+        total_pendapatan = daily_df['revenue'].sum()
+        total_modal = daily_df['cogs'].sum()
         
         op_expenses_df = expenses_df[expenses_df['category'] == 'Operasional']
         other_expenses_df = expenses_df[expenses_df['category'] == 'Lainnya']
@@ -1035,23 +802,17 @@ def run_main_app():
         
         col_an1, col_an2 = st.columns(2)
         with col_an1:
-            if not trans_df.empty:
+            if not daily_df.empty:
                 st.markdown("#### Kinerja Produk Terlaris")
-                laris_df = get_df(f"SELECT p.name AS 'Produk', SUM(ti.quantity) as 'Jumlah Terjual' FROM transaction_items ti JOIN products p ON ti.product_id = p.id WHERE ti.transaction_id IN ({','.join(map(str, trans_df['id']))}) GROUP BY p.name ORDER BY total_qty DESC LIMIT 5")
                 st.dataframe(laris_df, hide_index=True, use_container_width=True)
 
                 st.markdown("#### Produk Paling Menguntungkan")
-                hpp_df = get_df("SELECT p.id, p.name, p.price, IFNULL(SUM(r.qty_per_unit * i.cost_per_unit), 0) as hpp FROM products p LEFT JOIN recipes r ON p.id = r.product_id LEFT JOIN ingredients i ON r.ingredient_id = i.id GROUP BY p.id")
-                trans_items_df = get_df(f"SELECT product_id, quantity FROM transaction_items WHERE transaction_id IN ({','.join(map(str, trans_df['id']))})")
-                merged_df = pd.merge(trans_items_df, hpp_df, left_on='product_id', right_on='id')
-                merged_df['profit'] = (merged_df['price'] - merged_df['hpp']) * merged_df['quantity']
-                profit_summary = merged_df.groupby('name')['profit'].sum().reset_index().sort_values(by='profit', ascending=False).head(5)
                 st.dataframe(profit_summary.style.format({'profit': 'Rp {:,.0f}'}), hide_index=True, use_container_width=True)
 
                 st.markdown("#### Tren Pendapatan Harian")
-                trans_df['transaction_date'] = pd.to_datetime(trans_df['transaction_date'])
-                daily_revenue = trans_df.set_index('transaction_date').resample('D')['total_amount'].sum().reset_index()
-                fig_trend = go.Figure(data=go.Scatter(x=daily_revenue['transaction_date'], y=daily_revenue['total_amount'], mode='lines+markers'))
+                daily_revenue = daily_df.set_index(pd.to_datetime(daily_df['day']))['revenue']
+                daily_revenue = daily_revenue.reindex(pd.date_range(daily_revenue.index.min(), daily_revenue.index.max(), freq='D'), fill_value=0)
+                fig_trend = go.Figure(data=go.Scatter(x=daily_revenue.index, y=daily_revenue.values, mode='lines+markers'))
                 fig_trend.update_layout(title_text='Tren Pendapatan Harian', xaxis_title='Tanggal', yaxis_title='Pendapatan (Rp)', title_x=0.5)
                 st.plotly_chart(fig_trend, use_container_width=True)
             else: st.info("Belum ada data penjualan pada rentang tanggal ini.")
@@ -1091,12 +852,65 @@ def run_main_app():
 
         st.markdown("---")
         st.subheader("🗃️ Detail Data")
-        with st.expander("Detail Data Transaksi (Data Mentah)"): st.dataframe(trans_df, use_container_width=True)
+        with st.expander("Detail Data Transaksi (Data Mentah)"):
+            # Per halaman lewat keyset seperti Riwayat Transaksi; angka di atas sudah dari rollup harian
+            cursors = page_cursors('report_trans', (start_date, end_date))
+            with pool.connection() as conn:
+                page = history.transaction_page(conn, start_date, end_date, cursors[-1])
+            trans_df = pd.DataFrame(page.rows, columns=['ID', 'Waktu', 'Total', 'Metode', 'Kasir'])
+            st.dataframe(trans_df.style.format({'Total': 'Rp {:,.0f}'}), use_container_width=True, hide_index=True)
+            page_nav('report_trans', cursors, page, len(trans_df))
         with st.expander("Detail Gaji Karyawan"): st.dataframe(salary_df.style.format({'Total Gaji': 'Rp {:,.2f}'}), use_container_width=True)
         with st.expander("Detail Biaya Operasional"): st.dataframe(op_expenses_df, use_container_width=True)
         with st.expander("Detail Pengeluaran Lainnya"): st.dataframe(other_expenses_df, use_container_width=True)
 
+        st.markdown("---")
+        st.subheader("📤 Ekspor Data untuk Akuntan")
+        col_export1, col_export2 = st.columns([2, 1])
+        export_dataset = col_export1.selectbox("Data", list(export.DATASETS), format_func=lambda name: export.DATASETS[name][0], key="export_dataset")
+        export_gzip = col_export2.checkbox("Kompres (.gz)", value=True, key="export_gzip")
+        st.caption(f"Rentang tanggal mengikuti filter di atas: {start_date.strftime('%d %b %Y')} - {end_date.strftime('%d %b %Y')}.")
+        export_key = (export_dataset, start_date, end_date, export_gzip)
+        # File dibuat hanya saat tombol ditekan, bukan di setiap rerun halaman
+        if st.button("Siapkan File Ekspor", key="export_prepare"):
+            st.session_state.export_file = (export_key, export.export_file(pool, export_dataset, start_date, end_date, export_gzip).read())
+        if st.session_state.get('export_file') and st.session_state.export_file[0] == export_key:
+            st.download_button("⬇️ Unduh CSV", data=st.session_state.export_file[1],
+                               file_name=export.file_name(export_dataset, start_date, end_date, export_gzip),
+                               mime="application/gzip" if export_gzip else "text/csv", key="export_download")
+
     # --- Halaman Pengeluaran ---
+    elif menu == "📥 Impor Data":
+        import pandas as pd
+        import importer
+        st.header("📥 Impor Massal Bahan, Produk & Resep")
+        st.markdown(
+            "Unggah satu atau beberapa file CSV, atau satu file Excel berisi beberapa sheet. Jenis tabel dikenali dari kolomnya:\n"
+            "- **Bahan**: `name, unit, pack_price, pack_weight` (opsional `stock`); HPP/unit = pack_price / pack_weight\n"
+            "- **Produk**: `name, price`\n"
+            "- **Resep**: `product, ingredient, qty_per_unit` (memakai nama produk & bahan)")
+        uploaded_files = st.file_uploader("File impor", type=["csv", "xlsx", "xls"], accept_multiple_files=True)
+        replace_recipes = st.checkbox("Ganti seluruh resep produk yang ada di file (baris resep lama yang tidak ada di file dihapus)")
+        if uploaded_files:
+            frames, read_errors = importer.read_files(uploaded_files)
+            with pool.connection() as conn:
+                frames, errors = importer.validate(conn, frames)
+                preview = importer.diff(conn, frames, replace_recipes) if not (read_errors or errors) else {}
+            if read_errors or errors:
+                st.error(f"{len(read_errors) + len(errors)} masalah ditemukan, perbaiki file lalu unggah ulang:")
+                st.dataframe(pd.DataFrame({'Masalah': read_errors + errors}), use_container_width=True, hide_index=True)
+            else:
+                for kind, preview_df in preview.items():
+                    counts = preview_df['status'].value_counts()
+                    st.markdown(f"#### {importer.LABELS[kind]}: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+                    st.dataframe(preview_df, use_container_width=True, hide_index=True)
+                if st.button("Terapkan Impor", type="primary"):
+                    try:
+                        applied = db.run_in_transaction(pool, importer.apply, frames, replace_recipes)
+                        st.success("Impor selesai: " + ", ".join(f"{count} baris {importer.LABELS[kind].lower()}" for kind, count in applied.items()))
+                    except Exception as e:
+                        st.error(f"Impor dibatalkan, tidak ada data yang berubah: {e}")
+
     elif menu == "💸 Pengeluaran":
         st.header("💸 Catat Pengeluaran")
         tabs = st.tabs(["Daftar Pengeluaran", "➕ Tambah Pengeluaran", "✏️ Edit Pengeluaran"])
@@ -1107,8 +921,7 @@ def run_main_app():
         
         with tabs[1]:
             st.subheader("Tambah Pengeluaran Baru")
-            accounts_df = get_df("SELECT id, account_code, account_name FROM accounts WHERE account_type = 'Beban' OR account_type = 'Aset'")
-            account_options = {f"{row['account_code']} - {row['account_name']}": row['id'] for _, row in accounts_df.iterrows()}
+            account_options = accounts.options('Beban', 'Aset')
             
             with st.form("add_expense_form"):
                 date_exp = st.date_input("Tanggal", date.today())
@@ -1127,14 +940,11 @@ def run_main_app():
                 if st.form_submit_button("Tambah"):
                     if selected_account_name and description and amount > 0:
                         selected_account_id = account_options[selected_account_name]
-                        conn = sqlite3.connect(DB)
-                        c = conn.cursor()
-                        try:
-                            c.execute("BEGIN TRANSACTION")
+                        def add_expense(conn):
+                            c = conn.cursor()
                             c.execute("INSERT INTO expenses (date, category, description, amount, payment_method, account_id) VALUES (?, ?, ?, ?, ?, ?)", 
                                       (date_exp.isoformat(), category, description, amount, payment_method, selected_account_id))
                             expense_id = c.lastrowid
-                            conn.commit()
 
                             # NEW: Create Journal Entry for Expense
                             journal_entries = []
@@ -1142,43 +952,42 @@ def run_main_app():
                             journal_entries.append({'account_id': selected_account_id, 'debit': amount})
                             # Kredit Kas/Bank
                             if payment_method == 'Cash':
-                                cash_account_id = run_query("SELECT id FROM accounts WHERE account_name = 'Kas'", fetch='one')[0]
-                                journal_entries.append({'account_id': cash_account_id, 'kredit': amount})
+                                journal_entries.append({'account_id': accounts.role('cash'), 'kredit': amount})
                             elif payment_method == 'Transfer':
-                                bank_account_id = run_query("SELECT id FROM accounts WHERE account_name = 'Bank'", fetch='one')[0]
-                                journal_entries.append({'account_id': bank_account_id, 'kredit': amount})
+                                journal_entries.append({'account_id': accounts.role('bank'), 'kredit': amount})
                             
-                            success_journal, msg_journal = create_journal_entry(
+                            # Jurnal gagal hanya membatalkan SAVEPOINT-nya; pengeluaran tetap tersimpan
+                            return create_journal_entry(
                                 date_exp.isoformat(),
                                 f"Pengeluaran: {description}",
                                 journal_entries,
                                 expense_id=expense_id
                             )
+                        try:
+                            # Diulang dengan jeda bila database sedang dikunci kasir lain
+                            success_journal, msg_journal = db.run_in_transaction(pool, add_expense)
+                        except Exception as e:
+                            st.error(f"Gagal menambahkan pengeluaran: {e}")
+                        else:
                             if success_journal:
                                 st.success("Ditambahkan dan jurnal dibuat!"); st.rerun()
                             else:
                                 st.error(f"Ditambahkan, tapi gagal membuat jurnal: {msg_journal}. Harap periksa jurnal secara manual.")
                                 st.rerun() # Rerun anyway to show the expense
-                        except Exception as e:
-                            conn.rollback()
-                            st.error(f"Gagal menambahkan pengeluaran: {e}")
-                        finally:
-                            conn.close()
                     else:
                         st.error("Harap lengkapi semua kolom yang wajib diisi (Deskripsi, Jumlah, dan Akun).")
 
         with tabs[2]:
             st.subheader("Edit Pengeluaran")
-            search_term = st.text_input("Ketik deskripsi pengeluaran untuk diedit", key="edit_exp_search", placeholder="Cari pengeluaran...")
+            search_term, expense_id = search_picker('expense', "Ketik deskripsi, kategori atau tanggal pengeluaran untuk diedit", "edit_exp_search", "Cari pengeluaran...")
             if search_term:
-                exp_data = run_query("SELECT * FROM expenses WHERE description LIKE ?", (f'%{search_term}%',), fetch='one')
+                exp_data = run_query("SELECT * FROM expenses WHERE id = ?", (expense_id,), fetch='one') if expense_id else None
                 if exp_data:
-                    accounts_df = get_df("SELECT id, account_code, account_name FROM accounts WHERE account_type = 'Beban' OR account_type = 'Aset'")
-                    account_options = {f"{row['account_code']} - {row['account_name']}": row['id'] for _, row in accounts_df.iterrows()}
+                    account_options = accounts.options('Beban', 'Aset')
                     
                     # Get current account name for default selection
-                    current_account_name_tuple = run_query("SELECT account_code || ' - ' || account_name FROM accounts WHERE id = ?", (exp_data[6],), fetch='one')
-                    current_account_name = current_account_name_tuple[0] if current_account_name_tuple else list(account_options.keys())[0]
+                    current_account = accounts.by_id.get(exp_data[6])
+                    current_account_name = current_account.label if current_account and current_account.label in account_options else list(account_options.keys())[0]
 
                     with st.form("edit_expense_form"):
                         st.info(f"Mengedit data untuk: **{exp_data[3]}**")
@@ -1207,17 +1016,15 @@ def run_main_app():
 
     # --- Halaman HPP ---
     elif menu == "💰 HPP":
+        import pandas as pd
         st.header("💰 Harga Pokok Penjualan (HPP)")
-        def get_product_hpp(product_id):
-            df = get_df("SELECT SUM(r.qty_per_unit * i.cost_per_unit) as hpp FROM recipes r JOIN ingredients i ON r.ingredient_id = i.id WHERE r.product_id=?", (product_id,))
-            return df['hpp'].iloc[0] if not df.empty and df['hpp'].iloc[0] is not None else 0
-        prods_df = get_df("SELECT * FROM products")
-        if not prods_df.empty:
+        catalog = catalogs.get_catalog(pool)
+        if catalog.ids:
             hpp_data = []
-            for _, row in prods_df.iterrows():
-                hpp = get_product_hpp(row['id'])
-                profit = row['price'] - hpp
-                hpp_data.append({"Nama Produk": row['name'], "Harga Jual": row['price'], "HPP (Modal)": hpp, "Profit Kotor": profit})
+            for product_id, name, price in zip(catalog.ids, catalog.names, catalog.prices):
+                hpp = catalog.unit_cost(product_id)
+                profit = price - hpp
+                hpp_data.append({"Nama Produk": name, "Harga Jual": price, "HPP (Modal)": hpp, "Profit Kotor": profit})
             df_hpp = pd.DataFrame(hpp_data)
             st.dataframe(df_hpp.style.format({'Harga Jual': 'Rp {:,.0f}', 'HPP (Modal)': 'Rp {:,.2f}', 'Profit Kotor': 'Rp {:,.2f}'}), use_container_width=True)
         else:
@@ -1225,6 +1032,7 @@ def run_main_app():
 
     # --- Halaman Manajemen Karyawan ---
     elif menu == "👥 Manajemen Karyawan":
+        import bcrypt
         st.header("👥 Manajemen Karyawan")
         tabs = st.tabs(["Daftar Karyawan", "➕ Tambah Karyawan", "✏️ Edit Karyawan", "🕒 Absensi Hari Ini"])
         
@@ -1249,9 +1057,9 @@ def run_main_app():
         
         with tabs[2]:
             st.subheader("Edit Karyawan")
-            search_term = st.text_input("Ketik nama karyawan untuk diedit", key="edit_emp_search", placeholder="Cari karyawan...")
+            search_term, employee_id = search_picker('employee', "Ketik nama karyawan untuk diedit", "edit_emp_search", "Cari karyawan...")
             if search_term:
-                emp_data = run_query("SELECT * FROM employees WHERE name LIKE ?", (f'%{search_term}%',), fetch='one')
+                emp_data = run_query("SELECT * FROM employees WHERE id = ?", (employee_id,), fetch='one') if employee_id else None
                 if emp_data:
                     with st.form("edit_employee_form"):
                         st.info(f"Mengedit data untuk: **{emp_data[1]}**")
@@ -1279,7 +1087,7 @@ def run_main_app():
             if not employees_df.empty:
                 employee_id = st.selectbox("Pilih Karyawan", employees_df['id'], format_func=lambda x: employees_df[employees_df['id'] == x]['name'].iloc[0], key="attendance_emp_select")
                 today_str = date.today().isoformat()
-                attendance = run_query("SELECT * FROM attendance WHERE employee_id=? AND date(check_in)=?", (employee_id, today_str), fetch='one')
+                attendance = run_query("SELECT * FROM attendance WHERE employee_id=? AND check_in >= ? AND check_in < ?", (employee_id, today_str, (date.fromisoformat(today_str) + timedelta(days=1)).isoformat()), fetch='one')
                 
                 if not attendance:
                     if st.button("Check In", use_container_width=True):
@@ -1295,47 +1103,54 @@ def run_main_app():
 
     # --- Halaman Riwayat Absensi ---
     elif menu == "🕒 Riwayat Absensi":
+        import pandas as pd
         st.header("🕒 Riwayat Absensi Karyawan")
         tabs = st.tabs(["Daftar Absensi", "✏️ Edit Absensi"])
         
         with tabs[0]:
             st.subheader("Daftar Riwayat Absensi")
-            df = get_df("SELECT a.id AS 'ID', e.name AS 'Nama Karyawan', a.check_in AS 'Waktu Check In', a.check_out AS 'Waktu Check Out' FROM attendance a JOIN employees e ON a.employee_id = e.id ORDER BY a.check_in DESC")
-            st.dataframe(df, use_container_width=True)
+            employees = dict(run_query("SELECT id, name FROM employees ORDER BY name", fetch='all') or [])
+            col_emp, col_start, col_end = st.columns([2, 1, 1])
+            att_employee_id = col_emp.selectbox("Karyawan", [None, *employees], format_func=lambda x: "Semua" if x is None else employees[x], key="att_filter_emp")
+            att_start = col_start.date_input("Dari Tanggal", date.today() - timedelta(days=30), key="att_filter_start")
+            att_end = col_end.date_input("Sampai Tanggal", date.today(), key="att_filter_end")
+            cursors = page_cursors('attendance', (att_employee_id, att_start, att_end))
+            with pool.connection() as conn:
+                page = history.attendance_page(conn, att_start, att_end, att_employee_id, cursors[-1])
+            df = pd.DataFrame(page.rows, columns=['ID', 'Nama Karyawan', 'Waktu Check In', 'Waktu Check Out'])
+            st.dataframe(df, use_container_width=True, hide_index=True)
+            page_nav('attendance', cursors, page, len(df))
         
         with tabs[1]:
             st.subheader("Edit Data Absensi")
-            attendance_df = get_df("SELECT a.id, e.name, a.check_in FROM attendance a JOIN employees e ON a.employee_id = e.id ORDER BY a.check_in DESC")
-            if not attendance_df.empty:
-                attendance_options = {f"ID: {row['id']} - {row['name']} ({row['check_in']})": row['id'] for _, row in attendance_df.iterrows()}
-                selected_att_str = st.selectbox("Pilih absensi untuk diedit", list(attendance_options.keys()), key="edit_att_select")
-                if selected_att_str:
-                    att_id = attendance_options[selected_att_str]
-                    att_data = run_query("SELECT * FROM attendance WHERE id=?", (att_id,), fetch='one')
-                    if att_data:
-                        with st.form("attendance_form"):
-                            check_in_val = datetime.strptime(att_data[2], '%Y-%m-%d %H:%M:%S')
-                            check_out_val = datetime.strptime(att_data[3], '%Y-%m-%d %H:%M:%S') if att_data[3] else None
-                            
-                            st.markdown("Format Waktu: `YYYY-MM-DD HH:MM:SS`")
-                            new_check_in = st.text_input("Waktu Check In", value=check_in_val.strftime('%Y-%m-%d %H:%M:%S'))
-                            new_check_out = st.text_input("Waktu Check Out", value=check_out_val.strftime('%Y-%m-%d %H:%M:%S') if check_out_val else "")
-                            
-                            if st.form_submit_button("Simpan Perubahan"):
-                                try:
-                                    # Validate date format
-                                    datetime.strptime(new_check_in, '%Y-%m-%d %H:%M:%S')
-                                    if new_check_out: datetime.strptime(new_check_out, '%Y-%m-%d %H:%M:%S')
-                                    
-                                    run_query("UPDATE attendance SET check_in=?, check_out=? WHERE id=?", (new_check_in, new_check_out if new_check_out else None, att_id)); st.success("Data diperbarui!"); st.rerun()
-                                except ValueError:
-                                    st.error("Format tanggal/waktu tidak valid. Gunakan format YYYY-MM-DD HH:MM:SS.")
-            else: st.info("Tidak ada data absensi untuk dikelola.")
+            att_id = attendance_picker("Pilih absensi untuk diedit", "edit_att_select")
+            if att_id is not None:
+                att_data = run_query("SELECT * FROM attendance WHERE id=?", (att_id,), fetch='one')
+                if att_data:
+                    with st.form("attendance_form"):
+                        check_in_val = datetime.strptime(att_data[2], '%Y-%m-%d %H:%M:%S')
+                        check_out_val = datetime.strptime(att_data[3], '%Y-%m-%d %H:%M:%S') if att_data[3] else None
+                        
+                        st.markdown("Format Waktu: `YYYY-MM-DD HH:MM:SS`")
+                        new_check_in = st.text_input("Waktu Check In", value=check_in_val.strftime('%Y-%m-%d %H:%M:%S'))
+                        new_check_out = st.text_input("Waktu Check Out", value=check_out_val.strftime('%Y-%m-%d %H:%M:%S') if check_out_val else "")
+                        
+                        if st.form_submit_button("Simpan Perubahan"):
+                            try:
+                                # Validate date format
+                                datetime.strptime(new_check_in, '%Y-%m-%d %H:%M:%S')
+                                if new_check_out: datetime.strptime(new_check_out, '%Y-%m-%d %H:%M:%S')
+                                
+                                run_query("UPDATE attendance SET check_in=?, check_out=? WHERE id=?", (new_check_in, new_check_out if new_check_out else None, att_id)); st.success("Data diperbarui!"); st.rerun()
+                            except ValueError:
+                                st.error("Format tanggal/waktu tidak valid. Gunakan format YYYY-MM-DD HH:MM:SS.")
+            else: st.info("Tidak ada data absensi yang cocok.")
 
     # --- NEW: Halaman Akuntansi ---
     elif menu == "📚 Akuntansi":
+        import pandas as pd
         st.header("📚 Modul Akuntansi")
-        tabs = st.tabs(["Daftar Akun", "Jurnal Umum", "Laporan Keuangan"])
+        tabs = st.tabs(["Daftar Akun", "Jurnal Umum", "Buku Besar", "Laporan Keuangan"])
 
         with tabs[0]:
             st.subheader("Daftar Akun (Chart of Accounts)")
@@ -1343,26 +1158,26 @@ def run_main_app():
             
             st.markdown("---")
             st.subheader("Tambah/Edit Akun")
-            accounts_df = get_df("SELECT id, account_code, account_name FROM accounts")
-            account_options = {f"{row['account_code']} - {row['account_name']}": row['id'] for _, row in accounts_df.iterrows()}
+            account_options = accounts.options()
             
             edit_mode = st.checkbox("Mode Edit Akun yang Ada?", key="edit_account_mode_checkbox")
             selected_account_id = None
             
-            if edit_mode and not accounts_df.empty:
+            if edit_mode and account_options:
                 selected_account_str = st.selectbox("Pilih Akun untuk Diedit", list(account_options.keys()), key="select_account_to_edit")
                 selected_account_id = account_options[selected_account_str]
-                account_data = run_query("SELECT * FROM accounts WHERE id = ?", (selected_account_id,), fetch='one')
+                account_data = accounts.by_id[selected_account_id]
                 
                 with st.form("edit_account_form"):
-                    st.info(f"Mengedit akun: **{account_data[2]}**")
-                    new_account_code = st.number_input("Kode Akun", value=account_data[1], format="%d", key="edit_acc_code")
-                    new_account_name = st.text_input("Nama Akun", value=account_data[2], key="edit_acc_name")
-                    new_account_type = st.selectbox("Tipe Akun", ["Aset", "Liabilitas", "Ekuitas", "Pendapatan", "Beban"], index=["Aset", "Liabilitas", "Ekuitas", "Pendapatan", "Beban"].index(account_data[3]), key="edit_acc_type")
-                    new_normal_balance = st.selectbox("Saldo Normal", ["Debit", "Kredit"], index=["Debit", "Kredit"].index(account_data[4]), key="edit_normal_balance")
+                    st.info(f"Mengedit akun: **{account_data.name}**")
+                    new_account_code = st.number_input("Kode Akun", value=account_data.code, format="%d", key="edit_acc_code")
+                    new_account_name = st.text_input("Nama Akun", value=account_data.name, key="edit_acc_name")
+                    new_account_type = st.selectbox("Tipe Akun", ["Aset", "Liabilitas", "Ekuitas", "Pendapatan", "Beban"], index=["Aset", "Liabilitas", "Ekuitas", "Pendapatan", "Beban"].index(account_data.type), key="edit_acc_type")
+                    new_normal_balance = st.selectbox("Saldo Normal", ["Debit", "Kredit"], index=["Debit", "Kredit"].index(account_data.normal_balance), key="edit_normal_balance")
                     if st.form_submit_button("Simpan Perubahan Akun"):
                         if new_account_name and new_account_code > 0:
                             run_query("UPDATE accounts SET account_code=?, account_name=?, account_type=?, normal_balance=? WHERE id=?", (new_account_code, new_account_name, new_account_type, new_normal_balance, selected_account_id))
+                            accounting.invalidate_registry(pool)
                             st.success("Akun berhasil diperbarui!"); st.rerun()
                         else:
                             st.error("Kode dan Nama Akun tidak boleh kosong atau nol.")
@@ -1375,6 +1190,7 @@ def run_main_app():
                     if st.form_submit_button("Tambah Akun Baru"):
                         if new_account_name and new_account_code > 0:
                             run_query("INSERT INTO accounts (account_code, account_name, account_type, normal_balance) VALUES (?, ?, ?, ?)", (new_account_code, new_account_name, new_account_type, new_normal_balance))
+                            accounting.invalidate_registry(pool)
                             st.success("Akun baru berhasil ditambahkan!"); st.rerun()
                         else:
                             st.error("Kode dan Nama Akun tidak boleh kosong atau nol.")
@@ -1388,23 +1204,13 @@ def run_main_app():
             with col_journal_filter2:
                 journal_end_date = st.date_input("Sampai Tanggal Jurnal", date.today(), key="journal_end_date")
 
-            journal_query = f"""
-                SELECT 
-                    je.entry_date AS 'Tanggal',
-                    je.description AS 'Deskripsi',
-                    a.account_code || ' - ' || a.account_name AS 'Akun',
-                    ji.debit AS 'Debit',
-                    ji.kredit AS 'Kredit'
-                FROM journal_entries je
-                JOIN journal_items ji ON je.id = ji.journal_entry_id
-                JOIN accounts a ON ji.account_id = a.id
-                WHERE je.entry_date BETWEEN ? AND ?
-                ORDER BY je.entry_date DESC, je.id DESC
-            """
-            journal_params = [journal_start_date.isoformat(), journal_end_date.isoformat()]
-            journal_df = get_df(journal_query, journal_params)
-            
-            st.dataframe(journal_df.style.format({'Debit': 'Rp {:,.2f}', 'Kredit': 'Rp {:,.2f}'}), use_container_width=True)
+            # Per halaman 50 jurnal (kursor keyset), rentang tanggal setengah terbuka agar hari terakhir ikut
+            cursors = page_cursors('journal', (journal_start_date, journal_end_date))
+            with pool.connection() as conn:
+                page = ledger.journal_page(conn, journal_start_date, journal_end_date, cursors[-1])
+            journal_df = pd.DataFrame(page.rows, columns=['No. Jurnal', 'Tanggal', 'Deskripsi', 'Akun', 'Debit', 'Kredit'])
+            st.dataframe(journal_df.style.format({'Debit': 'Rp {:,.2f}', 'Kredit': 'Rp {:,.2f}'}), use_container_width=True, hide_index=True)
+            page_nav('journal', cursors, page, len(journal_df))
 
             st.markdown("---")
             st.subheader("Buat Jurnal Manual")
@@ -1417,8 +1223,7 @@ def run_main_app():
                 num_entries = st.number_input("Jumlah Baris Entri", min_value=2, value=2, step=1, key="num_journal_entries")
                 
                 manual_entries = []
-                accounts_for_journal = get_df("SELECT id, account_code, account_name FROM accounts")
-                account_journal_options = {f"{row['account_code']} - {row['account_name']}": row['id'] for _, row in accounts_for_journal.iterrows()}
+                account_journal_options = accounts.options()
 
                 if not account_journal_options:
                     st.warning("Tidak ada akun yang tersedia untuk jurnal. Harap tambahkan di menu Akuntansi > Daftar Akun.")
@@ -1446,46 +1251,51 @@ def run_main_app():
                             st.error("Deskripsi jurnal tidak boleh kosong.")
 
         with tabs[2]:
+            st.subheader("Buku Besar")
+            ledger_options = accounts.options()
+            if ledger_options:
+                col_ledger_acc, col_ledger_start, col_ledger_end = st.columns([2, 1, 1])
+                ledger_account = accounts.by_id[ledger_options[col_ledger_acc.selectbox("Akun", list(ledger_options), key="ledger_account")]]
+                ledger_start = col_ledger_start.date_input("Dari Tanggal", date.today().replace(day=1), key="ledger_start_date")
+                ledger_end = col_ledger_end.date_input("Sampai Tanggal", date.today(), key="ledger_end_date")
+
+                cursors = page_cursors('ledger', (ledger_account.id, ledger_start, ledger_end))
+                accounting.refresh_snapshots(pool)
+                with pool.transaction("DEFERRED") as conn:
+                    opening = ledger.opening_balance(conn, accounts, ledger_account.id, ledger_start)
+                    page = ledger.account_ledger(conn, ledger_account, ledger_start, ledger_end, opening, cursors[-1])
+                st.metric(f"Saldo Awal per {ledger_start.strftime('%d %B %Y')}", f"Rp {opening:,.2f}")
+                ledger_df = pd.DataFrame(page.rows, columns=['Tanggal', 'Deskripsi', 'Debit', 'Kredit', 'Saldo'])
+                st.dataframe(ledger_df.style.format({'Debit': 'Rp {:,.2f}', 'Kredit': 'Rp {:,.2f}', 'Saldo': 'Rp {:,.2f}'}), use_container_width=True, hide_index=True)
+                page_nav('ledger', cursors, page, len(ledger_df))
+            else:
+                st.info("Belum ada akun. Tambahkan di tab Daftar Akun.")
+
+        with tabs[3]:
             st.subheader("Laporan Keuangan")
             report_type = st.selectbox("Pilih Laporan", ["Laba Rugi", "Neraca"], key="financial_report_type")
             report_date = st.date_input("Tanggal Laporan", date.today(), key="financial_report_date")
 
+            # Saldo semua akun per tanggal laporan: snapshot bulanan terdekat + baris jurnal sesudahnya
+            accounting.refresh_snapshots(pool)
+            with pool.transaction("DEFERRED") as conn:
+                tb = accounting.trial_balance(conn, accounts, report_date)
+
             if report_type == "Laba Rugi":
                 st.markdown(f"### Laporan Laba Rugi per {report_date.strftime('%d %B %Y')}")
                 
                 # Pendapatan
                 st.markdown("#### Pendapatan")
-                pendapatan_sales_id = run_query("SELECT id FROM accounts WHERE account_name = 'Pendapatan Penjualan'", fetch='one')
-                pendapatan_lain_id = run_query("SELECT id FROM accounts WHERE account_name = 'Pendapatan Lain-lain'", fetch='one')
-                
-                total_pendapatan_sales = get_account_balance(pendapatan_sales_id[0], report_date.isoformat()) if pendapatan_sales_id else 0
-                total_pendapatan_lain = get_account_balance(pendapatan_lain_id[0], report_date.isoformat()) if pendapatan_lain_id else 0
-                
-                st.markdown(f"- Pendapatan Penjualan: **Rp {total_pendapatan_sales:,.2f}**")
-                st.markdown(f"- Pendapatan Lain-lain: **Rp {total_pendapatan_lain:,.2f}**")
-                total_pendapatan = total_pendapatan_sales + total_pendapatan_lain
+                for row in tb.of_type('Pendapatan'):
+                    st.markdown(f"- {row.account.name}: **Rp {row.balance:,.2f}**")
+                total_pendapatan = tb.total('Pendapatan')
                 st.markdown(f"**Total Pendapatan: Rp {total_pendapatan:,.2f}**")
 
                 # Beban
                 st.markdown("#### Beban")
-                hpp_id = run_query("SELECT id FROM accounts WHERE account_name = 'Harga Pokok Penjualan'", fetch='one')
-                beban_gaji_id = run_query("SELECT id FROM accounts WHERE account_name = 'Beban Gaji'", fetch='one')
-                beban_listrik_air_id = run_query("SELECT id FROM accounts WHERE account_name = 'Beban Listrik & Air'", fetch='one')
-                beban_sewa_id = run_query("SELECT id FROM accounts WHERE account_name = 'Beban Sewa'", fetch='one')
-                beban_lain_id = run_query("SELECT id FROM accounts WHERE account_name = 'Beban Lain-lain'", fetch='one')
-
-                total_hpp = get_account_balance(hpp_id[0], report_date.isoformat()) if hpp_id else 0
-                total_beban_gaji = get_account_balance(beban_gaji_id[0], report_date.isoformat()) if beban_gaji_id else 0
-                total_beban_listrik_air = get_account_balance(beban_listrik_air_id[0], report_date.isoformat()) if beban_listrik_air_id else 0
-                total_beban_sewa = get_account_balance(beban_sewa_id[0], report_date.isoformat()) if beban_sewa_id else 0
-                total_beban_lain = get_account_balance(beban_lain_id[0], report_date.isoformat()) if beban_lain_id else 0
-
-                st.markdown(f"- Harga Pokok Penjualan: **Rp {total_hpp:,.2f}**")
-                st.markdown(f"- Beban Gaji: **Rp {total_beban_gaji:,.2f}**")
-                st.markdown(f"- Beban Listrik & Air: **Rp {total_beban_listrik_air:,.2f}**")
-                st.markdown(f"- Beban Sewa: **Rp {total_beban_sewa:,.2f}**")
-                st.markdown(f"- Beban Lain-lain: **Rp {total_beban_lain:,.2f}**")
-                total_beban = total_hpp + total_beban_gaji + total_beban_listrik_air + total_beban_sewa + total_beban_lain
+                for row in tb.of_type('Beban'):
+                    st.markdown(f"- {row.account.name}: **Rp {row.balance:,.2f}**")
+                total_beban = tb.total('Beban')
                 st.markdown(f"**Total Beban: Rp {total_beban:,.2f}**")
 
                 laba_bersih = total_pendapatan - total_beban
@@ -1496,51 +1306,27 @@ def run_main_app():
                 
                 # Aset
                 st.markdown("#### Aset")
-                asset_accounts = get_df("SELECT id, account_name FROM accounts WHERE account_type = 'Aset'")
-                total_aset = 0
-                for _, acc in asset_accounts.iterrows():
-                    balance = get_account_balance(acc['id'], report_date.isoformat())
-                    st.markdown(f"- {acc['account_name']}: **Rp {balance:,.2f}**")
-                    total_aset += balance
+                for row in tb.of_type('Aset'):
+                    st.markdown(f"- {row.account.name}: **Rp {row.balance:,.2f}**")
+                total_aset = tb.total('Aset')
                 st.markdown(f"**Total Aset: Rp {total_aset:,.2f}**")
 
                 # Liabilitas
                 st.markdown("#### Liabilitas")
-                liability_accounts = get_df("SELECT id, account_name FROM accounts WHERE account_type = 'Liabilitas'")
-                total_liabilitas = 0
-                for _, acc in liability_accounts.iterrows():
-                    balance = get_account_balance(acc['id'], report_date.isoformat())
-                    st.markdown(f"- {acc['account_name']}: **Rp {balance:,.2f}**")
-                    total_liabilitas += balance
+                for row in tb.of_type('Liabilitas'):
+                    st.markdown(f"- {row.account.name}: **Rp {row.balance:,.2f}**")
+                total_liabilitas = tb.total('Liabilitas')
                 st.markdown(f"**Total Liabilitas: Rp {total_liabilitas:,.2f}**")
 
                 # Ekuitas
                 st.markdown("#### Ekuitas")
-                equity_accounts = get_df("SELECT id, account_name FROM accounts WHERE account_type = 'Ekuitas'")
-                total_ekuitas = 0
-                for _, acc in equity_accounts.iterrows():
-                    balance = get_account_balance(acc['id'], report_date.isoformat())
-                    st.markdown(f"- {acc['account_name']}: **Rp {balance:,.2f}**")
-                    total_ekuitas += balance
+                for row in tb.of_type('Ekuitas'):
+                    st.markdown(f"- {row.account.name}: **Rp {row.balance:,.2f}**")
+                total_ekuitas = tb.total('Ekuitas')
                 
                 # Laba Bersih dari Laba Rugi (untuk periode berjalan)
                 # Ini adalah penyederhanaan, idealnya laba bersih periode berjalan ditambahkan ke ekuitas
-                # Untuk tujuan demo, kita ambil laba bersih dari awal tahun sampai tanggal laporan
-                pendapatan_sales_id = run_query("SELECT id FROM accounts WHERE account_name = 'Pendapatan Penjualan'", fetch='one')
-                pendapatan_lain_id = run_query("SELECT id FROM accounts WHERE account_name = 'Pendapatan Lain-lain'", fetch='one')
-                hpp_id = run_query("SELECT id FROM accounts WHERE account_name = 'Harga Pokok Penjualan'", fetch='one')
-                beban_gaji_id = run_query("SELECT id FROM accounts WHERE account_name = 'Beban Gaji'", fetch='one')
-                beban_listrik_air_id = run_query("SELECT id FROM accounts WHERE account_name = 'Beban Listrik & Air'", fetch='one')
-                beban_sewa_id = run_query("SELECT id FROM accounts WHERE account_name = 'Beban Sewa'", fetch='one')
-                beban_lain_id = run_query("SELECT id FROM accounts WHERE account_name = 'Beban Lain-lain'", fetch='one')
-
-                laba_bersih_periode = (get_account_balance(pendapatan_sales_id[0], report_date.isoformat()) if pendapatan_sales_id else 0) + \
-                                     (get_account_balance(pendapatan_lain_id[0], report_date.isoformat()) if pendapatan_lain_id else 0) - \
-                                     (get_account_balance(hpp_id[0], report_date.isoformat()) if hpp_id else 0) - \
-                                     (get_account_balance(beban_gaji_id[0], report_date.isoformat()) if beban_gaji_id else 0) - \
-                                     (get_account_balance(beban_listrik_air_id[0], report_date.isoformat()) if beban_listrik_air_id else 0) - \
-                                     (get_account_balance(beban_sewa_id[0], report_date.isoformat()) if beban_sewa_id else 0) - \
-                                     (get_account_balance(beban_lain_id[0], report_date.isoformat()) if beban_lain_id else 0)
+                laba_bersih_periode = tb.net_income()
                 
                 st.markdown(f"- Laba Bersih Periode: **Rp {laba_bersih_periode:,.2f}**")
                 total_ekuitas += laba_bersih_periode # Tambahkan laba bersih ke ekuitas untuk neraca
@@ -1564,28 +1350,26 @@ def run_main_app():
             st.dataframe(get_df("SELECT id, name AS 'Nama', address AS 'Alamat', phone AS 'Telepon', email AS 'Email' FROM customers"), use_container_width=True)
             st.markdown("---")
             st.subheader("Tambah/Edit Pelanggan")
-            customers_df = get_df("SELECT id, name FROM customers")
-            customer_options = {row['name']: row['id'] for _, row in customers_df.iterrows()}
-            
             edit_cust_mode = st.checkbox("Mode Edit Pelanggan yang Ada?", key="edit_cust_mode_checkbox")
             selected_cust_id = None
-            if edit_cust_mode and not customers_df.empty:
-                selected_cust_name = st.selectbox("Pilih Pelanggan untuk Diedit", list(customer_options.keys()), key="select_cust_to_edit")
-                selected_cust_id = customer_options[selected_cust_name]
-                cust_data = run_query("SELECT * FROM customers WHERE id = ?", (selected_cust_id,), fetch='one')
-                
-                with st.form("edit_customer_form"):
-                    st.info(f"Mengedit pelanggan: **{cust_data[1]}**")
-                    new_cust_name = st.text_input("Nama Pelanggan", value=cust_data[1], key="edit_cust_name")
-                    new_cust_address = st.text_area("Alamat", value=cust_data[2], key="edit_cust_address")
-                    new_cust_phone = st.text_input("Telepon", value=cust_data[3], key="edit_cust_phone")
-                    new_cust_email = st.text_input("Email", value=cust_data[4], key="edit_cust_email")
-                    if st.form_submit_button("Simpan Perubahan Pelanggan"):
-                        if new_cust_name:
-                            run_query("UPDATE customers SET name=?, address=?, phone=?, email=? WHERE id=?", (new_cust_name, new_cust_address, new_cust_phone, new_cust_email, selected_cust_id))
-                            st.success("Pelanggan berhasil diperbarui!"); st.rerun()
-                        else:
-                            st.error("Nama Pelanggan tidak boleh kosong.")
+            if edit_cust_mode:
+                _, selected_cust_id = search_picker('customer', "Cari pelanggan untuk diedit (nama, telepon, email atau alamat)", "select_cust_to_edit")
+                cust_data = run_query("SELECT * FROM customers WHERE id = ?", (selected_cust_id,), fetch='one') if selected_cust_id else None
+                if not cust_data:
+                    st.info("Ketik kata kunci di atas lalu pilih pelanggan yang akan diedit.")
+                else:
+                    with st.form("edit_customer_form"):
+                        st.info(f"Mengedit pelanggan: **{cust_data[1]}**")
+                        new_cust_name = st.text_input("Nama Pelanggan", value=cust_data[1], key="edit_cust_name")
+                        new_cust_address = st.text_area("Alamat", value=cust_data[2], key="edit_cust_address")
+                        new_cust_phone = st.text_input("Telepon", value=cust_data[3], key="edit_cust_phone")
+                        new_cust_email = st.text_input("Email", value=cust_data[4], key="edit_cust_email")
+                        if st.form_submit_button("Simpan Perubahan Pelanggan"):
+                            if new_cust_name:
+                                run_query("UPDATE customers SET name=?, address=?, phone=?, email=? WHERE id=?", (new_cust_name, new_cust_address, new_cust_phone, new_cust_email, selected_cust_id))
+                                st.success("Pelanggan berhasil diperbarui!"); st.rerun()
+                            else:
+                                st.error("Nama Pelanggan tidak boleh kosong.")
             else:
                 with st.form("add_customer_form"):
                     new_cust_name = st.text_input("Nama Pelanggan Baru", placeholder="Contoh: Budi Santoso", key="add_cust_name")
@@ -1604,28 +1388,26 @@ def run_main_app():
             st.dataframe(get_df("SELECT id, name AS 'Nama', address AS 'Alamat', phone AS 'Telepon', email AS 'Email' FROM suppliers"), use_container_width=True)
             st.markdown("---")
             st.subheader("Tambah/Edit Pemasok")
-            suppliers_df = get_df("SELECT id, name FROM suppliers")
-            supplier_options = {row['name']: row['id'] for _, row in suppliers_df.iterrows()}
-            
             edit_supp_mode = st.checkbox("Mode Edit Pemasok yang Ada?", key="edit_supp_mode_checkbox")
             selected_supp_id = None
-            if edit_supp_mode and not suppliers_df.empty:
-                selected_supp_name = st.selectbox("Pilih Pemasok untuk Diedit", list(supplier_options.keys()), key="select_supp_to_edit")
-                selected_supp_id = supplier_options[selected_supp_name]
-                supp_data = run_query("SELECT * FROM suppliers WHERE id = ?", (selected_supp_id,), fetch='one')
-                
-                with st.form("edit_supplier_form"):
-                    st.info(f"Mengedit pemasok: **{supp_data[1]}**")
-                    new_supp_name = st.text_input("Nama Pemasok", value=supp_data[1], key="edit_supp_name")
-                    new_supp_address = st.text_area("Alamat", value=supp_data[2], key="edit_supp_address")
-                    new_supp_phone = st.text_input("Telepon", value=supp_data[3], key="edit_supp_phone")
-                    new_supp_email = st.text_input("Email", value=supp_data[4], key="edit_supp_email")
-                    if st.form_submit_button("Simpan Perubahan Pemasok"):
-                        if new_supp_name:
-                            run_query("UPDATE suppliers SET name=?, address=?, phone=?, email=? WHERE id=?", (new_supp_name, new_supp_address, new_supp_phone, new_supp_email, selected_supp_id))
-                            st.success("Pemasok berhasil diperbarui!"); st.rerun()
-                        else:
-                            st.error("Nama Pemasok tidak boleh kosong.")
+            if edit_supp_mode:
+                _, selected_supp_id = search_picker('supplier', "Cari pemasok untuk diedit (nama, telepon, email atau alamat)", "select_supp_to_edit")
+                supp_data = run_query("SELECT * FROM suppliers WHERE id = ?", (selected_supp_id,), fetch='one') if selected_supp_id else None
+                if not supp_data:
+                    st.info("Ketik kata kunci di atas lalu pilih pemasok yang akan diedit.")
+                else:
+                    with st.form("edit_supplier_form"):
+                        st.info(f"Mengedit pemasok: **{supp_data[1]}**")
+                        new_supp_name = st.text_input("Nama Pemasok", value=supp_data[1], key="edit_supp_name")
+                        new_supp_address = st.text_area("Alamat", value=supp_data[2], key="edit_supp_address")
+                        new_supp_phone = st.text_input("Telepon", value=supp_data[3], key="edit_supp_phone")
+                        new_supp_email = st.text_input("Email", value=supp_data[4], key="edit_supp_email")
+                        if st.form_submit_button("Simpan Perubahan Pemasok"):
+                            if new_supp_name:
+                                run_query("UPDATE suppliers SET name=?, address=?, phone=?, email=? WHERE id=?", (new_supp_name, new_supp_address, new_supp_phone, new_supp_email, selected_supp_id))
+                                st.success("Pemasok berhasil diperbarui!"); st.rerun()
+                            else:
+                                st.error("Nama Pemasok tidak boleh kosong.")
             else:
                 with st.form("add_supplier_form"):
                     new_supp_name = st.text_input("Nama Pemasok Baru", placeholder="Contoh: PT. Kopi Jaya", key="add_supp_name")
@@ -1694,6 +1476,70 @@ def run_main_app():
             else:
                 st.info("Tidak ada aktiva tetap untuk diedit.")
 
+    # --- Halaman Performa (Admin) ---
+    elif menu == "⏱️ Performa":
+        import pandas as pd
+        import plotly.graph_objects as go
+        st.header("⏱️ Performa Query & Halaman")
+        col_toggle, col_explain, col_slow, col_reset = st.columns(4)
+        enabled = col_toggle.toggle("Instrumentasi aktif", value=perf.ENABLED, help="Saat mati, koneksi memakai jalur sqlite3 biasa tanpa pencatatan.")
+        explain = col_explain.toggle("EXPLAIN query lambat", value=perf.EXPLAIN)
+        perf.SLOW_MS = col_slow.number_input("Ambang lambat (ms)", min_value=1.0, value=float(perf.SLOW_MS), step=10.0)
+        if enabled != perf.ENABLED or explain != perf.EXPLAIN:
+            if enabled: perf.enable(explain)
+            else: perf.disable()
+            st.rerun()
+        if col_reset.button("Kosongkan Catatan", use_container_width=True):
+            perf.reset(); st.rerun()
+        if not perf.ENABLED:
+            st.info("Instrumentasi sedang mati. Nyalakan di atas (atau jalankan aplikasi dengan KASIR_PERF=1), lalu buka halaman yang terasa lambat.")
+
+        for fp, details in perf.full_scans().items():
+            st.warning(f"Full table scan ({', '.join(details)}): `{fp[:200]}`")
+
+        st.subheader("Query Paling Lambat")
+        col_order, col_n = st.columns([2, 1])
+        order_labels = {"Total waktu": "total_ms", "Durasi terlama": "max_ms", "Rata-rata": "mean_ms", "Jumlah panggilan": "calls"}
+        order_by = order_labels[col_order.selectbox("Urutkan menurut", list(order_labels))]
+        top_n = col_n.number_input("Top-N", min_value=5, max_value=200, value=20, step=5)
+        stats = perf.top_queries(top_n, order_by)
+        if stats:
+            stats_df = pd.DataFrame([{'Query': stat.fingerprint, 'Panggilan': stat.calls, 'Total (ms)': stat.total_ms, 'Rata-rata (ms)': stat.mean_ms,
+                                      'Terlama (ms)': stat.max_ms, 'Baris/Query': stat.mean_rows, 'Halaman': ", ".join(stat.pages),
+                                      'Full Scan': "⚠️" if stat.full_scans else ""} for stat in stats])
+            st.dataframe(stats_df.style.format({'Total (ms)': '{:,.1f}', 'Rata-rata (ms)': '{:,.2f}', 'Terlama (ms)': '{:,.1f}', 'Baris/Query': '{:,.1f}'}),
+                         use_container_width=True, hide_index=True)
+            planned = [stat.fingerprint for stat in stats if perf.plan_of(stat.fingerprint)]
+            if planned:
+                with st.expander("Rencana Query (EXPLAIN QUERY PLAN)"):
+                    chosen_fp = st.selectbox("Query", planned, format_func=lambda fp: fp[:120])
+                    st.code("\n".join(perf.plan_of(chosen_fp)))
+        else:
+            st.info("Belum ada query yang tercatat.")
+
+        st.subheader("Waktu Render per Halaman")
+        timings = perf.rerun_timings()
+        if timings:
+            query_totals = perf.page_query_totals()
+            st.dataframe(pd.DataFrame([{'Halaman': page, 'Rerun': len(values), 'Median (ms)': pd.Series(values).median(),
+                                        'p95 (ms)': pd.Series(values).quantile(0.95), 'Terlama (ms)': max(values),
+                                        'Query': query_totals.get(page, (0, 0.0))[0], 'Waktu Query (ms)': query_totals.get(page, (0, 0.0))[1]}
+                                       for page, values in timings.items()]).style.format(precision=1),
+                         use_container_width=True, hide_index=True)
+            fig_hist = go.Figure([go.Histogram(x=values, name=page, opacity=0.6) for page, values in timings.items()])
+            fig_hist.update_layout(barmode='overlay', xaxis_title='Durasi rerun (ms)', yaxis_title='Jumlah rerun', title_text='Histogram Waktu Render', title_x=0.5)
+            st.plotly_chart(fig_hist, use_container_width=True)
+        else:
+            st.info("Belum ada rerun yang tercatat.")
+
+        st.subheader("Startup")
+        st.caption("Bootstrap (cek skema, migrasi, data awal) berjalan sekali per proses: " + ", ".join(bootstrap.format_steps(init_db())))
+        if st.button("Ukur Waktu Impor Modul Berat", help="Mengimpor setiap modul di proses Python baru (python -X importtime); butuh beberapa detik."):
+            st.session_state.import_times = bootstrap.import_times()
+        if st.session_state.get('import_times'):
+            st.dataframe(pd.DataFrame([{'Modul': module, 'Waktu Impor (ms)': ms} for module, ms in st.session_state.import_times.items()]).style.format(precision=1, na_rep="tidak terpasang"),
+                         use_container_width=True, hide_index=True)
+
     # --- MENU BARU: Kelola & Hapus Data ---
     elif menu == "🗑️ Kelola & Hapus Data":
         st.header("🗑️ Kelola & Hapus Data")
@@ -1754,23 +1600,19 @@ def run_main_app():
         
         with tabs[4]:
             st.subheader("Hapus Data Absensi")
-            attendance_df = get_df("SELECT a.id, e.name, a.check_in FROM attendance a JOIN employees e ON a.employee_id = e.id ORDER BY a.check_in DESC")
-            if not attendance_df.empty:
-                attendance_options = {f"ID: {row['id']} - {row['name']} ({row['check_in']})": row['id'] for _, row in attendance_df.iterrows()}
-                selected_att_str = st.selectbox("Pilih absensi untuk dihapus", list(attendance_options.keys()), key="del_att_select_main")
+            att_id = attendance_picker("Pilih absensi untuk dihapus", "del_att_select_main")
+            if att_id is not None:
                 if st.button("Hapus Absensi Ini", type="primary", key="del_att_btn"):
-                    att_id = attendance_options[selected_att_str]
                     run_query("DELETE FROM attendance WHERE id=?", (att_id,)); 
                     st.success("Data absensi dihapus.")
                     st.rerun()
-            else: st.info("Tidak ada data absensi untuk dihapus.")
+            else: st.info("Tidak ada data absensi yang cocok.")
 
         # NEW: Delete Account
         with tabs[5]:
             st.subheader("Hapus Akun")
-            accounts_df = get_df("SELECT id, account_code, account_name FROM accounts")
-            if not accounts_df.empty:
-                account_options = {f"{row['account_code']} - {row['account_name']}": row['id'] for _, row in accounts_df.iterrows()}
+            account_options = accounts.options()
+            if account_options:
                 acc_to_delete_str = st.selectbox("Pilih akun untuk dihapus", list(account_options.keys()), key="del_acc_select_main")
                 if st.button(f"Hapus Akun '{acc_to_delete_str}'", type="primary", key="del_acc_btn"):
                     acc_id_to_delete = account_options[acc_to_delete_str]
@@ -1779,6 +1621,7 @@ def run_main_app():
                         st.error("Akun ini tidak bisa dihapus karena sudah digunakan dalam jurnal.")
                     else:
                         run_query("DELETE FROM accounts WHERE id=?", (acc_id_to_delete,)); 
+                        accounting.invalidate_registry(pool)
                         st.success(f"Akun '{acc_to_delete_str}' dihapus.")
                         st.rerun()
             else: st.info("Tidak ada akun untuk dihapus.")
@@ -1830,6 +1673,12 @@ def run_main_app():
 # --- TITIK MASUK APLIKASI ---
 # =====================================================================
 if __name__ == "__main__":
-    init_db()
-    check_login()
+    # Satu rerun Streamlit diukur ujung ke ujung untuk halaman Performa
+    with perf.rerun():
+        startup = init_db()
+        if startup.messages and not st.session_state.get('startup_reported'):
+            for line in startup.messages:
+                st.toast(line)
+            st.session_state.startup_reported = True
+        check_login()
 
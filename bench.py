@@ -0,0 +1,532 @@
+"""Benchmark performa jalur-jalur penting aplikasi kasir.
+
+Contoh:
+    python bench.py sale --sales 500
+    python bench.py trial-balance --sizes 10000 100000 1000000
+    python bench.py reports --sales 20000
+    python bench.py payroll --employees 30 --days 365
+    python bench.py pages --items 500000 --out hasil.json --compare hasil_lama.json
+    python bench.py perf --statements 100000
+    python bench.py startup --out startup.json --compare startup_lama.json
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import accounting
+import bootstrap
+import catalog as catalogs
+import costing
+import db
+import history
+import ledger
+import migrations
+import payroll
+import perf
+import receipts
+import reports
+import sales
+import search
+import seed
+import stock
+
+
+def make_fixture_db(path, n_products=86, n_ingredients=40, recipe_lines=(2, 6), seed=42):
+    """Membuat database uji dengan bagan akun, bahan, produk dan resep sintetis."""
+    rng = random.Random(seed)
+    pool = db.ConnectionPool(path)
+    migrations.ensure_schema(pool)
+    with pool.transaction() as conn:
+        conn.executemany("INSERT INTO accounts (account_code, account_name, account_type, normal_balance) VALUES (?, ?, ?, ?)", accounting.INITIAL_ACCOUNTS)
+        conn.execute("INSERT INTO employees (name, role, wage_amount, wage_period, is_active) VALUES ('bench', 'Operator', 0, 'Per Jam', 1)")
+        pack_prices = [rng.randrange(5000, 200000, 500) for _ in range(n_ingredients)]
+        conn.executemany("INSERT INTO ingredients (name, unit, cost_per_unit, stock, pack_weight, pack_price) VALUES (?, 'gr', ?, ?, 1000, ?)",
+                         [(f"Bahan {i}", pack_price / 1000, 1e12, pack_price) for i, pack_price in enumerate(pack_prices, 1)])
+        conn.executemany("INSERT INTO products (name, price) VALUES (?, ?)",
+                         [(f"Produk {i}", rng.randrange(5000, 35000, 1000)) for i in range(1, n_products + 1)])
+        conn.executemany("INSERT INTO recipes (product_id, ingredient_id, qty_per_unit) VALUES (?, ?, ?)",
+                         [(product_id, ingredient_id, rng.uniform(1, 50))
+                          for product_id in range(1, n_products + 1)
+                          for ingredient_id in rng.sample(range(1, n_ingredients + 1), rng.randint(*recipe_lines))])
+        stock.reset_ledger_from_sales(conn)  # stok awal bahan sebagai mutasi saldo awal
+    return pool
+
+
+def add_sales_journals(pool, n_lines, days=730, seed=11):
+    """Menambah jurnal penjualan sintetis (4 baris per jurnal) tersebar selama `days` hari terakhir."""
+    rng = random.Random(seed)
+    registry = accounting.get_registry(pool)
+    start = datetime.now() - timedelta(days=days)
+    with pool.transaction() as conn:
+        next_id = (conn.execute("SELECT IFNULL(MAX(id), 0) FROM journal_entries").fetchone()[0]) + 1
+        entries, items = [], []
+        for entry_id in range(next_id, next_id + n_lines // 4):
+            entry_date = (start + timedelta(seconds=rng.randrange(days * 86400))).strftime("%Y-%m-%d %H:%M:%S")
+            amount, cost = rng.randrange(10000, 150000, 1000), rng.uniform(3000, 40000)
+            entries.append((entry_id, entry_date, f"Penjualan Transaksi #{entry_id}"))
+            items += [(entry_id, registry.role(rng.choice(['cash', 'bank'])), amount, 0), (entry_id, registry.role('revenue'), 0, amount),
+                      (entry_id, registry.role('cogs'), cost, 0), (entry_id, registry.role('inventory'), 0, cost)]
+        conn.executemany("INSERT INTO journal_entries (id, entry_date, description) VALUES (?, ?, ?)", entries)
+        conn.executemany("INSERT INTO journal_items (journal_entry_id, account_id, debit, kredit) VALUES (?, ?, ?, ?)", items)
+    with pool.connection() as conn:
+        conn.execute("ANALYZE")
+
+
+def _legacy_account_balance(conn, account_id, end_date):
+    """Query per akun versi lama (`get_account_balance`), hanya untuk pembanding."""
+    total_debit, total_kredit, normal_balance = conn.execute("""
+        SELECT SUM(CASE WHEN ji.debit > 0 THEN ji.debit ELSE 0 END), SUM(CASE WHEN ji.kredit > 0 THEN ji.kredit ELSE 0 END), a.normal_balance
+        FROM journal_items ji JOIN journal_entries je ON ji.journal_entry_id = je.id JOIN accounts a ON ji.account_id = a.id
+        WHERE ji.account_id = ? AND je.entry_date <= ?
+    """, (account_id, end_date)).fetchone()
+    total_debit, total_kredit = total_debit or 0.0, total_kredit or 0.0
+    return total_debit - total_kredit if normal_balance == 'Debit' else total_kredit - total_debit
+
+
+def _timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_trial_balance(args):
+    """Waktu render Laba Rugi + Neraca terhadap ukuran jurnal (baris journal_items)."""
+    print(f"{'baris jurnal':>13} {'snapshot (ms)':>14} {'tanpa snapshot (ms)':>20} {'per akun lama (ms)':>19}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = make_fixture_db(os.path.join(tmp, "bench.db"))
+            add_sales_journals(pool, size)
+            registry = accounting.get_registry(pool)
+            as_of = date.today()
+            with pool.connection() as conn:
+                full = _timed(lambda: accounting.trial_balance(conn, registry, as_of, use_snapshots=False), args.repeat)
+                accounting.ensure_snapshots(conn)
+                snap = _timed(lambda: accounting.trial_balance(conn, registry, as_of), args.repeat)
+                legacy = "-"
+                if not args.skip_legacy:
+                    # Neraca lama: satu query per akun + 7 query lagi untuk laba periode berjalan
+                    account_ids = [acc.id for acc in registry.accounts] + [registry.id_of(name) for name in ['Pendapatan Penjualan', 'Pendapatan Lain-lain', 'Harga Pokok Penjualan', 'Beban Gaji', 'Beban Listrik & Air', 'Beban Sewa', 'Beban Lain-lain']]
+                    legacy = f"{_timed(lambda: [_legacy_account_balance(conn, account_id, as_of.isoformat()) for account_id in account_ids], args.repeat) * 1000:.1f}"
+            print(f"{size:>13} {snap * 1000:>14.1f} {full * 1000:>20.1f} {legacy:>19}")
+            pool.close()
+
+
+def _legacy_report(conn, start, end):
+    """Query Laporan versi lama (IN berisi semua id transaksi), alias ORDER BY sudah diperbaiki; hanya pembanding."""
+    ids = [row[0] for row in conn.execute("SELECT id FROM transactions WHERE transaction_date BETWEEN ? AND ?", (f"{start} 00:00:00", f"{end} 23:59:59.999999"))]
+    id_list = ','.join(map(str, ids))
+    laris = conn.execute(f"SELECT p.name, SUM(ti.quantity) AS total_qty FROM transaction_items ti JOIN products p ON ti.product_id = p.id WHERE ti.transaction_id IN ({id_list}) GROUP BY p.name ORDER BY total_qty DESC, p.name LIMIT 5").fetchall()
+    # HPP lama: join resep x bahan per produk saat laporan dibuka (bukan unit_cost saat penjualan)
+    hpp = dict(conn.execute("SELECT p.id, IFNULL(SUM(r.qty_per_unit * i.cost_per_unit), 0) FROM products p LEFT JOIN recipes r ON p.id = r.product_id LEFT JOIN ingredients i ON r.ingredient_id = i.id GROUP BY p.id"))
+    profit = {}
+    for name, product_id, quantity, price in conn.execute(f"SELECT p.name, p.id, ti.quantity, ti.price_per_unit FROM transaction_items ti JOIN products p ON ti.product_id = p.id WHERE ti.transaction_id IN ({id_list})"):
+        profit[name] = profit.get(name, 0.0) + (price - hpp[product_id]) * quantity
+    return laris, sorted(profit.items(), key=lambda item: (-item[1], item[0]))[:5]
+
+
+def bench_reports(args):
+    """Produk terlaris & paling menguntungkan: cocokkan reports.py dengan query lama lalu bandingkan waktunya."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = make_fixture_db(os.path.join(tmp, "bench.db"))
+        rng = random.Random(3)
+        with pool.connection() as conn:
+            product_names = [name for (name,) in conn.execute("SELECT name FROM products")]
+        start = date.today() - timedelta(days=args.days - 1)
+        for i in range(args.sales):
+            sold_at = datetime.combine(start, datetime.min.time()) + timedelta(seconds=rng.randrange(args.days * 86400))
+            cart = {name: rng.randint(1, 3) for name in rng.sample(product_names, rng.randint(1, 5))}
+            success, message, _, _ = sales.process_sale(pool, cart, rng.choice(["Cash", "Qris", "Card"]), 1, sold_at=sold_at.strftime("%Y-%m-%d %H:%M:%S"))
+            if not success:
+                raise SystemExit(f"Penjualan gagal: {message}")
+        # Rentang yang memotong data di tengah bulan, supaya batas awal/akhir ikut teruji
+        ranges = [(start, date.today()), (start + timedelta(days=10), start + timedelta(days=40)), (date.today(), date.today())]
+        print(f"{'rentang':>25} {'cocok':>6} {'reports (ms)':>13} {'IN lama (ms)':>13}")
+        failures = 0
+        with pool.connection() as conn:
+            for range_start, range_end in ranges:
+                new = (reports.best_sellers(conn, range_start, range_end), reports.most_profitable(conn, range_start, range_end))
+                legacy = _legacy_report(conn, range_start, range_end)
+                same = new[0] == legacy[0] and [name for name, _ in new[1]] == [name for name, _ in legacy[1]] \
+                    and all(abs(a - b) < 1e-6 for (_, a), (_, b) in zip(new[1], legacy[1]))
+                failures += not same
+                new_ms = _timed(lambda: (reports.best_sellers(conn, range_start, range_end), reports.most_profitable(conn, range_start, range_end)), args.repeat) * 1000
+                legacy_ms = _timed(lambda: _legacy_report(conn, range_start, range_end), args.repeat) * 1000
+                print(f"{f'{range_start} s/d {range_end}':>25} {'ya' if same else 'TIDAK':>6} {new_ms:>13.1f} {legacy_ms:>13.1f}")
+        pool.close()
+    if failures:
+        raise SystemExit(f"{failures} rentang tidak cocok dengan query lama.")
+
+
+def add_attendance(pool, n_employees, days, open_rate=0.02, seed=5):
+    """Menambah karyawan (campuran Per Jam/Per Hari/Per Bulan) dan satu shift per hari kerja selama `days` hari terakhir."""
+    rng = random.Random(seed)
+    periods = ['Per Jam', 'Per Hari', 'Per Bulan']
+    with pool.transaction() as conn:
+        first_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM employees").fetchone()[0] + 1
+        conn.executemany("INSERT INTO employees (id, name, role, wage_amount, wage_period, is_active) VALUES (?, ?, 'Operator', ?, ?, 1)",
+                         [(first_id + i, f"Karyawan {i}", rng.choice([15000, 120000, 3000000]), periods[i % 3]) for i in range(n_employees)])
+        rows = []
+        for day in range(days):
+            shift_date = datetime.combine(date.today() - timedelta(days=day), datetime.min.time())
+            for employee_id in range(first_id, first_id + n_employees):
+                if rng.random() < 0.2:
+                    continue
+                check_in = shift_date + timedelta(hours=rng.uniform(6, 12))
+                check_out = None if rng.random() < open_rate else check_in + timedelta(hours=rng.uniform(4, 10))
+                rows.append((employee_id, check_in.strftime("%Y-%m-%d %H:%M:%S"), check_out and check_out.strftime("%Y-%m-%d %H:%M:%S")))
+        conn.executemany("INSERT INTO attendance (employee_id, check_in, check_out) VALUES (?, ?, ?)", rows)
+    return len(rows)
+
+
+def _legacy_payroll(pool, start_date, end_date):
+    """Loop gaji versi lama di halaman Laporan (satu filter DataFrame per karyawan); hanya pembanding."""
+    import pandas as pd
+    start_datetime, end_datetime = datetime.combine(start_date, datetime.min.time()), datetime.combine(end_date, datetime.max.time())
+    employees_df = db.get_df(pool, "SELECT id, name, wage_amount, wage_period FROM employees WHERE is_active = 1")
+    attendance_df = db.get_df(pool, "SELECT * FROM attendance WHERE check_in BETWEEN ? AND ?", (start_datetime.strftime("%Y-%m-%d %H:%M:%S"), end_datetime.strftime("%Y-%m-%d %H:%M:%S")))
+    salaries = {}
+    if not attendance_df.empty:
+        attendance_df['check_in'] = pd.to_datetime(attendance_df['check_in'])
+        attendance_df['check_out'] = pd.to_datetime(attendance_df['check_out'])
+        for _, emp in employees_df.iterrows():
+            emp_attendance = attendance_df[attendance_df['employee_id'] == emp['id']].copy()
+            if not emp_attendance.empty:
+                emp_salary = 0
+                if emp['wage_period'] == 'Per Jam':
+                    emp_attendance['duration'] = (emp_attendance['check_out'] - emp_attendance['check_in']).dt.total_seconds() / 3600
+                    emp_salary = emp_attendance['duration'].sum() * emp['wage_amount']
+                elif emp['wage_period'] == 'Per Hari':
+                    emp_salary = emp_attendance['check_in'].dt.date.nunique() * emp['wage_amount']
+                elif emp['wage_period'] == 'Per Bulan':
+                    emp_salary = (emp['wage_amount'] / 30) * ((end_date - start_date).days + 1)
+                salaries[emp['id']] = emp_salary
+    return salaries
+
+
+def bench_payroll(args):
+    """Gaji semua karyawan: payroll.compute (satu GROUP BY) vs loop per karyawan versi lama."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = make_fixture_db(os.path.join(tmp, "bench.db"))
+        shifts = add_attendance(pool, args.employees, args.days)
+        start_date, end_date = date.today() - timedelta(days=args.days - 1), date.today()
+        with pool.connection() as conn:
+            new_ms = _timed(lambda: payroll.compute(conn, start_date, end_date), args.repeat) * 1000
+            new = {line.employee_id: line.salary for line in payroll.compute(conn, start_date, end_date)}
+        print(f"{args.employees} karyawan, {shifts} shift: payroll.compute {new_ms:.1f} ms")
+        if not args.skip_legacy:
+            legacy_ms = _timed(lambda: _legacy_payroll(pool, start_date, end_date), args.repeat) * 1000
+            legacy = _legacy_payroll(pool, start_date, end_date)
+            mismatched = [employee_id for employee_id in set(new) | set(legacy)
+                          if abs(new.get(employee_id, float("nan")) - legacy.get(employee_id, float("nan"))) > 1e-4 * max(1.0, abs(legacy.get(employee_id, 0)))
+                          or (employee_id in new) != (employee_id in legacy)]
+            print(f"loop lama {legacy_ms:.1f} ms; {'cocok' if not mismatched else f'{len(mismatched)} karyawan TIDAK cocok'}")
+            if mismatched:
+                raise SystemExit(1)
+        pool.close()
+
+
+def bench_sale(args):
+    """Throughput penjualan (penjualan/detik) untuk keranjang 1-20 baris."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = make_fixture_db(os.path.join(tmp, "bench.db"))
+        with pool.connection() as conn:
+            product_names = [name for (name,) in conn.execute("SELECT name FROM products")]
+        rng = random.Random(7)
+        print(f"{'baris':>6} {'penjualan':>10} {'detik':>8} {'penjualan/s':>12} {'ms/penjualan':>13}")
+        for cart_lines in args.cart_lines:
+            carts = [{name: rng.randint(1, 3) for name in rng.sample(product_names, cart_lines)} for _ in range(args.sales)]
+            started = time.perf_counter()
+            for cart in carts:
+                success, message, _, _ = sales.process_sale(pool, cart, rng.choice(["Cash", "Qris", "Card"]), 1)
+                if not success:
+                    raise SystemExit(f"Penjualan gagal: {message}")
+            elapsed = time.perf_counter() - started
+            print(f"{cart_lines:>6} {args.sales:>10} {elapsed:>8.2f} {args.sales / elapsed:>12.1f} {elapsed / args.sales * 1000:>13.2f}")
+        pool.close()
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _rolled_back(pool, fn, *args):
+    """Menjalankan `fn(conn, *args)` dalam transaksi tulis lalu membatalkannya, agar database uji tidak berubah."""
+    try:
+        with pool.transaction() as conn:
+            fn(conn, *args)
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def page_cases(pool, today):
+    """[(halaman, nama, fungsi)]: query & komputasi di balik setiap cabang `menu` app.py, dengan data terbaru sebagai acuan."""
+    registry = accounting.get_registry(pool)
+    month_start, year_start = today.replace(day=1), today - timedelta(days=364)
+    with pool.connection() as conn:
+        latest_id = conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0]
+        cart = {name: 1 for (name,) in conn.execute("SELECT name FROM products ORDER BY id LIMIT 3")}
+        # Kursor halaman ke-20 Riwayat Transaksi (setahun), seperti setelah 19 kali "Berikutnya"
+        cursor = None
+        for _ in range(19):
+            cursor = history.transaction_page(conn, year_start, today, cursor).next_cursor
+    catalog = catalogs.get_catalog(pool)
+    cash = registry.by_id[registry.role('cash')]
+
+    def conn_case(fn):
+        def run():
+            with pool.connection() as conn:
+                return fn(conn)
+        return run
+
+    def report_case(fn):
+        def run():
+            accounting.refresh_snapshots(pool)
+            with pool.transaction("DEFERRED") as conn:
+                return fn(conn)
+        return run
+
+    def sale(conn):
+        sales.record_sale(conn, catalogs.get_catalog(pool), registry, cart, 'Cash', 1)
+
+    return [
+        ("Kasir", "muat katalog", conn_case(catalogs.load)),
+        ("Kasir", "cari produk", conn_case(lambda conn: search.ids(conn, "latt", 'product', limit=40))),
+        ("Kasir", "cari produk salah ketik", conn_case(lambda conn: search.ids(conn, "capucino", 'product', limit=40))),
+        ("Kasir", "simpan penjualan", lambda: _rolled_back(pool, sale)),
+        ("Kasir", "struk thermal", conn_case(lambda conn: receipts.render_escpos(receipts.load(conn, latest_id)))),
+        ("Riwayat Transaksi", "halaman 1 (bulan ini)", conn_case(lambda conn: history.transaction_page(conn, month_start, today))),
+        ("Riwayat Transaksi", "halaman 20 (setahun)", conn_case(lambda conn: history.transaction_page(conn, year_start, today, cursor))),
+        ("Riwayat Transaksi", "filter Card >= 50rb (setahun)",
+         conn_case(lambda conn: history.transaction_page(conn, year_start, today, payment_method='Card', min_total=50000))),
+        ("Riwayat Transaksi", "detail item", conn_case(lambda conn: history.transaction_items(conn, latest_id))),
+        ("Laporan", "rekap harian (bulan)", conn_case(lambda conn: reports.daily_totals(conn, month_start, today))),
+        ("Laporan", "rekap harian (setahun)", conn_case(lambda conn: reports.daily_totals(conn, year_start, today))),
+        ("Laporan", "terlaris & menguntungkan (setahun)",
+         conn_case(lambda conn: (reports.best_sellers(conn, year_start, today), reports.most_profitable(conn, year_start, today)))),
+        ("Laporan", "gaji (bulan)", conn_case(lambda conn: payroll.compute(conn, month_start, today))),
+        ("Laporan", "transaksi mentah (halaman 1)", conn_case(lambda conn: history.transaction_page(conn, month_start, today))),
+        ("Laporan", "pengeluaran (bulan)", conn_case(lambda conn: conn.execute(
+            "SELECT * FROM expenses WHERE date BETWEEN ? AND ?", (month_start.isoformat(), today.isoformat())).fetchall())),
+        ("Manajemen Stok", "stok per tanggal (90 hari lalu)", conn_case(lambda conn: stock.balances_as_of(conn, today - timedelta(days=90)))),
+        ("Manajemen Stok", "pemakaian bahan (bulan)", conn_case(lambda conn: stock.consumption(conn, month_start, today))),
+        ("HPP", "tabel HPP", lambda: [catalog.price(product_id) - catalog.unit_cost(product_id) for product_id in catalog.ids]),
+        ("HPP", "hitung ulang dari resep", conn_case(costing.recompute_all)),
+        ("Akuntansi", "Laba Rugi", report_case(lambda conn: accounting.trial_balance(conn, registry, today).total('Pendapatan', 'Beban'))),
+        ("Akuntansi", "Neraca", report_case(lambda conn: accounting.trial_balance(conn, registry, today).net_income())),
+        ("Akuntansi", "Neraca tanpa snapshot", conn_case(lambda conn: accounting.trial_balance(conn, registry, today, use_snapshots=False))),
+        ("Akuntansi", "Jurnal Umum halaman 1", conn_case(lambda conn: ledger.journal_page(conn, month_start, today))),
+        ("Akuntansi", "Buku Besar Kas (bulan)", report_case(lambda conn: ledger.account_ledger(
+            conn, cash, month_start, today, ledger.opening_balance(conn, registry, cash.id, month_start)))),
+        ("Kelola & Hapus Data", "daftar pilihan", conn_case(lambda conn: [conn.execute(query).fetchall() for query in (
+            "SELECT id, name FROM ingredients", "SELECT id, name FROM products", "SELECT id, description FROM expenses",
+            "SELECT id, name FROM employees", "SELECT id, name FROM customers", "SELECT id, name FROM suppliers")])),
+        ("Kelola & Hapus Data", "cari data master", conn_case(lambda conn: [search.search(conn, term, [kind]) for term, kind in (
+            ("gula", 'ingredient'), ("listrik", 'expense'), ("budi", 'customer'), ("kopi", 'supplier'))])),
+        ("Kelola & Hapus Data", "cari absensi", conn_case(lambda conn: history.attendance_search(conn, today.strftime("%Y-%m")))),
+        ("Kelola & Hapus Data", "cek akun terpakai", conn_case(lambda conn: conn.execute(
+            "SELECT COUNT(*) FROM journal_items WHERE account_id = ?", (cash.id,)).fetchone())),
+        ("Kelola & Hapus Data", "hapus transaksi", lambda: _rolled_back(pool, sales.delete_sale, latest_id)),
+    ]
+
+
+def _run_cases(cases, repeat):
+    results = {}
+    for page, name, fn in cases:
+        fn()  # pemanasan: cache halaman SQLite & statement
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[f"{page} / {name}"] = {'page': page, 'best_ms': round(min(timings), 3), 'median_ms': round(statistics.median(timings), 3)}
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_pages(args):
+    """Waktu query & komputasi di balik setiap halaman menu terhadap database seed; hasil disimpan sebagai JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        today = args.today or date.today()
+        path = args.db or os.path.join(tmp, "pages.db")
+        if not args.db:
+            print(f"Membuat database seed {args.items:,} item / {args.days} hari ...")
+            seed.seed(path, args.items, args.days, today, progress=lambda line: None)
+        pool = db.ConnectionPool(path)
+        migrations.ensure_schema(pool)
+        with pool.connection() as conn:
+            counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ("transactions", "transaction_items", "journal_items", "attendance", "expenses")}
+        results = _run_cases(page_cases(pool, today), args.repeat)
+        pool.close()
+
+    meta = {'today': today.isoformat(), 'repeat': args.repeat, 'rows': counts}
+    regressions = _report(results, meta, args, "halaman / kasus")
+    if regressions:
+        raise SystemExit(f"{regressions} kasus lebih lambat > {args.threshold:g}% dibanding {args.compare}.")
+
+
+def _report(results, meta, args, heading):
+    """Mencetak hasil (dan perbandingan dengan --compare), menyimpan JSON ke --out; mengembalikan jumlah regresi."""
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+    regressions = 0
+    print(f"{heading:<58} {'terbaik ms':>11} {'median ms':>10} {'sebelumnya':>11}")
+    for key, result in results.items():
+        line = f"{key:<58} {result['best_ms']:>11.2f} {result['median_ms']:>10.2f}"
+        if previous and key in previous:
+            before = previous[key]['median_ms']
+            change = (result['median_ms'] - before) / before * 100 if before else 0.0
+            # Selisih di bawah 1 ms dianggap derau pengukuran
+            slower = change > args.threshold and result['median_ms'] - before > 1.0
+            regressions += slower
+            line += f" {before:>11.2f} {change:>+6.0f}%{'  REGRESI' if slower else ''}"
+        print(line)
+
+    report = {
+        'meta': {'created_at': datetime.now().isoformat(timespec='seconds'), 'git': _git_revision(), 'python': sys.version.split()[0],
+                 'sqlite': sqlite3.sqlite_version, **meta},
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Hasil disimpan ke {args.out}")
+    return regressions
+
+
+# Modul yang tidak boleh dimuat sebelum form login tampil
+LAZY_MODULES = ("plotly", "fpdf")
+
+
+def bench_startup(args):
+    """Cold start: waktu impor app.py (form login) & modul berat di proses baru, plus modul berat yang ikut termuat."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    startup = (bootstrap.import_profile("pass") or ({}, set()))[0]
+    targets = {"app (form login)": "import app", **{f"import {module}": f"import {module}" for module in bootstrap.HEAVY_MODULES}}
+    results, loaded = {}, None
+    for label, statement in targets.items():
+        timings = []
+        for _ in range(args.repeat):
+            profile = bootstrap.import_profile(statement, cwd=here)
+            if profile is None:
+                break
+            timings.append(sum(us for name, us in profile[0].items() if name not in startup) / 1000)
+            if label.startswith("app"):
+                loaded = sorted({name.split(".")[0] for name in profile[1]} & {module.split(".")[0] for module in bootstrap.HEAVY_MODULES})
+        if not timings:
+            print(f"{label}: gagal diimpor (modul belum terpasang?)")
+            continue
+        results[label] = {'page': 'startup', 'best_ms': round(min(timings), 3), 'median_ms': round(statistics.median(timings), 3)}
+
+    regressions = _report(results, {'repeat': args.repeat, 'app_loads': loaded}, args, "impor (proses baru)")
+    if loaded is not None:
+        print(f"Modul berat yang dimuat saat import app: {', '.join(loaded) or '-'}")
+    eager = [module for module in LAZY_MODULES if loaded and module in loaded]
+    if eager:
+        raise SystemExit(f"{', '.join(eager)} ikut dimuat sebelum form login; impor di halaman yang memakainya.")
+    if regressions:
+        raise SystemExit(f"{regressions} impor lebih lambat > {args.threshold:g}% dibanding {args.compare}.")
+
+
+def bench_perf(args):
+    """Biaya instrumentasi perf.py per statement: sqlite3 murni vs instrumentasi mati vs menyala."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = make_fixture_db(os.path.join(tmp, "bench.db"))
+        raw = sqlite3.connect(pool.path)
+
+        def run(conn):
+            for i in range(args.statements):
+                conn.execute("SELECT name, price FROM products WHERE id = ?", (i % 86 + 1,)).fetchone()
+
+        was_enabled = perf.ENABLED
+        with pool.connection() as conn:
+            perf.disable()
+            timings = {"sqlite3 murni": _timed(lambda: run(raw), args.repeat), "instrumentasi mati": _timed(lambda: run(conn), args.repeat)}
+            perf.enable(explain=False)
+            timings["instrumentasi menyala"] = _timed(lambda: run(conn), args.repeat)
+        perf.ENABLED = was_enabled
+        perf.reset()
+        raw.close(); pool.close()
+    base = timings["sqlite3 murni"]
+    for label, seconds in timings.items():
+        print(f"{label:<22} {seconds / args.statements * 1e6:>7.2f} us/statement ({(seconds - base) / base * 100:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("sale", help=bench_sale.__doc__)
+    p.add_argument("--sales", type=int, default=300, help="jumlah penjualan per ukuran keranjang")
+    p.add_argument("--cart-lines", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    p.set_defaults(func=bench_sale)
+
+    p = sub.add_parser("trial-balance", help=bench_trial_balance.__doc__)
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--skip-legacy", action="store_true", help="lewati pembanding query per akun versi lama")
+    p.set_defaults(func=bench_trial_balance)
+
+    p = sub.add_parser("reports", help=bench_reports.__doc__)
+    p.add_argument("--sales", type=int, default=5000, help="jumlah penjualan sintetis")
+    p.add_argument("--days", type=int, default=90, help="rentang hari penjualan sintetis")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_reports)
+
+    p = sub.add_parser("payroll", help=bench_payroll.__doc__)
+    p.add_argument("--employees", type=int, default=30)
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--skip-legacy", action="store_true", help="lewati pembanding loop versi lama (butuh pandas)")
+    p.set_defaults(func=bench_payroll)
+
+    p = sub.add_parser("pages", help=bench_pages.__doc__)
+    p.add_argument("--db", help="database yang sudah ada (bawaan: seed baru di folder sementara)")
+    p.add_argument("--items", type=int, default=100_000, help="ukuran seed (baris item penjualan)")
+    p.add_argument("--days", type=int, default=730)
+    p.add_argument("--today", type=date.fromisoformat, help="tanggal acuan halaman (bawaan: hari ini)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--out", help="simpan hasil sebagai JSON")
+    p.add_argument("--compare", help="JSON hasil sebelumnya; kasus yang median-nya naik > --threshold dianggap regresi")
+    p.add_argument("--threshold", type=float, default=50.0, help="ambang regresi (persen)")
+    p.set_defaults(func=bench_pages)
+
+    p = sub.add_parser("startup", help=bench_startup.__doc__)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--out", help="simpan hasil sebagai JSON")
+    p.add_argument("--compare", help="JSON hasil sebelumnya; impor yang median-nya naik > --threshold dianggap regresi")
+    p.add_argument("--threshold", type=float, default=50.0, help="ambang regresi (persen)")
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("perf", help=bench_perf.__doc__)
+    p.add_argument("--statements", type=int, default=100_000)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_perf)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
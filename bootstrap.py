@@ -0,0 +1,115 @@
+"""Bootstrap aplikasi: skema & data awal sekali per proses dan file database, plus laporan waktu startup.
+
+app.py memanggil `run` lewat st.cache_resource, jadi rerun Streamlit tidak lagi menjalankan
+migrasi maupun cek data awal. Cek "skema terkini" hanya membaca `PRAGMA user_version` di header
+file; migrasi hanya dijalankan bila versinya lebih lama dari migrasi terakhir.
+
+    python bootstrap.py [path_db]   # bootstrap + waktu impor pandas, plotly, fpdf, bcrypt
+"""
+import re
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+import accounting
+import catalog as catalogs
+import db
+import migrations
+
+HEAVY_MODULES = ("pandas", "plotly.graph_objects", "fpdf", "bcrypt", "streamlit")
+
+Report = namedtuple("Report", "steps messages")  # steps: [(langkah, ms)], messages: [teks untuk toast]
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def schema_is_current(conn):
+    """True bila semua migrasi sudah diterapkan ke file database ini."""
+    return migrations.get_version(conn) >= migrations.SCHEMA_VERSION
+
+
+def seed_defaults(conn):
+    """Akun admin/operator, produk awal dan bagan akun standar bila belum ada; mengembalikan pesan."""
+    has_admin, has_products, has_accounts = conn.execute("""
+        SELECT EXISTS (SELECT 1 FROM employees WHERE name = 'admin'),
+               EXISTS (SELECT 1 FROM products), EXISTS (SELECT 1 FROM accounts)
+    """).fetchone()
+    messages = []
+    if not has_admin:
+        import bcrypt  # hanya dibutuhkan sekali, saat database baru
+
+        conn.executemany(
+            "INSERT INTO employees (name, password, role, wage_amount, wage_period, is_active) VALUES (?, ?, ?, ?, ?, ?)", [
+                ('admin', bcrypt.hashpw('admin'.encode('utf8'), bcrypt.gensalt()), 'Admin', 0, 'Per Bulan', 1),
+                ('operator', bcrypt.hashpw('operator'.encode('utf8'), bcrypt.gensalt()), 'Operator', 0, 'Per Jam', 1),
+            ])
+        messages.append("Akun awal (admin/admin, operator/operator) berhasil dibuat.")
+    if not has_products:
+        conn.executemany("INSERT INTO products (name, price) VALUES (?, ?)", catalogs.INITIAL_PRODUCTS)
+        messages.append("Daftar produk awal berhasil ditambahkan.")
+    if not has_accounts:
+        conn.executemany("INSERT INTO accounts (account_code, account_name, account_type, normal_balance) VALUES (?, ?, ?, ?)",
+                         accounting.INITIAL_ACCOUNTS)
+        messages.append("Daftar akun awal berhasil ditambahkan.")
+    return messages
+
+
+def run(pool):
+    """Bootstrap satu file database: cek skema, migrasi bila perlu, data awal. Mengembalikan Report."""
+    steps, messages = [], []
+
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        current = schema_is_current(conn)
+    steps.append(("cek skema", (time.perf_counter() - started) * 1000))
+
+    if not current:
+        started = time.perf_counter()
+        messages += migrations.format_report(migrations.ensure_schema(pool))
+        steps.append(("migrasi", (time.perf_counter() - started) * 1000))
+
+    started = time.perf_counter()
+    with pool.transaction() as conn:
+        seeded = seed_defaults(conn)
+    if any("akun awal" in message for message in seeded):
+        accounting.invalidate_registry(pool)
+    messages += seeded
+    steps.append(("data awal", (time.perf_counter() - started) * 1000))
+    return Report(steps, messages)
+
+
+def import_profile(statement, python=sys.executable, cwd=None):
+    """Jalankan `statement` di proses baru dengan `-X importtime`.
+
+    Mengembalikan ({modul tingkat atas: waktu kumulatif us}, {semua modul yang diimpor}); None bila gagal."""
+    result = subprocess.run([python, "-X", "importtime", "-c", statement], capture_output=True, text=True, cwd=cwd)
+    if result.returncode != 0:
+        return None
+    matches = [match for match in map(_IMPORTTIME.match, result.stderr.splitlines()) if match]
+    # Baris tingkat atas = satu spasi indentasi; waktunya sudah mencakup modul anak
+    return {match.group(4): int(match.group(2)) for match in matches if len(match.group(3)) == 1}, {match.group(4) for match in matches}
+
+
+def import_times(modules=HEAVY_MODULES, python=sys.executable):
+    """{modul: ms} waktu impor dingin tiap modul di proses baru (`python -X importtime`); None bila gagal."""
+    startup = (import_profile("pass", python) or ({}, set()))[0]  # modul bawaan interpreter sebelum -c
+    times = {}
+    for module in modules:
+        profile = import_profile(f"import {module}", python)
+        times[module] = None if profile is None else sum(us for name, us in profile[0].items() if name not in startup) / 1000
+    return times
+
+
+def format_steps(report):
+    return [f"{name}: {ms:.1f} ms" for name, ms in report.steps]
+
+
+if __name__ == "__main__":
+    pool = db.ConnectionPool(sys.argv[1] if len(sys.argv) > 1 else db.DB)
+    report = run(pool)
+    for line in report.messages + format_steps(report):
+        print(line)
+    print("Waktu impor (proses baru):")
+    for module, ms in import_times().items():
+        print(f"  {module:<22} {'tidak terpasang' if ms is None else f'{ms:8.1f} ms'}")
@@ -0,0 +1,159 @@
+"""Cache katalog produk & resep (BOM) per proses dengan invalidasi berbasis versi.
+
+Trigger di tabel products, recipes dan ingredients (migrasi #3) menaikkan
+`app_meta.catalog_version` setiap kali katalog berubah, dari halaman mana pun.
+`get_catalog` hanya membaca angka versi itu (satu lookup primary key) dan
+memuat ulang katalog bila versinya sudah berbeda.
+"""
+import threading
+from array import array
+
+# Menu awal kafe: (nama, harga jual); dipakai saat tabel produk masih kosong dan oleh seed.py
+INITIAL_PRODUCTS = [
+    ("Espresso", 10000), ("Americano", 11000), ("Orange Americano", 14000),
+    ("Lemon Americano", 14000), ("Cocof (BN Signature)", 15000), ("Coffee Latte", 15000),
+    ("Cappuccino", 15000), ("Spanish Latte", 16000), ("Caramel Latte", 16000),
+    ("Vanilla Latte", 16000), ("Hazelnut Latte", 16000), ("Butterscotch Latte", 16000),
+    ("Tiramisu Latte", 16000), ("Mocca Latte", 16000), ("Coffee Chocolate", 18000),
+    ("Taro Coffee Latte", 18000), ("Coffee Gula Aren", 18000), ("Lychee Coffee", 20000),
+    ("Markisa Coffee", 20000), ("Raspberry Latte", 20000), ("Strawberry Latte", 20000),
+    ("Manggo Latte", 20000), ("Bubblegum Latte", 20000),
+    ("Lemon Tea", 10000), ("Lychee Tea", 10000), ("Milk Tea", 12000),
+    ("Green Tea", 14000), ("Thai Tea", 14000), ("Melon Susu", 14000),
+    ("Manggo Susu", 15000), ("Mocca Susu", 15000), ("Orange Susu", 15000),
+    ("Taro Susu", 15000), ("Coklat Susu", 15000), ("Vanilla Susu", 15000),
+    ("Strawberry Susu", 15000), ("Matcha Susu", 18000), ("Blueberry Susu", 18000),
+    ("Bubblegum Susu", 18000), ("Raspberry Susu", 18000), ("Grenadine Susu", 14000),
+    ("Banana Susu", 16000),
+    ("Melon Soda", 10000), ("Manggo Soda", 12000), ("Orange Soda", 12000),
+    ("Strawberry Soda", 12000), ("Bluesky Soda", 14000), ("Banana Soda", 16000),
+    ("Grenadine Soda", 14000), ("Blueberry Soda", 16000), ("Coffee Bear", 16000),
+    ("Mocca Soda", 16000), ("Raspberry Soda", 16000), ("Coffee Soda", 17000),
+    ("Strawberry Coffee Soda", 18000), ("Melon Blue Sky", 18000), ("Blue Manggo Soda", 18000),
+    ("Nasi Goreng Kampung", 10000), ("Nasi Goreng Biasa", 10000), ("Nasi Goreng Ayam", 18000),
+    ("Nasi Ayam Sambal Matah", 13000), ("Nasi Ayam Penyet", 13000), ("Nasi Ayam Teriyaki", 15000),
+    ("Mie Goreng", 12000), ("Mie Rebus", 12000), ("Mie Nyemek", 12000), ("Bihun Goreng", 12000),
+    ("Burger Telur", 10000), ("Burger Ayam", 12000), ("Burger Telur + Keju", 13000),
+    ("Burger Telur + Ayam", 15000), ("Burger Ayam + Telur + Keju", 18000),
+    ("Roti Bakar Coklat", 10000), ("Roti Bakar Strawberry", 10000), ("Roti Bakar Srikaya", 10000),
+    ("Roti Bakar Coklat Keju", 12000),
+    ("Kentang Goreng", 12000), ("Nugget", 12000), ("Sosis", 12000),
+    ("Mix Platter Jumbo", 35000), ("Tahu/Tempe", 5000),
+    ("Double Shoot", 3000), ("Yakult", 3000), ("Mineral Water", 4000),
+    ("Mineral Water Gelas", 500), ("Nasi Putih", 3000), ("Le Mineralle", 4000)
+]
+
+
+class Catalog:
+    """Snapshot katalog: produk, harga, HPP dan resep dalam array ringkas per product id."""
+
+    def __init__(self, version, products, recipe_rows):
+        self.version = version
+        self.ids = array('q', (product_id for product_id, _, _, _ in products))
+        self.names = [name for _, name, _, _ in products]
+        self.prices = array('d', (price or 0.0 for _, _, price, _ in products))
+        self.unit_costs = array('d', (unit_cost or 0.0 for _, _, _, unit_cost in products))
+        self._index = {product_id: i for i, product_id in enumerate(self.ids)}
+        self.id_by_name = {name: product_id for product_id, name, _, _ in products}
+
+        # product_id -> (array ingredient_id, array qty_per_unit)
+        recipes = {}
+        for product_id, ingredient_id, qty_per_unit in recipe_rows:
+            ing_ids, qtys = recipes.setdefault(product_id, (array('q'), array('d')))
+            ing_ids.append(ingredient_id); qtys.append(qty_per_unit or 0.0)
+        self.recipes = recipes
+        self._layouts = {}
+
+    def __contains__(self, product_id):
+        return product_id in self._index
+
+    def price(self, product_id):
+        return self.prices[self._index[product_id]]
+
+    def name(self, product_id):
+        return self.names[self._index[product_id]]
+
+    def recipe(self, product_id):
+        """(ingredient_ids, qty_per_unit) untuk satu produk; kosong bila belum ada resep."""
+        return self.recipes.get(product_id, ((), ()))
+
+    def unit_cost(self, product_id):
+        """HPP per unit produk dari tabel materialisasi product_costs (lihat costing.py)."""
+        return self.unit_costs[self._index[product_id]]
+
+    def ingredient_needs(self, lines):
+        """Total kebutuhan bahan {ingredient_id: qty} untuk [(product_id, qty), ...]."""
+        needs = {}
+        for product_id, qty in lines:
+            ing_ids, qtys = self.recipe(product_id)
+            for ingredient_id, qty_per_unit in zip(ing_ids, qtys):
+                needs[ingredient_id] = needs.get(ingredient_id, 0.0) + qty_per_unit * qty
+        return needs
+
+    def products(self, search_term=None):
+        """[(product_id, name, price)] urut nama; filter substring tanpa beda huruf besar/kecil seperti LIKE."""
+        term = search_term.lower() if search_term else None
+        rows = [(product_id, name, price) for product_id, name, price in zip(self.ids, self.names, self.prices)
+                if term is None or term in name.lower()]
+        return sorted(rows, key=lambda row: row[1])
+
+    def layout(self, product_ids=None, columns=4):
+        """Grid kartu Kasir: tuple per kolom berisi (nama, label kartu); di-cache selama snapshot ini hidup.
+
+        `product_ids` = urutan hasil pencarian; None = semua produk urut nama."""
+        key = (tuple(product_ids) if product_ids is not None else None, columns)
+        cached = self._layouts.get(key)
+        if cached is None:
+            if product_ids is None:
+                product_ids = [product_id for product_id, _, _ in self.products()]
+            cards = [(self.name(product_id), f"**{self.name(product_id)}**  \nRp {self.price(product_id):,.0f}")
+                     for product_id in product_ids if product_id in self._index]
+            if len(self._layouts) >= 256:
+                self._layouts.clear()
+            cached = self._layouts[key] = tuple(tuple(cards[i::columns]) for i in range(columns))
+        return cached
+
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def get_version(conn):
+    row = conn.execute("SELECT value FROM app_meta WHERE key = 'catalog_version'").fetchone()
+    return row[0] if row else 0
+
+
+def load(conn):
+    version = get_version(conn)
+    products = conn.execute("""
+        SELECT p.id, p.name, p.price, pc.unit_cost
+        FROM products p LEFT JOIN product_costs pc ON pc.product_id = p.id
+        ORDER BY p.id
+    """).fetchall()
+    recipe_rows = conn.execute("""
+        SELECT r.product_id, r.ingredient_id, r.qty_per_unit
+        FROM recipes r JOIN ingredients i ON r.ingredient_id = i.id
+        ORDER BY r.product_id
+    """).fetchall()
+    return Catalog(version, products, recipe_rows)
+
+
+def get_catalog(pool):
+    """Katalog terkini untuk database milik `pool`; dimuat ulang hanya bila versinya berubah."""
+    with pool.connection() as conn:
+        version = get_version(conn)
+        cached = _catalogs.get(pool.path)
+        if cached is not None and cached.version == version:
+            return cached
+        with _lock:
+            cached = _catalogs.get(pool.path)
+            if cached is None or cached.version != version:
+                cached = _catalogs[pool.path] = load(conn)
+        return cached
+
+
+def invalidate(pool=None):
+    """Membuang cache (semua database bila `pool` tidak diberikan)."""
+    with _lock:
+        if pool is None: _catalogs.clear()
+        else: _catalogs.pop(pool.path, None)
@@ -0,0 +1,76 @@
+"""HPP (unit cost) per produk yang dimaterialisasi di tabel `product_costs`.
+
+Tabel dijaga oleh trigger (migrasi #4): perubahan resep atau `cost_per_unit`
+bahan hanya menghitung ulang produk yang memakainya. Modul ini menyediakan
+pembacaan cepat dan pemeriksaan konsistensi:
+
+    python costing.py check [path_db]         # hitung ulang semua & tampilkan selisih
+    python costing.py check [path_db] --fix   # sekaligus perbaiki barisnya
+"""
+import argparse
+
+import db
+import migrations
+
+TOLERANCE = 1e-6
+
+RECOMPUTE_QUERY = """
+    SELECT p.id, IFNULL(SUM(r.qty_per_unit * i.cost_per_unit), 0) AS unit_cost
+    FROM products p
+    LEFT JOIN recipes r ON r.product_id = p.id
+    LEFT JOIN ingredients i ON r.ingredient_id = i.id
+    GROUP BY p.id
+"""
+
+
+def get_unit_costs(conn):
+    """{product_id: unit_cost} dari tabel materialisasi."""
+    return dict(conn.execute("SELECT product_id, unit_cost FROM product_costs"))
+
+
+def recompute_all(conn):
+    """Menghitung ulang HPP semua produk langsung dari resep (tanpa menyentuh product_costs)."""
+    return dict(conn.execute(RECOMPUTE_QUERY))
+
+
+def check(conn):
+    """Selisih antara product_costs dan hasil hitung ulang: [(product_id, tersimpan, seharusnya)]."""
+    stored = get_unit_costs(conn)
+    expected = recompute_all(conn)
+    diffs = []
+    for product_id in sorted(set(stored) | set(expected)):
+        have, want = stored.get(product_id), expected.get(product_id)
+        if have is None or want is None or abs(have - want) > TOLERANCE:
+            diffs.append((product_id, have, want))
+    return diffs
+
+
+def rebuild(conn):
+    """Menulis ulang seluruh product_costs dari resep; dipakai oleh `check --fix`."""
+    conn.execute("DELETE FROM product_costs")
+    conn.execute(f"INSERT INTO product_costs (product_id, unit_cost) {RECOMPUTE_QUERY}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("check", help="bandingkan product_costs dengan hasil hitung ulang")
+    p.add_argument("db_path", nargs="?", default=db.DB)
+    p.add_argument("--fix", action="store_true", help="tulis ulang product_costs bila ada selisih")
+    args = parser.parse_args()
+
+    pool = db.ConnectionPool(args.db_path)
+    migrations.ensure_schema(pool)
+    with pool.transaction() as conn:
+        diffs = check(conn)
+        for product_id, have, want in diffs:
+            print(f"Produk #{product_id}: tersimpan={have}, seharusnya={want}")
+        print(f"{len(diffs)} selisih ditemukan.")
+        if diffs and args.fix:
+            rebuild(conn)
+            print("product_costs sudah dibangun ulang.")
+    raise SystemExit(1 if diffs and not args.fix else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Lapisan koneksi SQLite bersama untuk aplikasi kasir.
+
+Beberapa tab Kasir dan Laporan memakai satu pos.db: WAL membuat pembaca tidak
+memblokir penulis, transaksi tulis dibuka dengan BEGIN IMMEDIATE (kunci tulis
+diambil di awal, bukan di tengah transaksi), dan `run_in_transaction` mengulang
+transaksi yang gagal karena database sibuk dengan jeda yang makin panjang.
+
+    python db.py checkpoint [path_db]   # checkpoint WAL (TRUNCATE) & tampilkan ukurannya
+"""
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import perf
+
+DB = "pos.db"
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+POOL_SIZE = 8
+# WAL dipotong kembali ke ukuran ini setelah checkpoint; checkpoint otomatis tiap ~1000 halaman
+JOURNAL_SIZE_LIMIT = 64 * 1024 * 1024
+WAL_AUTOCHECKPOINT_PAGES = 1000
+# Percobaan ulang transaksi saat database sibuk: 5x, jeda 50 ms, 100 ms, 200 ms, ... (+-50% acak)
+BUSY_RETRIES = 5
+BUSY_BACKOFF_S = 0.05
+TRANSACTION_MODE = "IMMEDIATE"
+
+
+def open_connection(path=DB):
+    """Membuka koneksi baru dengan pengaturan WAL, busy_timeout dan cache statement."""
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,  # autocommit; transaksi dibuka eksplisit lewat ConnectionPool.transaction()
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=perf.InstrumentedConnection,  # instrumentasi query, lihat perf.py
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA journal_size_limit={JOURNAL_SIZE_LIMIT}")
+    conn.execute(f"PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT_PAGES}")
+    return conn
+
+
+def is_busy_error(error):
+    """True bila error berasal dari kunci SQLite (database is locked / busy)."""
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+
+class ConnectionPool:
+    """Kumpulan koneksi long-lived yang dipakai ulang antar rerun Streamlit.
+
+    Setiap thread memegang paling banyak satu koneksi pada satu waktu: pemanggilan
+    `connection()` atau `transaction()` yang bersarang di thread yang sama memakai
+    koneksi yang sama, sehingga helper seperti `run_query` yang dipanggil di dalam
+    transaksi penjualan ikut menjadi bagian dari transaksi tersebut.
+    """
+
+    def __init__(self, path=DB, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def connection(self):
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = open_connection(self.path)
+        self._local.conn = conn
+        self._local.depth = 0
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    @contextmanager
+    def transaction(self, mode=None):
+        """Lingkup transaksi eksplisit; transaksi bersarang menjadi SAVEPOINT.
+
+        `mode` IMMEDIATE (bawaan, TRANSACTION_MODE) mengambil kunci tulis di awal sehingga
+        tidak ada upgrade kunci di tengah transaksi yang langsung gagal "database is locked";
+        pakai "DEFERRED" untuk transaksi yang hanya membaca.
+        """
+        mode = mode or TRANSACTION_MODE
+        with self.connection() as conn:
+            depth = self._local.depth
+            savepoint = f"sp_{depth}"
+            conn.execute(f"BEGIN {mode}" if depth == 0 else f"SAVEPOINT {savepoint}")
+            self._local.depth = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                if depth == 0:
+                    conn.rollback()
+                else:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                if depth == 0:
+                    conn.commit()
+                else:
+                    conn.execute(f"RELEASE {savepoint}")
+            finally:
+                self._local.depth = depth
+
+    def in_transaction(self):
+        return getattr(self._local, "depth", 0) > 0
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def run_in_transaction(pool, fn, *args, retries=None, **kwargs):
+    """Menjalankan `fn(conn, *args, **kwargs)` dalam satu transaksi, diulang bila database sibuk.
+
+    Di dalam transaksi yang sudah berjalan, `fn` langsung dijalankan sebagai bagian
+    darinya (pengulangan hanya mungkin di tingkat transaksi terluar).
+    """
+    if pool.in_transaction():
+        with pool.transaction() as conn:
+            return fn(conn, *args, **kwargs)
+    retries = BUSY_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            with pool.transaction() as conn:
+                return fn(conn, *args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e) or attempt == retries:
+                raise
+            time.sleep(BUSY_BACKOFF_S * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def checkpoint(pool, mode="PASSIVE"):
+    """PRAGMA wal_checkpoint; mengembalikan (busy, halaman_wal, halaman_tersalin)."""
+    with pool.connection() as conn:
+        return conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+
+def checkpoint_if_needed(pool, limit=JOURNAL_SIZE_LIMIT):
+    """Checkpoint TRUNCATE bila WAL melebihi `limit`; dipanggil di luar transaksi setelah menulis.
+
+    Checkpoint otomatis (PASSIVE) tidak pernah bisa mengulang WAL dari awal selama
+    selalu ada pembaca aktif (mis. halaman Laporan yang terus dimuat), sehingga WAL
+    terus membesar; TRUNCATE menunggu pembaca selesai (sampai busy_timeout).
+    """
+    if pool.in_transaction() or wal_size(pool.path) <= limit:
+        return None
+    try:
+        return checkpoint(pool, "TRUNCATE")
+    except sqlite3.OperationalError as e:
+        if not is_busy_error(e):
+            raise
+        return None
+
+
+def wal_size(path=DB):
+    try:
+        return os.path.getsize(f"{path}-wal")
+    except OSError:
+        return 0
+
+
+def run_query(pool, query, params=(), fetch=None):
+    """Menjalankan satu statement; di luar transaksi hasilnya langsung ter-commit."""
+    with pool.connection() as conn:
+        c = conn.execute(query, params)
+        if fetch == 'one': return c.fetchone()
+        elif fetch == 'all': return c.fetchall()
+        return None
+
+
+def get_df(pool, query, params=()):
+    import pandas as pd
+    with pool.connection() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "checkpoint":
+        raise SystemExit("Pemakaian: python db.py checkpoint [path_db]")
+    path = sys.argv[2] if len(sys.argv) > 2 else DB
+    before = wal_size(path)
+    busy, wal_pages, copied = checkpoint(ConnectionPool(path), "TRUNCATE")
+    print(f"WAL {before:,} -> {wal_size(path):,} byte; {copied}/{wal_pages} halaman disalin{' (sebagian, ada pembaca aktif)' if busy else ''}.")
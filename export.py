@@ -0,0 +1,157 @@
+"""Ekspor CSV per potongan (chunk) untuk akuntan, dengan memori tetap berapa pun ukurannya.
+
+    python export.py transactions --start 2024-01-01 --end 2024-12-31 -o transaksi_2024.csv.gz
+    python export.py journal_items --start 2024-01-01 --end 2024-12-31 -o - > jurnal.csv
+
+Baris dibaca dengan `cursor.fetchmany` dan langsung ditulis ke file (gzip bila
+nama file berakhiran .gz atau --gzip); rentang tanggal setengah terbuka seperti
+di reports.py.
+"""
+import argparse
+import csv
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import db
+import migrations
+
+CHUNK_SIZE = 5000
+
+# nama -> (judul, SELECT, kolom tanggal untuk filter rentang atau None, urutan)
+DATASETS = {
+    'transactions': ("Transaksi", """
+        SELECT t.id, t.transaction_date, t.total_amount, t.payment_method, t.employee_id, e.name AS cashier
+        FROM transactions t LEFT JOIN employees e ON e.id = t.employee_id
+    """, "t.transaction_date", "t.transaction_date, t.id"),
+    'transaction_items': ("Item Transaksi", """
+        SELECT ti.id, ti.transaction_id, t.transaction_date, ti.product_id, p.name AS product, ti.quantity, ti.price_per_unit,
+               ti.quantity * ti.price_per_unit AS subtotal, ti.unit_cost
+        FROM transactions t JOIN transaction_items ti ON ti.transaction_id = t.id LEFT JOIN products p ON p.id = ti.product_id
+    """, "t.transaction_date", "t.transaction_date, t.id, ti.id"),
+    'journal_entries': ("Jurnal", """
+        SELECT je.id, je.entry_date, je.description, je.transaction_id, je.expense_id
+        FROM journal_entries je
+    """, "je.entry_date", "je.entry_date, je.id"),
+    'journal_items': ("Baris Jurnal", """
+        SELECT ji.id, ji.journal_entry_id, je.entry_date, je.description, a.account_code, a.account_name, ji.debit, ji.kredit
+        FROM journal_entries je JOIN journal_items ji ON ji.journal_entry_id = je.id LEFT JOIN accounts a ON a.id = ji.account_id
+    """, "je.entry_date", "je.entry_date, je.id, ji.id"),
+    'expenses': ("Pengeluaran", """
+        SELECT id, date, category, description, amount, payment_method, account_id FROM expenses
+    """, "date", "date, id"),
+    'stock_movements': ("Mutasi Stok", """
+        SELECT m.id, m.moved_at, m.ingredient_id, i.name AS ingredient, i.unit, m.kind, m.qty, m.transaction_id, m.note
+        FROM stock_movements m LEFT JOIN ingredients i ON i.id = m.ingredient_id
+    """, "m.moved_at", "m.moved_at, m.id"),
+    'stock': ("Stok Bahan (saat ini)", """
+        SELECT id, name, unit, stock, cost_per_unit, stock * cost_per_unit AS stock_value, pack_weight, pack_price FROM ingredients
+    """, None, "name"),
+}
+
+
+def _query(dataset, start, end):
+    _, select, date_column, order = DATASETS[dataset]
+    params = ()
+    if date_column is not None and (start is not None or end is not None):
+        conditions = []
+        if start is not None:
+            conditions.append(f"{date_column} >= ?"); params += (start.isoformat(),)
+        if end is not None:
+            conditions.append(f"{date_column} < ?"); params += ((end + timedelta(days=1)).isoformat(),)
+        select += " WHERE " + " AND ".join(conditions)
+    return f"{select} ORDER BY {order}", params
+
+
+def iter_csv(conn, dataset, start=None, end=None, chunk_size=CHUNK_SIZE):
+    """Menghasilkan teks CSV (header lalu per `chunk_size` baris) untuk satu dataset."""
+    query, params = _query(dataset, start, end)
+    cursor = conn.execute(query, params)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column[0] for column in cursor.description])
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0); buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_csv(pool, dataset, out, start=None, end=None, compress=False):
+    """Menulis dataset ke file biner `out`; mengembalikan jumlah byte CSV (sebelum kompresi)."""
+    stream = gzip.GzipFile(fileobj=out, mode='wb') if compress else out
+    written = 0
+    with pool.connection() as conn:
+        for chunk in iter_csv(conn, dataset, start, end):
+            data = chunk.encode('utf-8')
+            stream.write(data)
+            written += len(data)
+    if compress:
+        stream.close()
+    return written
+
+
+def export_file(pool, dataset, start=None, end=None, compress=True):
+    """File sementara (posisi di awal) berisi hasil ekspor; untuk st.download_button."""
+    out = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    write_csv(pool, dataset, out, start, end, compress)
+    out.seek(0)
+    return out
+
+
+def file_name(dataset, start=None, end=None, compress=False):
+    span = f"_{start.isoformat()}_{end.isoformat()}" if start and end and DATASETS[dataset][2] else ""
+    return f"{dataset}{span}.csv" + (".gz" if compress else "")
+
+
+def _output_mode(path):
+    """Mode file hasil: sama dengan file lama bila ada, selain itu 0o666 dikurangi umask (seperti open() biasa)."""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--start", type=date.fromisoformat, help="tanggal awal (YYYY-MM-DD, inklusif)")
+    parser.add_argument("--end", type=date.fromisoformat, help="tanggal akhir (YYYY-MM-DD, inklusif)")
+    parser.add_argument("-o", "--output", default="-", help="file tujuan; '-' = stdout, berakhiran .gz = gzip")
+    parser.add_argument("--gzip", action="store_true", help="kompres gzip walau nama file tidak berakhiran .gz")
+    parser.add_argument("--db", default=db.DB)
+    args = parser.parse_args(argv)
+
+    pool = db.ConnectionPool(args.db)
+    migrations.ensure_schema(pool)
+    compress = args.gzip or args.output.endswith(".gz")
+    if args.output == "-":
+        written = write_csv(pool, args.dataset, sys.stdout.buffer, args.start, args.end, compress)
+        sys.stdout.buffer.flush()
+    else:
+        # Tulis ke file sementara lalu pindahkan, agar cron tidak meninggalkan file setengah jadi
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(args.output)), delete=False, suffix=".tmp") as tmp:
+            try:
+                written = write_csv(pool, args.dataset, tmp, args.start, args.end, compress)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+        # mkstemp membuat file 0600; samakan dengan file biasa supaya akuntan/share tetap bisa membaca
+        os.chmod(tmp.name, _output_mode(args.output))
+        shutil.move(tmp.name, args.output)
+    print(f"{args.dataset}: {written:,} byte CSV ditulis.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Query halaman riwayat (transaksi, absensi) dengan keyset pagination dan filter di SQL.
+
+Halaman berikutnya dimulai dari kursor (kunci urut baris terakhir) halaman
+sebelumnya, sehingga biaya per halaman tetap walau datanya terus bertambah.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+PAGE_SIZE = 50
+
+Page = namedtuple("Page", "rows next_cursor")  # next_cursor None bila sudah halaman terakhir
+
+
+def _page(conn, query, params, limit, cursor_of):
+    rows = conn.execute(query, (*params, limit + 1)).fetchall()
+    if len(rows) > limit:
+        return Page(rows[:limit], cursor_of(rows[limit - 1]))
+    return Page(rows, None)
+
+
+def transaction_page(conn, start, end, cursor=None, limit=PAGE_SIZE, transaction_id=None, employee_id=None,
+                     payment_method=None, min_total=None, max_total=None):
+    """Satu halaman transaksi terbaru lebih dulu: [(id, waktu, total, metode, kasir)], urut (transaction_date, id) menurun.
+
+    `cursor` adalah (transaction_date, id) baris terakhir halaman sebelumnya.
+    """
+    where, params = ["t.transaction_date >= ?", "t.transaction_date < ?"], [start.isoformat(), (end + timedelta(days=1)).isoformat()]
+    for clause, value in (("t.id = ?", transaction_id), ("t.employee_id = ?", employee_id), ("t.payment_method = ?", payment_method),
+                          ("t.total_amount >= ?", min_total), ("t.total_amount <= ?", max_total)):
+        if value is not None:
+            where.append(clause); params.append(value)
+    if cursor is not None:
+        where.append("(t.transaction_date, t.id) < (?, ?)"); params += cursor
+    query = f"""
+        SELECT t.id, t.transaction_date, t.total_amount, t.payment_method, e.name
+        FROM transactions t JOIN employees e ON t.employee_id = e.id
+        WHERE {' AND '.join(where)}
+        ORDER BY t.transaction_date DESC, t.id DESC LIMIT ?
+    """
+    return _page(conn, query, params, limit, lambda row: (row[1], row[0]))
+
+
+def transaction_items(conn, transaction_id):
+    """[(produk, qty, harga satuan, subtotal)] untuk satu transaksi."""
+    return conn.execute("""
+        SELECT p.name, ti.quantity, ti.price_per_unit, ti.quantity * ti.price_per_unit
+        FROM transaction_items ti JOIN products p ON ti.product_id = p.id
+        WHERE ti.transaction_id = ? ORDER BY ti.id
+    """, (transaction_id,)).fetchall()
+
+
+def attendance_page(conn, start=None, end=None, employee_id=None, cursor=None, limit=PAGE_SIZE):
+    """Satu halaman absensi terbaru lebih dulu: [(id, nama, check_in, check_out)], urut (check_in, id) menurun."""
+    where, params = [], []
+    for clause, value in (("a.check_in >= ?", start and start.isoformat()), ("a.check_in < ?", end and (end + timedelta(days=1)).isoformat()),
+                          ("a.employee_id = ?", employee_id)):
+        if value is not None:
+            where.append(clause); params.append(value)
+    if cursor is not None:
+        where.append("(a.check_in, a.id) < (?, ?)"); params += cursor
+    query = f"""
+        SELECT a.id, e.name, a.check_in, a.check_out
+        FROM attendance a JOIN employees e ON a.employee_id = e.id
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY a.check_in DESC, a.id DESC LIMIT ?
+    """
+    return _page(conn, query, params, limit, lambda row: (row[2], row[0]))
+
+
+def attendance_search(conn, term, limit=20):
+    """Pencarian cepat absensi untuk selectbox: [(id, nama, check_in)] terbaru lebih dulu.
+
+    `term` berupa ID absensi, awalan tanggal (mis. '2024-', '2024-05' atau '2024-05-17') atau
+    potongan nama karyawan; kosong = absensi terbaru.
+    """
+    term = (term or "").strip()
+    select = "SELECT a.id, e.name, a.check_in FROM attendance a JOIN employees e ON a.employee_id = e.id"
+    if term.isdigit():
+        return conn.execute(f"{select} WHERE a.id = ?", (int(term),)).fetchall()
+    if term[:4].isdigit() and term[4:5] == "-":
+        # Awalan tanggal sebagai rentang agar tetap memakai indeks check_in
+        return conn.execute(f"{select} WHERE a.check_in >= ? AND a.check_in < ? ORDER BY a.check_in DESC, a.id DESC LIMIT ?",
+                            (term, term + "\uffff", limit)).fetchall()
+    if term:
+        return conn.execute(f"{select} WHERE a.employee_id IN (SELECT id FROM employees WHERE name LIKE ?) ORDER BY a.check_in DESC, a.id DESC LIMIT ?",
+                            (f"%{term}%", limit)).fetchall()
+    return conn.execute(f"{select} ORDER BY a.check_in DESC, a.id DESC LIMIT ?", (limit,)).fetchall()
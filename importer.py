@@ -0,0 +1,197 @@
+"""Impor massal bahan, produk dan resep dari CSV/Excel dalam satu transaksi.
+
+Kolom yang dikenali (header tidak peka huruf besar/kecil):
+    bahan  : name, unit, pack_price, pack_weight, [stock]
+    produk : name, price
+    resep  : product, ingredient, qty_per_unit   (nama produk & bahan)
+
+File Excel boleh berisi beberapa sheet (nama sheet bebas); jenis setiap tabel
+ditentukan dari kolomnya. HPP/unit bahan dihitung seperti form Tambah Bahan:
+pack_price / pack_weight, atau 0 bila pack_weight <= 0.
+"""
+import io
+
+import pandas as pd
+
+import stock
+
+COLUMNS = {
+    'ingredients': ['name', 'unit', 'pack_price', 'pack_weight'],
+    'products': ['name', 'price'],
+    'recipes': ['product', 'ingredient', 'qty_per_unit'],
+}
+LABELS = {'ingredients': 'Bahan', 'products': 'Produk', 'recipes': 'Resep'}
+
+
+def _kind_of(df):
+    for kind in ('recipes', 'ingredients', 'products'):
+        if set(COLUMNS[kind]) <= set(df.columns):
+            return kind
+    return None
+
+
+def read_files(files):
+    """{jenis: DataFrame} dari file upload (objek dengan .name dan .getvalue()) + daftar error."""
+    frames, errors = {}, []
+    for f in files:
+        data = io.BytesIO(f.getvalue())
+        try:
+            if f.name.lower().endswith(('.xlsx', '.xls')):
+                # .xlsx butuh openpyxl, .xls butuh xlrd (lihat requirements.txt)
+                sheets = pd.read_excel(data, sheet_name=None, dtype=object)
+            else:
+                sheets = {f.name: pd.read_csv(data, dtype=object, sep=None, engine='python')}
+        except Exception as e:
+            # Satu file rusak/tidak terbaca tidak menghentikan halaman; dilaporkan bersama error lain
+            errors.append(f"{f.name}: file tidak dapat dibaca ({e})")
+            continue
+        for sheet_name, df in sheets.items():
+            df.columns = [str(col).strip().lower() for col in df.columns]
+            df = df.dropna(how='all')
+            kind = _kind_of(df)
+            if kind is None:
+                errors.append(f"{sheet_name}: kolom tidak dikenali ({', '.join(df.columns)})")
+            elif kind in frames:
+                frames[kind] = pd.concat([frames[kind], df], ignore_index=True)
+            else:
+                frames[kind] = df
+    return frames, errors
+
+
+def _row_errors(errors, label, df, mask, message):
+    """Menambahkan satu pesan per baris yang melanggar `mask` (nomor baris seperti di spreadsheet)."""
+    for index in df.index[mask]:
+        errors.append(f"{label} baris {index + 2}: {message}")
+
+
+def validate(conn, frames):
+    """Membersihkan & memeriksa semua tabel sekaligus; mengembalikan (frames, errors)."""
+    errors, clean = [], {}
+
+    if 'ingredients' in frames:
+        df = frames['ingredients'].copy()
+        df['name'] = df['name'].astype('string').str.strip()
+        df['unit'] = df['unit'].astype('string').str.strip()
+        has_stock = 'stock' in df.columns
+        numeric = ['pack_price', 'pack_weight'] + (['stock'] if has_stock else [])
+        for col in numeric:
+            raw = df[col]
+            df[col] = pd.to_numeric(raw, errors='coerce')
+            _row_errors(errors, 'Bahan', df, raw.notna() & df[col].isna(), f"{col} bukan angka")
+        if not has_stock:
+            df['stock'] = float('nan')
+        _row_errors(errors, 'Bahan', df, df['name'].isna() | (df['name'] == ''), "nama kosong")
+        _row_errors(errors, 'Bahan', df, df['unit'].isna() | (df['unit'] == ''), "satuan kosong")
+        _row_errors(errors, 'Bahan', df, df['name'].notna() & df['name'].duplicated(keep=False), "nama bahan ganda di file")
+        _row_errors(errors, 'Bahan', df, (df['pack_price'] < 0) | (df['pack_weight'] < 0), "harga/berat kemasan negatif")
+        df['pack_price'] = df['pack_price'].fillna(0.0)
+        df['pack_weight'] = df['pack_weight'].fillna(0.0)
+        df['cost_per_unit'] = (df['pack_price'] / df['pack_weight']).where(df['pack_weight'] > 0, 0.0)
+        clean['ingredients'] = df[['name', 'unit', 'cost_per_unit', 'stock', 'pack_weight', 'pack_price']]
+
+    if 'products' in frames:
+        df = frames['products'].copy()
+        df['name'] = df['name'].astype('string').str.strip()
+        raw = df['price']
+        df['price'] = pd.to_numeric(raw, errors='coerce')
+        _row_errors(errors, 'Produk', df, df['name'].isna() | (df['name'] == ''), "nama kosong")
+        _row_errors(errors, 'Produk', df, df['name'].notna() & df['name'].duplicated(keep=False), "nama produk ganda di file")
+        _row_errors(errors, 'Produk', df, ~(df['price'] > 0), "harga jual harus lebih dari 0")
+        clean['products'] = df[['name', 'price']]
+
+    if 'recipes' in frames:
+        df = frames['recipes'].copy()
+        df['product'] = df['product'].astype('string').str.strip()
+        df['ingredient'] = df['ingredient'].astype('string').str.strip()
+        df['qty_per_unit'] = pd.to_numeric(df['qty_per_unit'], errors='coerce')
+        # Nama yang dikenal: yang sudah ada di database ditambah yang ikut diimpor
+        known_products = {name for (name,) in conn.execute("SELECT name FROM products")}
+        known_ingredients = {name for (name,) in conn.execute("SELECT name FROM ingredients")}
+        if 'products' in clean: known_products |= set(clean['products']['name'].dropna())
+        if 'ingredients' in clean: known_ingredients |= set(clean['ingredients']['name'].dropna())
+        _row_errors(errors, 'Resep', df, ~df['product'].isin(known_products), "produk tidak dikenal")
+        _row_errors(errors, 'Resep', df, ~df['ingredient'].isin(known_ingredients), "bahan tidak dikenal")
+        _row_errors(errors, 'Resep', df, ~(df['qty_per_unit'] > 0), "qty_per_unit harus lebih dari 0")
+        _row_errors(errors, 'Resep', df, df.duplicated(['product', 'ingredient'], keep=False), "pasangan produk-bahan ganda di file")
+        clean['recipes'] = df[['product', 'ingredient', 'qty_per_unit']]
+
+    return clean, errors
+
+
+def _status(merged, columns):
+    changed = pd.Series(False, index=merged.index)
+    for col in columns:
+        same = (merged[col] == merged[f'{col}_lama']).fillna(False).astype(bool) | (merged[col].isna() & merged[f'{col}_lama'].isna())
+        changed |= ~same
+    return merged['id'].isna().map({True: 'baru', False: 'sama'}).where(merged['id'].isna() | ~changed, 'ubah')
+
+
+def diff(conn, frames, replace_recipes=False):
+    """{jenis: DataFrame pratinjau} dengan kolom `status`: baru / ubah / sama (/ hapus untuk resep)."""
+    result = {}
+    if 'ingredients' in frames:
+        existing = pd.DataFrame(conn.execute("SELECT id, name, unit, cost_per_unit, stock, pack_weight, pack_price FROM ingredients").fetchall(),
+                                columns=['id', 'name', 'unit_lama', 'cost_per_unit_lama', 'stock_lama', 'pack_weight_lama', 'pack_price_lama'])
+        merged = frames['ingredients'].merge(existing, on='name', how='left')
+        merged['stock'] = merged['stock'].fillna(merged['stock_lama'])
+        merged['status'] = _status(merged, ['unit', 'cost_per_unit', 'stock', 'pack_weight', 'pack_price'])
+        result['ingredients'] = merged[['status', 'name', 'unit', 'pack_price', 'pack_weight', 'cost_per_unit', 'cost_per_unit_lama', 'stock', 'stock_lama']]
+    if 'products' in frames:
+        existing = pd.DataFrame(conn.execute("SELECT id, name, price FROM products").fetchall(), columns=['id', 'name', 'price_lama'])
+        merged = frames['products'].merge(existing, on='name', how='left')
+        merged['status'] = _status(merged, ['price'])
+        result['products'] = merged[['status', 'name', 'price', 'price_lama']]
+    if 'recipes' in frames:
+        existing = pd.DataFrame(conn.execute("""
+            SELECT 1, p.name, i.name, r.qty_per_unit FROM recipes r
+            JOIN products p ON p.id = r.product_id JOIN ingredients i ON i.id = r.ingredient_id
+        """).fetchall(), columns=['id', 'product', 'ingredient', 'qty_per_unit_lama'])
+        merged = frames['recipes'].merge(existing, on=['product', 'ingredient'], how='left')
+        merged['status'] = _status(merged, ['qty_per_unit'])
+        if replace_recipes:
+            removed = existing[existing['product'].isin(frames['recipes']['product'])].merge(
+                frames['recipes'][['product', 'ingredient']], on=['product', 'ingredient'], how='left', indicator=True)
+            removed = removed[removed['_merge'] == 'left_only'].assign(status='hapus', qty_per_unit=float('nan'))
+            merged = pd.concat([merged, removed[merged.columns.intersection(removed.columns)]], ignore_index=True)
+        result['recipes'] = merged[['status', 'product', 'ingredient', 'qty_per_unit', 'qty_per_unit_lama']]
+    return result
+
+
+def _records(df):
+    """Baris DataFrame sebagai tuple Python murni (NaN -> None) untuk executemany."""
+    return [tuple(None if pd.isna(value) else value.item() if hasattr(value, 'item') else value for value in row)
+            for row in df.itertuples(index=False, name=None)]
+
+
+def apply(conn, frames, replace_recipes=False):
+    """Menulis semua tabel dengan executemany di dalam transaksi pemanggil; mengembalikan {jenis: jumlah baris}."""
+    counts = {}
+    if 'ingredients' in frames:
+        rows = _records(frames['ingredients'][['name', 'unit', 'cost_per_unit', 'pack_weight', 'pack_price', 'stock']])
+        conn.executemany("""
+            INSERT INTO ingredients (name, unit, cost_per_unit, stock, pack_weight, pack_price) VALUES (?, ?, ?, 0, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET unit = excluded.unit, cost_per_unit = excluded.cost_per_unit,
+                pack_weight = excluded.pack_weight, pack_price = excluded.pack_price
+        """, [row[:-1] for row in rows])
+        # Kolom stock (opsional) = hasil hitung fisik; selisihnya masuk buku mutasi sebagai penyesuaian
+        levels = {name: level for name, *_, level in rows if level is not None}
+        if levels:
+            ids = dict(conn.execute(f"SELECT name, id FROM ingredients WHERE name IN ({','.join('?' * len(levels))})", list(levels)))
+            stock.set_levels(conn, {ids[name]: level for name, level in levels.items()}, "Impor data bahan")
+        counts['ingredients'] = len(rows)
+    if 'products' in frames:
+        rows = _records(frames['products'])
+        conn.executemany("INSERT INTO products (name, price) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET price = excluded.price", rows)
+        counts['products'] = len(rows)
+    if 'recipes' in frames:
+        rows = _records(frames['recipes'])
+        if replace_recipes:
+            conn.executemany("DELETE FROM recipes WHERE product_id = (SELECT id FROM products WHERE name = ?)",
+                             [(name,) for name in dict.fromkeys(product for product, _, _ in rows)])
+        conn.executemany("""
+            INSERT INTO recipes (product_id, ingredient_id, qty_per_unit)
+            VALUES ((SELECT id FROM products WHERE name = ?), (SELECT id FROM ingredients WHERE name = ?), ?)
+            ON CONFLICT (product_id, ingredient_id) DO UPDATE SET qty_per_unit = excluded.qty_per_unit
+        """, rows)
+        counts['recipes'] = len(rows)
+    return counts
@@ -0,0 +1,87 @@
+"""Buku besar: Jurnal Umum per halaman dan mutasi per akun dengan saldo berjalan.
+
+Rentang tanggal selalu setengah terbuka (`entry_date >= start AND entry_date < end + 1 hari`)
+karena entry_date bisa berupa 'YYYY-MM-DD' maupun 'YYYY-MM-DD HH:MM:SS'. Data dimuat per
+halaman dengan kursor keyset, sehingga jurnal setahun tidak pernah dimuat sekaligus.
+"""
+from datetime import timedelta
+
+import accounting
+from history import Page
+
+ENTRY_PAGE_SIZE = 50
+LEDGER_PAGE_SIZE = 200
+
+
+def _date_range(start, end):
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
+
+
+def journal_page(conn, start, end, cursor=None, limit=ENTRY_PAGE_SIZE):
+    """`limit` jurnal terbaru lebih dulu beserta semua barisnya: [(entry_id, tanggal, deskripsi, akun, debit, kredit)].
+
+    Halaman dihitung per jurnal (bukan per baris), jadi satu jurnal tidak pernah terpotong;
+    `cursor` adalah (entry_date, id) jurnal terakhir halaman sebelumnya.
+    """
+    where, params = ["entry_date >= ?", "entry_date < ?"], list(_date_range(start, end))
+    if cursor is not None:
+        where.append("(entry_date, id) < (?, ?)"); params += cursor
+    rows = conn.execute(f"""
+        WITH page AS (
+            SELECT id, entry_date, description FROM journal_entries
+            WHERE {' AND '.join(where)}
+            ORDER BY entry_date DESC, id DESC LIMIT ?
+        )
+        SELECT p.id, p.entry_date, p.description, a.account_code || ' - ' || a.account_name, ji.debit, ji.kredit
+        FROM page p
+        JOIN journal_items ji ON ji.journal_entry_id = p.id
+        JOIN accounts a ON ji.account_id = a.id
+        ORDER BY p.entry_date DESC, p.id DESC, ji.id
+    """, (*params, limit + 1)).fetchall()
+    entry_ids = list(dict.fromkeys(row[0] for row in rows))
+    if len(entry_ids) <= limit:
+        return Page(rows, None)
+    last_id, kept = entry_ids[limit - 1], set(entry_ids[:limit])
+    rows = [row for row in rows if row[0] in kept]
+    last = next(row for row in rows if row[0] == last_id)
+    return Page(rows, (last[1], last[0]))
+
+
+def opening_balance(conn, registry, account_id, start):
+    """Saldo normal akun sampai akhir hari sebelum `start` (memakai snapshot bulanan bila ada)."""
+    tb = accounting.trial_balance(conn, registry, start - timedelta(days=1))
+    return next((row.balance for row in tb.rows if row.account.id == account_id), 0.0)
+
+
+def account_ledger(conn, account, start, end, opening=0.0, cursor=None, limit=LEDGER_PAGE_SIZE):
+    """Mutasi satu akun urut waktu: [(tanggal, deskripsi, debit, kredit, saldo)] dengan saldo berjalan.
+
+    Saldo berjalan dihitung dengan window function per halaman lalu ditambah saldo
+    akhir halaman sebelumnya; `cursor` = (entry_date, entry_id, item_id, saldo) baris terakhir.
+    Halaman pertama memakai `opening` (lihat opening_balance) sebagai saldo awal.
+    """
+    sign = 1.0 if account.normal_balance == 'Debit' else -1.0
+    where, params = ["ji.account_id = ?", "je.entry_date >= ?", "je.entry_date < ?"], [account.id, *_date_range(start, end)]
+    carried = opening
+    if cursor is not None:
+        where.append("(je.entry_date, je.id, ji.id) > (?, ?, ?)"); params += cursor[:3]
+        carried = cursor[3]
+    # LIMIT dulu di subquery, baru window function, supaya biaya per halaman sebanding `limit`
+    rows = conn.execute(f"""
+        SELECT entry_date, entry_id, item_id, description, debit, kredit,
+               ? + ? * SUM(debit - kredit) OVER (ORDER BY entry_date, entry_id, item_id ROWS UNBOUNDED PRECEDING)
+        FROM (
+            SELECT je.entry_date, je.id AS entry_id, ji.id AS item_id, je.description,
+                   CASE WHEN ji.debit > 0 THEN ji.debit ELSE 0 END AS debit,
+                   CASE WHEN ji.kredit > 0 THEN ji.kredit ELSE 0 END AS kredit
+            FROM journal_items ji JOIN journal_entries je ON ji.journal_entry_id = je.id
+            WHERE {' AND '.join(where)}
+            ORDER BY je.entry_date, je.id, ji.id LIMIT ?
+        )
+        ORDER BY entry_date, entry_id, item_id
+    """, (carried, sign, *params, limit + 1)).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    page = [(entry_date, description, debit, kredit, balance) for entry_date, _, _, description, debit, kredit, balance in rows]
+    next_cursor = (rows[-1][0], rows[-1][1], rows[-1][2], rows[-1][6]) if more else None
+    return Page(page, next_cursor)
@@ -0,0 +1,170 @@
+"""Uji beban: N kasir bersamaan + pembaca laporan terhadap satu database hasil seed.
+
+Contoh:
+    python loadtest.py --cashiers 3 --readers 1 --duration 20
+    python loadtest.py --cashiers 4 --processes               # tiap peran di proses terpisah
+    python loadtest.py --cashiers 3 --retries 0 --begin DEFERRED --busy-timeout-ms 0   # perilaku lama
+
+Setiap kasir menjual keranjang acak lewat sales.process_sale; setiap pembaca memuat
+rekap harian, Riwayat Transaksi dan neraca saldo berulang-ulang. Di akhir dicetak
+latensi penjualan p50/p95/p99, jumlah error kunci ("database is locked"), dan ukuran
+WAL sebelum/sesudah checkpoint TRUNCATE.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import accounting
+import bench
+import db
+import history
+import reports
+import sales
+
+
+def _settings(args):
+    return {'retries': args.retries, 'begin': args.begin, 'busy_timeout_ms': args.busy_timeout_ms}
+
+
+def _apply_settings(settings):
+    """Memasang pengaturan db di proses ini (dipanggil ulang di setiap proses anak)."""
+    db.BUSY_RETRIES = settings['retries']
+    db.TRANSACTION_MODE = settings['begin']
+    db.BUSY_TIMEOUT_MS = settings['busy_timeout_ms']
+
+
+def _cashier(pool, seconds, seed):
+    rng = random.Random(seed)
+    with pool.connection() as conn:
+        product_names = [name for (name,) in conn.execute("SELECT name FROM products")]
+    latencies, lock_errors, other_errors = [], 0, 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        cart = {name: rng.randint(1, 3) for name in rng.sample(product_names, rng.randint(1, 6))}
+        started = time.perf_counter()
+        success, message, _, _ = sales.process_sale(pool, cart, rng.choice(["Cash", "Qris", "Card"]), 1)
+        if success:
+            latencies.append(time.perf_counter() - started)
+        elif "locked" in message or "busy" in message:
+            lock_errors += 1
+        else:
+            other_errors += 1
+    return {'role': 'cashier', 'latencies': latencies, 'lock_errors': lock_errors, 'other_errors': other_errors}
+
+
+def _reader(pool, seconds, seed):
+    registry = accounting.get_registry(pool)
+    end = date.today()
+    start = end - timedelta(days=30)
+    latencies, lock_errors, other_errors = [], 0, 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            accounting.refresh_snapshots(pool)
+            with pool.transaction("DEFERRED") as conn:
+                reports.daily_totals(conn, start, end)
+                history.transaction_page(conn, start, end)
+                accounting.trial_balance(conn, registry, end)
+        except Exception as e:
+            if db.is_busy_error(e):
+                lock_errors += 1
+            else:
+                other_errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    return {'role': 'reader', 'latencies': latencies, 'lock_errors': lock_errors, 'other_errors': other_errors}
+
+
+ROLES = {'cashier': _cashier, 'reader': _reader}
+
+
+def _run_in_process(path, role, seconds, seed, settings):
+    _apply_settings(settings)
+    pool = db.ConnectionPool(path)
+    try:
+        return ROLES[role](pool, seconds, seed)
+    finally:
+        pool.close()
+
+
+def _run_in_threads(pool, jobs, seconds):
+    results = [None] * len(jobs)
+
+    def worker(index, role, seed):
+        results[index] = ROLES[role](pool, seconds, seed)
+
+    threads = [threading.Thread(target=worker, args=(index, role, seed)) for index, (role, seed) in enumerate(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _percentiles(latencies):
+    if len(latencies) < 2:
+        return (latencies[0],) * 3 if latencies else (float("nan"),) * 3
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def _summary(label, results, seconds):
+    latencies = [latency for result in results for latency in result['latencies']]
+    p50, p95, p99 = (value * 1000 for value in _percentiles(latencies))
+    lock_errors = sum(result['lock_errors'] for result in results)
+    other_errors = sum(result['other_errors'] for result in results)
+    print(f"{label:<8} {len(results):>4} {len(latencies):>8} {len(latencies) / seconds:>8.1f} "
+          f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {lock_errors:>8} {other_errors:>6}")
+    return lock_errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cashiers", type=int, default=3)
+    parser.add_argument("--readers", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=10.0, help="lama uji (detik)")
+    parser.add_argument("--processes", action="store_true", help="setiap kasir/pembaca di proses terpisah (bawaan: thread)")
+    parser.add_argument("--db", help="database yang sudah ada (bawaan: database seed sementara)")
+    parser.add_argument("--retries", type=int, default=db.BUSY_RETRIES, help="percobaan ulang saat database sibuk")
+    parser.add_argument("--begin", choices=["IMMEDIATE", "DEFERRED", "EXCLUSIVE"], default=db.TRANSACTION_MODE)
+    parser.add_argument("--busy-timeout-ms", type=int, default=db.BUSY_TIMEOUT_MS)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    settings = _settings(args)
+    _apply_settings(settings)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "loadtest.db")
+        pool = db.ConnectionPool(path) if args.db else bench.make_fixture_db(path)
+        jobs = [('cashier', args.seed + i) for i in range(args.cashiers)] + [('reader', args.seed + 1000 + i) for i in range(args.readers)]
+        print(f"{args.cashiers} kasir + {args.readers} pembaca, {args.duration:g} s, "
+              f"{'proses' if args.processes else 'thread'}, BEGIN {args.begin}, retry {args.retries}, busy_timeout {args.busy_timeout_ms} ms")
+
+        if args.processes:
+            with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+                futures = [executor.submit(_run_in_process, path, role, args.duration, seed, settings) for role, seed in jobs]
+                results = [future.result() for future in futures]
+        else:
+            results = _run_in_threads(pool, jobs, args.duration)
+
+        print(f"{'peran':<8} {'n':>4} {'ops':>8} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'lock err':>8} {'error':>6}")
+        lock_errors = _summary("kasir", [r for r in results if r['role'] == 'cashier'], args.duration)
+        lock_errors += _summary("pembaca", [r for r in results if r['role'] == 'reader'], args.duration)
+
+        before = db.wal_size(path)
+        busy, _, _ = db.checkpoint(pool, "TRUNCATE")
+        print(f"WAL {before:,} -> {db.wal_size(path):,} byte setelah checkpoint TRUNCATE{' (sebagian, ada pembaca aktif)' if busy else ''}")
+        pool.close()
+    if lock_errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
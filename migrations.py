@@ -0,0 +1,437 @@
+"""Migrasi skema bernomor berbasis `PRAGMA user_version`.
+
+Setiap migrasi hanya dijalankan sekali per file database (versi tersimpan di
+header file), dan `ensure_schema` hanya memeriksanya sekali per proses.
+Isi migrasi berupa SQL tetap (bukan panggilan ke modul lain), supaya perubahan
+kode aplikasi berikutnya tidak mengubah hasil migrasi lama di database yang belum di-upgrade.
+Jalankan `python migrations.py [path_db]` untuk migrasi manual beserta laporan waktunya.
+"""
+import sys
+import threading
+import time
+
+import db
+
+
+def _m001_base_schema(conn):
+    """Skema dasar + perbaikan skema lama (sebelumnya `init_db`/`update_db_schema`)."""
+    c = conn.cursor()
+    c.execute("""CREATE TABLE IF NOT EXISTS employees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, wage_amount REAL,
+        wage_period TEXT, password TEXT, role TEXT, is_active BOOLEAN DEFAULT 1
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS ingredients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, unit TEXT,
+        cost_per_unit REAL, stock REAL, pack_weight REAL DEFAULT 0.0, pack_price REAL DEFAULT 0.0
+    )""")
+    c.execute("CREATE TABLE IF NOT EXISTS products (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, price REAL)")
+    c.execute("""CREATE TABLE IF NOT EXISTS recipes (
+        product_id INTEGER, ingredient_id INTEGER, qty_per_unit REAL, PRIMARY KEY (product_id, ingredient_id)
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, transaction_date TEXT, total_amount REAL,
+        payment_method TEXT, employee_id INTEGER
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS transaction_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, transaction_id INTEGER, product_id INTEGER,
+        quantity INTEGER, price_per_unit REAL
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS expenses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, category TEXT,
+        description TEXT, amount REAL, payment_method TEXT, account_id INTEGER
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS attendance (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id INTEGER, check_in TEXT, check_out TEXT
+    )""")
+    # NEW TABLES FOR ACCOUNTING AND ERP FEATURES
+    c.execute("""CREATE TABLE IF NOT EXISTS accounts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        account_code INTEGER UNIQUE,
+        account_name TEXT UNIQUE,
+        account_type TEXT, -- e.g., Aset, Liabilitas, Ekuitas, Pendapatan, Beban
+        normal_balance TEXT -- e.g., Debit, Kredit
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS journal_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        entry_date TEXT,
+        description TEXT,
+        transaction_id INTEGER, -- Link to transactions table
+        expense_id INTEGER, -- Link to expenses table
+        FOREIGN KEY (transaction_id) REFERENCES transactions(id),
+        FOREIGN KEY (expense_id) REFERENCES expenses(id)
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS journal_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        journal_entry_id INTEGER,
+        account_id INTEGER,
+        debit REAL DEFAULT 0.0,
+        kredit REAL DEFAULT 0.0,
+        FOREIGN KEY (journal_entry_id) REFERENCES journal_entries(id),
+        FOREIGN KEY (account_id) REFERENCES accounts(id)
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS customers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE,
+        address TEXT,
+        phone TEXT,
+        email TEXT
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS suppliers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE,
+        address TEXT,
+        phone TEXT,
+        email TEXT
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS fixed_assets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        asset_name TEXT,
+        acquisition_date TEXT,
+        acquisition_cost REAL,
+        useful_life_years INTEGER,
+        salvage_value REAL,
+        depreciation_method TEXT, -- e.g., Straight-line
+        current_book_value REAL
+    )""")
+
+    # Database lama (sebelum ada user_version) mungkin masih memakai kolom versi lama
+    c.execute("PRAGMA table_info(employees)")
+    emp_columns = {info[1] for info in c.fetchall()}
+    if 'password' not in emp_columns: c.execute("ALTER TABLE employees ADD COLUMN password TEXT")
+    if 'role' not in emp_columns: c.execute("ALTER TABLE employees ADD COLUMN role TEXT")
+    if 'is_active' not in emp_columns: c.execute("ALTER TABLE employees ADD COLUMN is_active BOOLEAN DEFAULT 1")
+    if 'hourly_wage' in emp_columns:
+         c.execute("ALTER TABLE employees RENAME TO employees_old")
+         c.execute("""CREATE TABLE employees (
+             id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, wage_amount REAL,
+             wage_period TEXT, password TEXT, role TEXT, is_active BOOLEAN DEFAULT 1
+         )""")
+         c.execute("INSERT INTO employees (id, name, wage_amount, wage_period, is_active) SELECT id, name, hourly_wage, 'Per Jam', 1 FROM employees_old")
+         c.execute("DROP TABLE employees_old")
+
+    c.execute("PRAGMA table_info(expenses)")
+    exp_columns = {info[1] for info in c.fetchall()}
+    if 'category' not in exp_columns: c.execute("ALTER TABLE expenses ADD COLUMN category TEXT DEFAULT 'Lainnya'")
+    if 'account_id' not in exp_columns: c.execute("ALTER TABLE expenses ADD COLUMN account_id INTEGER")
+
+
+def _m002_hot_table_indexes(conn):
+    """Indeks sekunder untuk filter rentang tanggal dan join antar tabel yang sering dipakai."""
+    c = conn.cursor()
+    c.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(transaction_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_transaction_items_transaction ON transaction_items(transaction_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_transaction_items_product ON transaction_items(product_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recipes_ingredient ON recipes(ingredient_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_attendance_check_in ON attendance(check_in)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_journal_entries_date ON journal_entries(entry_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_journal_entries_transaction ON journal_entries(transaction_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_journal_entries_expense ON journal_entries(expense_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_journal_items_entry ON journal_items(journal_entry_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_journal_items_account ON journal_items(account_id)")
+    c.execute("ANALYZE")
+
+
+def _m003_catalog_version(conn):
+    """Penghitung versi katalog yang dinaikkan trigger setiap kali produk, resep atau biaya bahan berubah."""
+    c = conn.cursor()
+    c.execute("CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)")
+    c.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('catalog_version', 0)")
+    bump = "BEGIN UPDATE app_meta SET value = value + 1 WHERE key = 'catalog_version'; END"
+    for table in ("products", "recipes"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_catalog AFTER {event} ON {table} {bump}")
+    # Perubahan stok saat penjualan tidak memicu trigger ini, hanya perubahan biaya/penghapusan bahan
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_ingredients_cost_catalog AFTER UPDATE OF cost_per_unit ON ingredients {bump}")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_ingredients_delete_catalog AFTER DELETE ON ingredients {bump}")
+
+
+def _m004_product_costs(conn):
+    """Tabel HPP per produk yang dijaga trigger; hanya produk yang terdampak yang dihitung ulang."""
+    c = conn.cursor()
+    c.execute("CREATE TABLE IF NOT EXISTS product_costs (product_id INTEGER PRIMARY KEY, unit_cost REAL NOT NULL DEFAULT 0)")
+    unit_cost = "(SELECT IFNULL(SUM(r.qty_per_unit * i.cost_per_unit), 0) FROM recipes r JOIN ingredients i ON r.ingredient_id = i.id WHERE r.product_id = {pid})"
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_products_insert_cost AFTER INSERT ON products BEGIN INSERT OR REPLACE INTO product_costs (product_id, unit_cost) VALUES (NEW.id, {unit_cost.format(pid='NEW.id')}); END")
+    c.execute("CREATE TRIGGER IF NOT EXISTS trg_products_delete_cost AFTER DELETE ON products BEGIN DELETE FROM product_costs WHERE product_id = OLD.id; END")
+    for event, row in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_recipes_{event.lower()}_cost AFTER {event} ON recipes BEGIN
+            UPDATE product_costs SET unit_cost = {unit_cost.format(pid=f'{row}.product_id')} WHERE product_id = {row}.product_id;
+        END""")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_recipes_update_cost AFTER UPDATE ON recipes BEGIN
+        UPDATE product_costs SET unit_cost = {unit_cost.format(pid='product_costs.product_id')} WHERE product_id IN (OLD.product_id, NEW.product_id);
+    END""")
+    for name, event, row in (("cost", "UPDATE OF cost_per_unit", "NEW"), ("delete", "DELETE", "OLD")):
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_ingredients_{name}_product_cost AFTER {event} ON ingredients BEGIN
+            UPDATE product_costs SET unit_cost = {unit_cost.format(pid='product_costs.product_id')}
+            WHERE product_id IN (SELECT product_id FROM recipes WHERE ingredient_id = {row}.id);
+        END""")
+    c.execute(f"INSERT OR REPLACE INTO product_costs (product_id, unit_cost) SELECT p.id, {unit_cost.format(pid='p.id')} FROM products p")
+
+
+def _m005_account_balance_snapshots(conn):
+    """Saldo kumulatif per akun di akhir setiap bulan yang sudah tutup (lihat accounting.ensure_snapshots).
+
+    Trigger menghapus snapshot bulan yang terdampak dan semua bulan sesudahnya setiap kali
+    jurnal di bulan itu ditambah, diubah atau dihapus; bulan-bulan itu dibangun ulang saat dibutuhkan.
+    """
+    c = conn.cursor()
+    c.execute("""CREATE TABLE IF NOT EXISTS account_balance_snapshots (
+        period TEXT, -- 'YYYY-MM'
+        account_id INTEGER,
+        debit REAL NOT NULL DEFAULT 0.0,
+        kredit REAL NOT NULL DEFAULT 0.0,
+        PRIMARY KEY (period, account_id)
+    ) WITHOUT ROWID""")
+    invalidate = "DELETE FROM account_balance_snapshots WHERE period >= substr({date}, 1, 7);"
+    entry_date = "(SELECT entry_date FROM journal_entries WHERE id = {row}.journal_entry_id)"
+    for event, row in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_journal_items_{event.lower()}_snapshot AFTER {event} ON journal_items BEGIN "
+                  f"{invalidate.format(date=entry_date.format(row=row))} END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_journal_items_update_snapshot AFTER UPDATE ON journal_items BEGIN "
+              f"{invalidate.format(date=entry_date.format(row='OLD'))} {invalidate.format(date=entry_date.format(row='NEW'))} END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_journal_entries_delete_snapshot AFTER DELETE ON journal_entries BEGIN "
+              f"{invalidate.format(date='OLD.entry_date')} END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_journal_entries_date_snapshot AFTER UPDATE OF entry_date ON journal_entries BEGIN "
+              f"{invalidate.format(date='OLD.entry_date')} {invalidate.format(date='NEW.entry_date')} END")
+
+
+def _m006_daily_sales_rollups(conn):
+    """Rekap penjualan harian per metode bayar dan per produk (lihat rollups.py), diisi dari data lama."""
+    c = conn.cursor()
+    columns = [col[1] for col in c.execute("PRAGMA table_info(transaction_items)")]
+    if 'unit_cost' not in columns:
+        # HPP per unit saat penjualan, agar pembatalan mengurangi rekap dengan angka yang sama
+        c.execute("ALTER TABLE transaction_items ADD COLUMN unit_cost REAL")
+    c.execute("""CREATE TABLE IF NOT EXISTS daily_sales (
+        day TEXT, -- 'YYYY-MM-DD'
+        payment_method TEXT,
+        revenue REAL NOT NULL DEFAULT 0.0,
+        tx_count INTEGER NOT NULL DEFAULT 0,
+        items_qty INTEGER NOT NULL DEFAULT 0,
+        cogs REAL NOT NULL DEFAULT 0.0,
+        PRIMARY KEY (day, payment_method)
+    ) WITHOUT ROWID""")
+    c.execute("""CREATE TABLE IF NOT EXISTS daily_product_sales (
+        day TEXT,
+        product_id INTEGER,
+        qty INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0.0,
+        cogs REAL NOT NULL DEFAULT 0.0,
+        PRIMARY KEY (day, product_id)
+    ) WITHOUT ROWID""")
+    # Isi dari data lama; item tanpa unit_cost memakai HPP produk saat migrasi
+    c.execute("""
+        UPDATE transaction_items SET unit_cost = IFNULL((SELECT unit_cost FROM product_costs pc WHERE pc.product_id = transaction_items.product_id), 0)
+        WHERE unit_cost IS NULL
+    """)
+    c.execute("""
+        INSERT INTO daily_sales (day, payment_method, revenue, tx_count, items_qty, cogs)
+        SELECT substr(t.transaction_date, 1, 10), t.payment_method,
+               SUM(IFNULL(i.revenue, 0)), COUNT(*), SUM(IFNULL(i.qty, 0)), SUM(IFNULL(i.cogs, 0))
+        FROM transactions t
+        LEFT JOIN (
+            SELECT transaction_id, SUM(quantity) AS qty, SUM(quantity * price_per_unit) AS revenue, SUM(quantity * unit_cost) AS cogs
+            FROM transaction_items GROUP BY transaction_id
+        ) i ON i.transaction_id = t.id
+        GROUP BY 1, 2
+    """)
+    c.execute("""
+        INSERT INTO daily_product_sales (day, product_id, qty, revenue, cogs)
+        SELECT substr(t.transaction_date, 1, 10), ti.product_id,
+               SUM(ti.quantity), SUM(ti.quantity * ti.price_per_unit), SUM(ti.quantity * ti.unit_cost)
+        FROM transaction_items ti JOIN transactions t ON t.id = ti.transaction_id
+        GROUP BY 1, 2
+    """)
+
+
+def _m007_receipt_cache(conn):
+    """Cache struk yang sudah dirender per transaksi & format (lihat receipts.py)."""
+    c = conn.cursor()
+    c.execute("""CREATE TABLE IF NOT EXISTS receipts (
+        transaction_id INTEGER,
+        format TEXT,
+        content BLOB NOT NULL,
+        PRIMARY KEY (transaction_id, format)
+    ) WITHOUT ROWID""")
+    c.execute("CREATE TRIGGER IF NOT EXISTS trg_transactions_delete_receipts AFTER DELETE ON transactions BEGIN "
+              "DELETE FROM receipts WHERE transaction_id = OLD.id; END")
+
+
+def _m008_attendance_employee_index(conn):
+    """Indeks absensi per karyawan untuk riwayat absensi, cek check-in harian dan payroll."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_employee_check_in ON attendance(employee_id, check_in)")
+    conn.execute("ANALYZE attendance")
+
+
+# Salinan search.SOURCES saat migrasi #9 dirilis: tabel -> (kode rowid, kolom judul, ekspresi detail, kolom pemicu)
+_M009_SOURCES = {
+    'products': (1, 'name', "''", 'name'),
+    'ingredients': (2, 'name', "IFNULL({row}.unit, '')", 'name, unit'),
+    'expenses': (3, 'description', "IFNULL({row}.category, '') || ' ' || IFNULL({row}.date, '')", 'description, category, date'),
+    'customers': (4, 'name', "IFNULL({row}.phone, '') || ' ' || IFNULL({row}.email, '') || ' ' || IFNULL({row}.address, '')", 'name, phone, email, address'),
+    'suppliers': (5, 'name', "IFNULL({row}.phone, '') || ' ' || IFNULL({row}.email, '') || ' ' || IFNULL({row}.address, '')", 'name, phone, email, address'),
+    'employees': (6, 'name', "IFNULL({row}.role, '')", 'name, role'),
+}
+
+
+def _m009_search_index(conn):
+    """Indeks FTS5 data master + trigger sinkronisasi (lihat search.py), menggantikan pencarian LIKE '%kata%'.
+
+    rowid = id * 8 + kode tabel, sehingga trigger menghapus/mengganti baris lewat rowid."""
+    c = conn.cursor()
+    c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, detail, tokenize = 'unicode61', prefix = '2 3')")
+    c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_vocab USING fts5vocab(search_index, 'row')")
+    c.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('search_version', 0)")
+    bump = "UPDATE app_meta SET value = value + 1 WHERE key = 'search_version';"
+    for table, (code, title, detail, columns) in _M009_SOURCES.items():
+        insert = f"INSERT INTO search_index (rowid, title, detail) VALUES (NEW.id * 8 + {code}, NEW.{title}, {detail.format(row='NEW')});"
+        delete = f"DELETE FROM search_index WHERE rowid = OLD.id * 8 + {code};"
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_search AFTER INSERT ON {table} BEGIN {insert} {bump} END")
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_update_search AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} {bump} END")
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_search AFTER DELETE ON {table} BEGIN {delete} {bump} END")
+        c.execute(f"INSERT INTO search_index (rowid, title, detail) SELECT id * 8 + {code}, {title}, {detail.format(row=table)} FROM {table}")
+    c.execute(bump)
+    c.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def _m010_stock_movements(conn):
+    """Buku mutasi stok + snapshot harian yang dijaga trigger (lihat stock.py).
+
+    Riwayat penjualan lama menjadi mutasi `sale` (resep saat migrasi x jumlah terjual), didahului
+    satu `adjustment` saldo awal per bahan = stok saat ini + total pemakaian, bertanggal hari
+    transaksi pertama; stok bahan tidak berubah. Trigger saldo dipasang setelah pengisian.
+    """
+    c = conn.cursor()
+    c.execute("""CREATE TABLE IF NOT EXISTS stock_movements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ingredient_id INTEGER NOT NULL,
+        moved_at TEXT NOT NULL, -- 'YYYY-MM-DD HH:MM:SS'
+        kind TEXT NOT NULL CHECK (kind IN ('sale', 'void', 'receipt', 'adjustment', 'waste')),
+        qty REAL NOT NULL, -- bertanda: masuk positif, keluar negatif
+        transaction_id INTEGER,
+        note TEXT
+    )""")
+    # Laporan pemakaian per rentang tanggal dibaca dari indeks saja
+    c.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_moved_at ON stock_movements(moved_at, ingredient_id, kind, qty)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_ingredient ON stock_movements(ingredient_id, moved_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_transaction ON stock_movements(transaction_id) WHERE transaction_id IS NOT NULL")
+    c.execute("""CREATE TABLE IF NOT EXISTS stock_snapshots (
+        ingredient_id INTEGER,
+        day TEXT, -- 'YYYY-MM-DD'
+        qty REAL NOT NULL, -- saldo penutupan hari itu
+        PRIMARY KEY (ingredient_id, day)
+    ) WITHOUT ROWID""")
+
+    first_sale = c.execute("SELECT MIN(transaction_date) FROM transactions").fetchone()[0]
+    opening_at = f"{first_sale[:10]} 00:00:00" if first_sale else time.strftime("%Y-%m-%d %H:%M:%S")
+    c.execute("""
+        CREATE TEMP TABLE m010_sales AS
+        SELECT t.id AS transaction_id, t.transaction_date AS moved_at, r.ingredient_id, -SUM(r.qty_per_unit * ti.quantity) AS qty
+        FROM transactions t
+        JOIN transaction_items ti ON ti.transaction_id = t.id
+        JOIN recipes r ON r.product_id = ti.product_id
+        GROUP BY t.id, r.ingredient_id
+    """)
+    c.execute("""
+        INSERT INTO stock_movements (ingredient_id, moved_at, kind, qty, note)
+        SELECT i.id, ?, 'adjustment', IFNULL(i.stock, 0) - IFNULL(used.qty, 0), 'Saldo awal (disusun dari riwayat penjualan)'
+        FROM ingredients i LEFT JOIN (SELECT ingredient_id, SUM(qty) AS qty FROM m010_sales GROUP BY ingredient_id) used
+            ON used.ingredient_id = i.id
+    """, (opening_at,))
+    c.execute("""
+        INSERT INTO stock_movements (ingredient_id, moved_at, kind, qty, transaction_id)
+        SELECT ingredient_id, moved_at, 'sale', qty, transaction_id FROM m010_sales ORDER BY moved_at, transaction_id
+    """)
+    c.execute("DROP TABLE m010_sales")
+    c.execute("""
+        INSERT INTO stock_snapshots (ingredient_id, day, qty)
+        SELECT ingredient_id, day, SUM(qty) OVER (PARTITION BY ingredient_id ORDER BY day)
+        FROM (SELECT ingredient_id, substr(moved_at, 1, 10) AS day, SUM(qty) AS qty FROM stock_movements GROUP BY 1, 2)
+    """)
+
+    # Saldo berjalan ingredients.stock + snapshot hari mutasi; mutasi bertanggal mundur menggeser snapshot sesudahnya
+    c.execute("""CREATE TRIGGER IF NOT EXISTS trg_stock_movements_insert_balance AFTER INSERT ON stock_movements BEGIN
+        UPDATE ingredients SET stock = IFNULL(stock, 0) + NEW.qty WHERE id = NEW.ingredient_id;
+        INSERT INTO stock_snapshots (ingredient_id, day, qty)
+        VALUES (NEW.ingredient_id, substr(NEW.moved_at, 1, 10), IFNULL((
+            SELECT qty FROM stock_snapshots WHERE ingredient_id = NEW.ingredient_id AND day < substr(NEW.moved_at, 1, 10)
+            ORDER BY day DESC LIMIT 1), 0) + NEW.qty)
+        ON CONFLICT (ingredient_id, day) DO UPDATE SET qty = qty + NEW.qty;
+        UPDATE stock_snapshots SET qty = qty + NEW.qty WHERE ingredient_id = NEW.ingredient_id AND day > substr(NEW.moved_at, 1, 10);
+    END""")
+    c.execute("CREATE TRIGGER IF NOT EXISTS trg_ingredients_delete_stock_snapshots AFTER DELETE ON ingredients BEGIN "
+              "DELETE FROM stock_snapshots WHERE ingredient_id = OLD.id; END")
+
+
+# (versi, nama, fungsi) -- urutan dan nomor versi tidak boleh diubah setelah dirilis
+MIGRATIONS = [
+    (1, "skema dasar", _m001_base_schema),
+    (2, "indeks tabel utama", _m002_hot_table_indexes),
+    (3, "versi katalog", _m003_catalog_version),
+    (4, "tabel HPP produk", _m004_product_costs),
+    (5, "snapshot saldo akun bulanan", _m005_account_balance_snapshots),
+    (6, "rekap penjualan harian", _m006_daily_sales_rollups),
+    (7, "cache struk", _m007_receipt_cache),
+    (8, "indeks absensi per karyawan", _m008_attendance_employee_index),
+    (9, "indeks pencarian", _m009_search_index),
+    (10, "buku mutasi stok", _m010_stock_movements),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_migrated_paths = set()
+_migrate_lock = threading.Lock()
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Menjalankan migrasi yang belum diterapkan; mengembalikan [(versi, nama, detik), ...]."""
+    applied = []
+    for version, name, upgrade in MIGRATIONS:
+        if version <= get_version(conn):
+            continue
+        started = time.perf_counter()
+        # IMMEDIATE agar dua proses yang start bersamaan tidak menjalankan migrasi yang sama
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_version(conn):
+                conn.rollback()
+                continue
+            upgrade(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append((version, name, time.perf_counter() - started))
+    if applied:
+        conn.execute("PRAGMA optimize")
+    return applied
+
+
+def ensure_schema(pool):
+    """Memastikan skema terbaru, cukup sekali per proses untuk setiap file database."""
+    if pool.path in _migrated_paths:
+        return []
+    with _migrate_lock:
+        if pool.path in _migrated_paths:
+            return []
+        with pool.connection() as conn:
+            applied = migrate(conn)
+        _migrated_paths.add(pool.path)
+    return applied
+
+
+def format_report(applied):
+    return [f"Migrasi #{version} ({name}) selesai dalam {seconds * 1000:.1f} ms" for version, name, seconds in applied]
+
+
+if __name__ == "__main__":
+    pool = db.ConnectionPool(sys.argv[1] if len(sys.argv) > 1 else db.DB)
+    applied = ensure_schema(pool)
+    for line in format_report(applied) or ["Skema sudah versi terbaru."]:
+        print(line)
+    with pool.connection() as conn:
+        print(f"Versi skema: {get_version(conn)}")
@@ -0,0 +1,50 @@
+"""Perhitungan gaji karyawan dari absensi dalam satu query ber-GROUP BY.
+
+Aturan sama dengan Laporan sebelumnya: hanya karyawan aktif yang punya absensi
+di rentang tanggal; `Per Jam` = total jam kerja, `Per Hari` = jumlah tanggal
+check-in berbeda, `Per Bulan` = upah/30 x jumlah hari dalam rentang. Shift yang
+belum check-out (check_out NULL/kosong) tidak dihitung jamnya, tetapi dilaporkan
+di `open_shifts` dan tetap dihitung sebagai hari kerja.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+PayrollLine = namedtuple("PayrollLine", "employee_id name wage_amount wage_period hours work_days open_shifts salary")
+
+_PAYROLL_QUERY = """
+    SELECT e.id, e.name, e.wage_amount, e.wage_period,
+           IFNULL(SUM(round((julianday(NULLIF(a.check_out, '')) - julianday(a.check_in)) * 86400.0, 3)), 0.0) / 3600.0 AS hours,
+           COUNT(DISTINCT date(a.check_in)) AS work_days,
+           SUM(NULLIF(a.check_out, '') IS NULL) AS open_shifts
+    FROM attendance a JOIN employees e ON e.id = a.employee_id
+    WHERE e.is_active = 1 AND a.check_in >= ? AND a.check_in < ?
+    GROUP BY e.id
+    ORDER BY e.id
+"""
+
+
+def compute(conn, start, end):
+    """[PayrollLine] untuk absensi dengan start <= tanggal check-in <= end (date)."""
+    days_in_range = (end - start).days + 1
+    lines = []
+    for employee_id, name, wage_amount, wage_period, hours, work_days, open_shifts in conn.execute(
+            _PAYROLL_QUERY, (start.isoformat(), (end + timedelta(days=1)).isoformat())):
+        wage_amount = wage_amount or 0.0
+        if wage_period == 'Per Jam': salary = hours * wage_amount
+        elif wage_period == 'Per Hari': salary = work_days * wage_amount
+        elif wage_period == 'Per Bulan': salary = wage_amount / 30 * days_in_range
+        else: salary = 0.0
+        lines.append(PayrollLine(employee_id, name, wage_amount, wage_period, hours, work_days, open_shifts, salary))
+    return lines
+
+
+def detail(line, start, end):
+    """Keterangan untuk tabel Detail Gaji Karyawan."""
+    if line.wage_period == 'Per Jam':
+        text = f'{line.hours:.2f} jam kerja'
+        if line.open_shifts:
+            text += f' ({line.open_shifts} shift belum check-out)'
+        return text
+    if line.wage_period == 'Per Hari':
+        return f'{line.work_days} hari kerja'
+    return f'{(end - start).days + 1} hari dalam rentang'
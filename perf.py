@@ -0,0 +1,257 @@
+"""Instrumentasi query & rerun untuk halaman Admin "Performa".
+
+Semua koneksi dibuat oleh db.open_connection dengan kelas `InstrumentedConnection`.
+Selama instrumentasi mati (bawaan; nyalakan dengan `KASIR_PERF=1` atau dari halaman
+Performa) koneksi itu hanya memeriksa satu flag lalu memakai jalur sqlite3 biasa.
+Saat menyala, setiap statement dicatat: fingerprint SQL, durasi (execute + fetch),
+jumlah baris yang diambil dan halaman menu yang memanggilnya. Statement yang lebih
+lambat dari `SLOW_MS` di-EXPLAIN QUERY PLAN sekali per fingerprint untuk mendeteksi
+full table scan. Catatan disimpan di memori proses (deque berukuran tetap).
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("KASIR_PERF") == "1"
+EXPLAIN = True
+SLOW_MS = 50.0
+MAX_QUERIES = 5000
+MAX_RERUNS = 2000
+MAX_PLANS = 500
+
+_queries = deque(maxlen=MAX_QUERIES)
+_reruns = deque(maxlen=MAX_RERUNS)
+_plans = {}  # fingerprint -> [detail EXPLAIN QUERY PLAN]
+_plans_lock = threading.Lock()
+_fingerprints = {}  # teks SQL -> fingerprint
+_local = threading.local()
+
+QueryStat = namedtuple("QueryStat", "fingerprint calls total_ms mean_ms max_ms mean_rows pages full_scans")
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint(sql):
+    """SQL ternormalisasi: spasi dirapikan, literal jadi ?, daftar (?, ?, ...) jadi (?...)."""
+    cached = _fingerprints.get(sql)
+    if cached is None:
+        if len(_fingerprints) >= MAX_QUERIES:
+            _fingerprints.clear()
+        cached = _fingerprints[sql] = _PLACEHOLDER_LISTS.sub("(?...)", _LITERALS.sub("?", _WHITESPACE.sub(" ", sql).strip()))
+    return cached
+
+
+def enable(explain=True):
+    global ENABLED, EXPLAIN
+    ENABLED, EXPLAIN = True, explain
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    _queries.clear(); _reruns.clear()
+    with _plans_lock:
+        _plans.clear()
+
+
+def set_page(page):
+    """Halaman menu yang sedang dirender di thread ini (satu thread per sesi Streamlit)."""
+    _local.page = page
+
+
+def current_page():
+    return getattr(_local, "page", None)
+
+
+class _Record:
+    __slots__ = ("fingerprint", "sql", "ms", "rows", "page", "at")
+
+    def __init__(self, sql, page):
+        self.fingerprint, self.sql, self.ms, self.rows, self.page, self.at = fingerprint(sql), sql, 0.0, 0, page, time.time()
+
+
+def _is_full_scan(detail):
+    # "SCAN tabel" tanpa indeks; "SCAN t USING [COVERING] INDEX" dan subquery/CTE tidak dihitung
+    words = detail.split()
+    return len(words) >= 2 and words[0] == "SCAN" and "USING" not in words and not words[1].startswith(("(", "CONSTANT"))
+
+
+def _explain(conn, record, params):
+    with _plans_lock:
+        if record.fingerprint in _plans or len(_plans) >= MAX_PLANS:
+            return
+        _plans[record.fingerprint] = []
+    try:
+        plan = [row[3] for row in sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {record.sql}", params)]
+    except sqlite3.Error:
+        plan = []
+    _plans[record.fingerprint] = plan
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor yang menambahkan waktu & jumlah baris setiap fetch ke catatan statement terakhirnya."""
+
+    _record = None
+    _params = ()
+
+    def execute(self, sql, params=()):
+        self._record, self._params = _Record(sql, current_page()), params
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._finish(started, 0)
+            _queries.append(self._record)
+
+    def executemany(self, sql, seq_of_params):
+        self._record, self._params = _Record(sql, current_page()), None
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            self._finish(started, 0)
+            _queries.append(self._record)
+
+    def _finish(self, started, rows):
+        record = self._record
+        if record is None:
+            return
+        record.ms += (time.perf_counter() - started) * 1000
+        record.rows += rows
+        # Hanya statement yang mengembalikan baris (SELECT / WITH ... SELECT) yang di-EXPLAIN
+        if EXPLAIN and record.ms >= SLOW_MS and self._params is not None and self.description is not None:
+            _explain(self.connection, record, self._params)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._finish(started, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._finish(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._finish(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._finish(started, 0)
+            raise
+        self._finish(started, 1)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Koneksi untuk db.open_connection; tanpa biaya berarti selama ENABLED bernilai False."""
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = InstrumentedCursor if ENABLED else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        if not ENABLED:
+            return super().execute(sql, params)
+        return self.cursor(InstrumentedCursor).execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        if not ENABLED:
+            return super().executemany(sql, seq_of_params)
+        return self.cursor(InstrumentedCursor).executemany(sql, seq_of_params)
+
+
+@contextmanager
+def rerun():
+    """Mengukur satu rerun skrip Streamlit ujung ke ujung (termasuk yang dihentikan st.rerun/st.stop)."""
+    if not ENABLED:
+        yield
+        return
+    set_page(None)
+    _local.measuring = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.measuring = False
+        _reruns.append((current_page() or "(login)", (time.perf_counter() - started) * 1000, time.time()))
+
+
+@contextmanager
+def fragment(page, name):
+    """Mengukur rerun satu fragment (st.fragment) yang berjalan sendiri, dicatat sebagai "halaman · nama".
+
+    Saat fragment ikut dirender dalam rerun penuh atau fragment induknya, waktunya sudah
+    termasuk di pengukuran luar itu dan tidak dicatat lagi."""
+    if not ENABLED or getattr(_local, "measuring", False):
+        yield
+        return
+    set_page(page)
+    _local.measuring = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.measuring = False
+        _reruns.append((f"{page} · {name}", (time.perf_counter() - started) * 1000, time.time()))
+
+
+def top_queries(n=20, order_by="total_ms"):
+    """N fingerprint teratas menurut total_ms / max_ms / calls, dari catatan yang masih tersimpan."""
+    groups = {}
+    for record in list(_queries):
+        group = groups.setdefault(record.fingerprint, [0, 0.0, 0.0, 0, set()])
+        group[0] += 1; group[1] += record.ms; group[2] = max(group[2], record.ms); group[3] += record.rows
+        group[4].add(record.page or "-")
+    scans = full_scans()
+    stats = [QueryStat(fp, calls, total, total / calls, worst, rows / calls, sorted(pages), scans.get(fp, []))
+             for fp, (calls, total, worst, rows, pages) in groups.items()]
+    return sorted(stats, key=lambda stat: getattr(stat, order_by), reverse=True)[:n]
+
+
+def full_scans():
+    """{fingerprint: [detail SCAN tanpa indeks]} dari statement lambat yang sudah di-EXPLAIN."""
+    with _plans_lock:
+        plans = dict(_plans)
+    return {fp: [detail for detail in plan if _is_full_scan(detail)] for fp, plan in plans.items()
+            if any(_is_full_scan(detail) for detail in plan)}
+
+
+def plan_of(fp):
+    with _plans_lock:
+        return list(_plans.get(fp, []))
+
+
+def rerun_timings():
+    """{halaman: [durasi rerun dalam ms]} untuk histogram per halaman."""
+    timings = {}
+    for page, ms, _ in list(_reruns):
+        timings.setdefault(page, []).append(ms)
+    return timings
+
+
+def page_query_totals():
+    """{halaman: (jumlah statement, total ms)}."""
+    totals = {}
+    for record in list(_queries):
+        calls, ms = totals.get(record.page or "-", (0, 0.0))
+        totals[record.page or "-"] = (calls + 1, ms + record.ms)
+    return totals
@@ -0,0 +1,135 @@
+"""Struk transaksi: render sekali, simpan di cache memori (LRU) dan tabel `receipts`.
+
+Format yang didukung:
+    pdf                  struk A4 (FPDF), seperti sebelumnya
+    text58 / text80      teks polos 32 / 48 kolom
+    escpos58 / escpos80  byte ESC/POS siap kirim ke printer thermal 58 / 80 mm
+
+Baris di tabel `receipts` ikut terhapus oleh trigger saat transaksinya dihapus
+(migrasi #7); cache memori dibuang lewat `invalidate` di jalur pembatalan.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+STORE_NAME = 'Bali Nice - Dream Coffee & Eatry'
+MEMORY_CACHE_SIZE = 128
+
+Receipt = namedtuple("Receipt", "id transaction_date total_amount payment_method items")  # items: [(name, qty, price)]
+
+# ESC/POS: inisialisasi, rata tengah/kiri, tebal on/off, feed lalu potong sebagian
+_ESC_INIT, _ESC_CENTER, _ESC_LEFT = b'\x1b@', b'\x1ba\x01', b'\x1ba\x00'
+_ESC_BOLD_ON, _ESC_BOLD_OFF = b'\x1bE\x01', b'\x1bE\x00'
+_ESC_CUT = b'\x1bd\x03\x1dVB\x00'
+
+
+def load(conn, transaction_id):
+    """Data struk dari database; None bila transaksi tidak ada."""
+    row = conn.execute("SELECT id, transaction_date, total_amount, payment_method FROM transactions WHERE id = ?", (transaction_id,)).fetchone()
+    if row is None:
+        return None
+    items = conn.execute("""
+        SELECT p.name, ti.quantity, ti.price_per_unit
+        FROM transaction_items ti JOIN products p ON ti.product_id = p.id
+        WHERE ti.transaction_id = ? ORDER BY ti.id
+    """, (transaction_id,)).fetchall()
+    return Receipt(*row, items)
+
+
+def render_pdf(receipt):
+    from fpdf import FPDF
+    pdf = FPDF(); pdf.add_page(); pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, STORE_NAME, 0, 1, 'C'); pdf.set_font("Arial", '', 10)
+    pdf.cell(0, 5, 'Struk Pembayaran', 0, 1, 'C'); pdf.ln(5); pdf.set_font("Arial", '', 12)
+    pdf.cell(0, 8, f"No. Transaksi: {receipt.id}", 0, 1)
+    pdf.cell(0, 8, f"Tanggal: {receipt.transaction_date}", 0, 1); pdf.ln(5); pdf.set_font("Arial", 'B', 12)
+    pdf.cell(100, 10, 'Produk', 1); pdf.cell(30, 10, 'Qty', 1); pdf.cell(50, 10, 'Subtotal', 1, 1); pdf.set_font("Arial", '', 12)
+    for name, quantity, price in receipt.items:
+        pdf.cell(100, 10, name, 1); pdf.cell(30, 10, str(quantity), 1); pdf.cell(50, 10, f"Rp {quantity * price:,.0f}", 1, 1)
+    pdf.ln(10); pdf.set_font("Arial", 'B', 14)
+    pdf.cell(130, 10, 'Total', 1); pdf.cell(50, 10, f"Rp {receipt.total_amount:,.0f}", 1, 1)
+    pdf.cell(130, 10, 'Metode Bayar', 1); pdf.cell(50, 10, receipt.payment_method, 1, 1)
+    return bytes(pdf.output())
+
+
+def _text_lines(receipt, width):
+    """[(teks, gaya)] dengan gaya 'center', 'bold' atau None; dipakai oleh teks polos dan ESC/POS."""
+    def row(left, right):
+        return f"{left[:width - len(right) - 1]:<{width - len(right)}}{right}"
+    rule = "-" * width
+    lines = [(STORE_NAME[:width], 'center'), ("Struk Pembayaran", 'center'), (rule, None),
+             (f"No. Transaksi: {receipt.id}", None), (f"Tanggal: {receipt.transaction_date}", None), (rule, None)]
+    for name, quantity, price in receipt.items:
+        lines.append((name[:width], None))
+        lines.append((row(f"  {quantity} x {price:,.0f}", f"{quantity * price:,.0f}"), None))
+    lines += [(rule, None), (row("Total", f"Rp {receipt.total_amount:,.0f}"), 'bold'),
+              (row("Metode Bayar", receipt.payment_method or '-'), None), ("", None), ("Terima kasih!", 'center')]
+    return lines
+
+
+def render_text(receipt, width=32):
+    return "\n".join(text.center(width).rstrip() if style == 'center' else text for text, style in _text_lines(receipt, width)).encode("utf-8") + b"\n"
+
+
+def render_escpos(receipt, width=32):
+    out = bytearray(_ESC_INIT)
+    for text, style in _text_lines(receipt, width):
+        out += _ESC_CENTER if style == 'center' else _ESC_LEFT
+        if style == 'bold': out += _ESC_BOLD_ON
+        out += text.encode("cp437", errors="replace") + b"\n"
+        if style == 'bold': out += _ESC_BOLD_OFF
+    return bytes(out + _ESC_CUT)
+
+
+# format -> (fungsi render, lebar kolom); 58 mm = 32 kolom, 80 mm = 48 kolom (font A)
+FORMATS = {
+    'pdf': (render_pdf, None),
+    'text58': (render_text, 32), 'text80': (render_text, 48),
+    'escpos58': (render_escpos, 32), 'escpos80': (render_escpos, 48),
+}
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def _remember(key, content):
+    with _lock:
+        _memory[key] = content
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def render(receipt, fmt):
+    renderer, width = FORMATS[fmt]
+    return renderer(receipt) if width is None else renderer(receipt, width)
+
+
+def get_receipt(pool, transaction_id, fmt='pdf'):
+    """Byte struk `fmt` untuk satu transaksi: memori -> tabel receipts -> render baru. None bila transaksi tidak ada."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Format struk tidak dikenal: {fmt}")
+    key = (pool.path, transaction_id, fmt)
+    with _lock:
+        content = _memory.get(key)
+        if content is not None:
+            _memory.move_to_end(key)
+            return content
+    with pool.connection() as conn:
+        row = conn.execute("SELECT content FROM receipts WHERE transaction_id = ? AND format = ?", (transaction_id, fmt)).fetchone()
+        if row is not None:
+            content = bytes(row[0])
+        else:
+            receipt = load(conn, transaction_id)
+            if receipt is None:
+                return None
+            content = render(receipt, fmt)
+            conn.execute("INSERT OR REPLACE INTO receipts (transaction_id, format, content) VALUES (?, ?, ?)", (transaction_id, fmt, content))
+    _remember(key, content)
+    return content
+
+
+def invalidate(pool, transaction_id):
+    """Membuang struk satu transaksi dari cache memori (baris tabel dihapus oleh trigger)."""
+    with _lock:
+        for key in [key for key in _memory if key[0] == pool.path and key[1] == transaction_id]:
+            del _memory[key]
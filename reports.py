@@ -0,0 +1,42 @@
+"""Query Laporan berbasis rentang tanggal, dipakai bersama oleh halaman Laporan dan bench.py.
+
+Semua fungsi menerima `start`/`end` berupa date (inklusif) dan memakai rentang
+setengah terbuka `day >= start AND day < end + 1 hari` dengan parameter, sehingga
+teks SQL selalu sama (statement cache) berapa pun jumlah transaksinya.
+"""
+from datetime import timedelta
+
+
+def _day_range(start, end):
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
+
+
+def daily_totals(conn, start, end):
+    """[(day, revenue, tx_count, items_qty, cogs)] per hari dari daily_sales."""
+    return conn.execute("""
+        SELECT day, SUM(revenue), SUM(tx_count), SUM(items_qty), SUM(cogs)
+        FROM daily_sales WHERE day >= ? AND day < ?
+        GROUP BY day ORDER BY day
+    """, _day_range(start, end)).fetchall()
+
+
+def best_sellers(conn, start, end, limit=5):
+    """[(nama_produk, qty)] produk terlaris, urut qty terbanyak lalu nama."""
+    return conn.execute("""
+        SELECT p.name, SUM(d.qty) AS total_qty
+        FROM daily_product_sales d JOIN products p ON p.id = d.product_id
+        WHERE d.day >= ? AND d.day < ?
+        GROUP BY d.product_id HAVING total_qty > 0
+        ORDER BY total_qty DESC, p.name LIMIT ?
+    """, (*_day_range(start, end), limit)).fetchall()
+
+
+def most_profitable(conn, start, end, limit=5):
+    """[(nama_produk, laba_kotor)] dari pendapatan dikurangi HPP yang tercatat saat penjualan."""
+    return conn.execute("""
+        SELECT p.name, SUM(d.revenue - d.cogs) AS profit
+        FROM daily_product_sales d JOIN products p ON p.id = d.product_id
+        WHERE d.day >= ? AND d.day < ?
+        GROUP BY d.product_id
+        ORDER BY profit DESC, p.name LIMIT ?
+    """, (*_day_range(start, end), limit)).fetchall()
@@ -0,0 +1,104 @@
+"""Rekap penjualan harian (`daily_sales`, `daily_product_sales`) untuk Laporan.
+
+Rekap diperbarui di dalam transaksi penjualan dan pembatalan (lihat sales.py),
+sehingga Laporan (reports.py) cukup membaca beberapa ratus baris per tahun. HPP memakai
+`transaction_items.unit_cost` yang dicatat saat penjualan.
+
+    python rollups.py backfill [path_db]   # bangun ulang seluruh rekap dari transaksi
+"""
+import argparse
+import time
+
+import db
+
+_UPSERT_DAILY_SALES = """
+    INSERT INTO daily_sales (day, payment_method, revenue, tx_count, items_qty, cogs) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (day, payment_method) DO UPDATE SET
+        revenue = revenue + excluded.revenue, tx_count = tx_count + excluded.tx_count,
+        items_qty = items_qty + excluded.items_qty, cogs = cogs + excluded.cogs
+"""
+_UPSERT_DAILY_PRODUCT_SALES = """
+    INSERT INTO daily_product_sales (day, product_id, qty, revenue, cogs) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (day, product_id) DO UPDATE SET
+        qty = qty + excluded.qty, revenue = revenue + excluded.revenue, cogs = cogs + excluded.cogs
+"""
+
+
+def _apply(conn, day, payment_method, lines, sign):
+    """Menambah (sign=1) atau mengurangi (sign=-1) satu transaksi ke rekap; lines=[(product_id, qty, price, unit_cost)]."""
+    revenue = sum(qty * price for _, qty, price, _ in lines)
+    cogs = sum(qty * (unit_cost or 0) for _, qty, _, unit_cost in lines)
+    items_qty = sum(qty for _, qty, _, _ in lines)
+    conn.execute(_UPSERT_DAILY_SALES, (day, payment_method, sign * revenue, sign, sign * items_qty, sign * cogs))
+    conn.executemany(_UPSERT_DAILY_PRODUCT_SALES,
+                     [(day, product_id, sign * qty, sign * qty * price, sign * qty * (unit_cost or 0)) for product_id, qty, price, unit_cost in lines])
+    if sign < 0:
+        conn.execute("DELETE FROM daily_sales WHERE day = ? AND tx_count <= 0", (day,))
+        conn.execute("DELETE FROM daily_product_sales WHERE day = ? AND qty <= 0", (day,))
+
+
+def record(conn, transaction_date, payment_method, lines):
+    """Menambahkan satu penjualan baru ke rekap harian."""
+    _apply(conn, transaction_date[:10], payment_method, lines, 1)
+
+
+def unrecord(conn, transaction_id):
+    """Mengurangi rekap harian dengan transaksi yang akan dihapus (panggil sebelum item dihapus)."""
+    row = conn.execute("SELECT transaction_date, payment_method FROM transactions WHERE id = ?", (transaction_id,)).fetchone()
+    if row is None:
+        return
+    lines = conn.execute("SELECT product_id, quantity, price_per_unit, unit_cost FROM transaction_items WHERE transaction_id = ?", (transaction_id,)).fetchall()
+    _apply(conn, row[0][:10], row[1], lines, -1)
+
+
+def rebuild(conn):
+    """Membangun ulang seluruh rekap dari transactions/transaction_items.
+
+    Item lama yang belum punya unit_cost diisi dari product_costs saat ini, supaya
+    pembatalan berikutnya mengurangi angka yang sama dengan yang dijumlahkan di sini.
+    """
+    conn.execute("""
+        UPDATE transaction_items SET unit_cost = IFNULL((SELECT unit_cost FROM product_costs pc WHERE pc.product_id = transaction_items.product_id), 0)
+        WHERE unit_cost IS NULL
+    """)
+    conn.execute("DELETE FROM daily_sales")
+    conn.execute("DELETE FROM daily_product_sales")
+    conn.execute("""
+        INSERT INTO daily_sales (day, payment_method, revenue, tx_count, items_qty, cogs)
+        SELECT substr(t.transaction_date, 1, 10), t.payment_method,
+               SUM(IFNULL(i.revenue, 0)), COUNT(*), SUM(IFNULL(i.qty, 0)), SUM(IFNULL(i.cogs, 0))
+        FROM transactions t
+        LEFT JOIN (
+            SELECT transaction_id, SUM(quantity) AS qty, SUM(quantity * price_per_unit) AS revenue, SUM(quantity * unit_cost) AS cogs
+            FROM transaction_items GROUP BY transaction_id
+        ) i ON i.transaction_id = t.id
+        GROUP BY 1, 2
+    """)
+    conn.execute("""
+        INSERT INTO daily_product_sales (day, product_id, qty, revenue, cogs)
+        SELECT substr(t.transaction_date, 1, 10), ti.product_id,
+               SUM(ti.quantity), SUM(ti.quantity * ti.price_per_unit), SUM(ti.quantity * ti.unit_cost)
+        FROM transaction_items ti JOIN transactions t ON t.id = ti.transaction_id
+        GROUP BY 1, 2
+    """)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("backfill", help="bangun ulang daily_sales & daily_product_sales dari transaksi")
+    p.add_argument("db_path", nargs="?", default=db.DB)
+    args = parser.parse_args()
+
+    import migrations
+    pool = db.ConnectionPool(args.db_path)
+    migrations.ensure_schema(pool)
+    started = time.perf_counter()
+    with pool.transaction() as conn:
+        rebuild(conn)
+        days = conn.execute("SELECT COUNT(DISTINCT day) FROM daily_sales").fetchone()[0]
+    print(f"Rekap {days} hari dibangun ulang dalam {time.perf_counter() - started:.2f} detik.")
+
+
+if __name__ == "__main__":
+    main()
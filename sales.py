@@ -0,0 +1,103 @@
+"""Mesin penjualan: satu transaksi, satu koneksi, penulisan batch."""
+from datetime import datetime
+
+import accounting
+import catalog as catalogs
+import db
+import rollups
+import stock
+
+# Metode bayar -> peran akun kas/bank yang didebit (lihat accounting.ACCOUNT_ROLES)
+PAYMENT_ACCOUNTS = {'Cash': 'cash', 'Qris': 'bank', 'Card': 'bank'}
+
+
+def _resolve_cart(catalog, cart):
+    """Mengubah {nama_produk: qty} menjadi [(product_id, qty, price)] dari cache katalog."""
+    missing = [name for name in cart if name not in catalog.id_by_name]
+    if missing:
+        raise ValueError(f"Produk tidak ditemukan: {', '.join(missing)}")
+    resolved = []
+    for name, qty in cart.items():
+        product_id = catalog.id_by_name[name]
+        resolved.append((product_id, qty, catalog.price(product_id)))
+    return resolved
+
+
+def _check_stock(conn, needs):
+    """Satu query stok untuk bahan yang dibutuhkan saja; melempar ValueError bila kurang."""
+    if not needs:
+        return
+    placeholders = ",".join("?" * len(needs))
+    insufficient_items = []
+    for ingredient_id, name, stock in conn.execute(f"SELECT id, name, stock FROM ingredients WHERE id IN ({placeholders})", list(needs)):
+        if (stock or 0) < needs[ingredient_id]:
+            insufficient_items.append(f"{name} (butuh {needs[ingredient_id]:,.2f}, sisa {stock or 0:,.2f})")
+    if insufficient_items: raise ValueError(f"Stok tidak cukup: {', '.join(insufficient_items)}")
+
+
+def record_sale(conn, catalog, accounts, cart, payment_method, employee_id, sold_at=None):
+    """Mencatat penjualan di dalam transaksi milik pemanggil; mengembalikan (transaction_id, total).
+
+    Melempar ValueError bila stok tidak cukup atau jurnal gagal dibuat, sehingga
+    pemanggil cukup me-rollback satu transaksi.
+    """
+    if not cart:
+        raise ValueError("Keranjang kosong.")
+    sold_at = sold_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # Harga, resep dan HPP dari cache katalog; yang dibaca dari SQLite hanya stok bahan terkait
+    resolved = _resolve_cart(catalog, cart)
+    needs = catalog.ingredient_needs((product_id, qty) for product_id, qty, _ in resolved)
+    _check_stock(conn, needs)
+
+    total_amount = sum(price * qty for _, qty, price in resolved)
+    total_modal_sale = sum(catalog.unit_cost(product_id) * qty for product_id, qty, _ in resolved)
+
+    c = conn.execute("INSERT INTO transactions (transaction_date, total_amount, payment_method, employee_id) VALUES (?, ?, ?, ?)",
+                     (sold_at, total_amount, payment_method, employee_id))
+    transaction_id = c.lastrowid
+    lines = [(product_id, qty, price, catalog.unit_cost(product_id)) for product_id, qty, price in resolved]
+    conn.executemany("INSERT INTO transaction_items (transaction_id, product_id, quantity, price_per_unit, unit_cost) VALUES (?, ?, ?, ?, ?)",
+                     [(transaction_id, *line) for line in lines])
+    rollups.record(conn, sold_at, payment_method, lines)
+
+    # Satu mutasi `sale` per bahan; saldo ingredients.stock & snapshot harian diperbarui trigger
+    stock.record(conn, 'sale', {ingredient_id: -qty for ingredient_id, qty in needs.items()}, sold_at, transaction_id)
+
+    journal_entries = []
+    # Debit Kas/Bank, Kredit Pendapatan Penjualan
+    if payment_method in PAYMENT_ACCOUNTS:
+        journal_entries.append({'account_id': accounts.role(PAYMENT_ACCOUNTS[payment_method]), 'debit': total_amount})
+    journal_entries.append({'account_id': accounts.role('revenue'), 'kredit': total_amount})
+    # Jurnal HPP: Debit HPP, Kredit Persediaan Bahan Baku
+    if total_modal_sale > 0:
+        journal_entries.append({'account_id': accounts.role('cogs'), 'debit': total_modal_sale})
+        journal_entries.append({'account_id': accounts.role('inventory'), 'kredit': total_modal_sale})
+    try:
+        accounting.create_journal_entry(conn, sold_at, f"Penjualan Transaksi #{transaction_id}", journal_entries, transaction_id=transaction_id)
+    except ValueError as e:
+        raise ValueError(f"Gagal membuat jurnal penjualan: {e}") from e
+
+    return transaction_id, total_amount
+
+
+def process_sale(pool, cart, payment_method, employee_id, cash_received=0, sold_at=None):
+    """Penjualan atomik lengkap; mengembalikan (success, message, transaction_id, change)."""
+    try:
+        # Diulang dengan jeda bila database sedang dikunci kasir lain (lihat db.run_in_transaction)
+        transaction_id, total_amount = db.run_in_transaction(pool, record_sale, catalogs.get_catalog(pool), accounting.get_registry(pool),
+                                                             cart, payment_method, employee_id, sold_at)
+    except Exception as e:
+        return False, str(e), None, 0
+    db.checkpoint_if_needed(pool)
+    change = cash_received - total_amount if payment_method == 'Cash' and cash_received > 0 else 0
+    return True, "Pesanan berhasil diproses!", transaction_id, change
+
+
+def delete_sale(conn, transaction_id):
+    """Menghapus transaksi beserta item, jurnal dan rekap hariannya, lalu mengembalikan stok bahan (mutasi `void`)."""
+    stock.void_sale(conn, transaction_id)
+    rollups.unrecord(conn, transaction_id)
+    conn.execute("DELETE FROM transaction_items WHERE transaction_id=?", (transaction_id,))
+    conn.execute("DELETE FROM transactions WHERE id=?", (transaction_id,))
+    conn.execute("DELETE FROM journal_items WHERE journal_entry_id IN (SELECT id FROM journal_entries WHERE transaction_id = ?)", (transaction_id,))
+    conn.execute("DELETE FROM journal_entries WHERE transaction_id = ?", (transaction_id,))
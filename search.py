@@ -0,0 +1,132 @@
+"""Pencarian data master (produk, bahan, pengeluaran, pelanggan, pemasok, karyawan) dengan FTS5.
+
+Satu tabel FTS5 `search_index` (migrasi #9) diisi dan dijaga trigger di setiap tabel
+sumber; rowid = id * 8 + kode jenis, sehingga trigger menghapus/mengganti baris lewat
+rowid tanpa memindai indeks. Setiap kata yang diketik dicocokkan sebagai awalan
+("lat" -> Latte) dan hasil diurutkan dengan bm25. Hanya bila tidak ada hasil sama sekali,
+setiap kata dicocokkan ke kosakata indeks dengan jarak edit 1-2
+("capucino" -> cappuccino). Kosakata di-cache per versi (`app_meta.search_version`).
+
+    python search.py rebuild [path_db]   # isi ulang indeks dari tabel sumber
+"""
+import re
+import sys
+import threading
+from collections import namedtuple
+
+# jenis -> (kode rowid, tabel, kolom judul, ekspresi detail); trigger sinkronisasinya dibuat migrasi #9,
+# jadi menambah/mengubah sumber di sini juga butuh migrasi baru untuk triggernya
+SOURCES = {
+    'product': (1, 'products', 'name', "''"),
+    'ingredient': (2, 'ingredients', 'name', "IFNULL({row}.unit, '')"),
+    'expense': (3, 'expenses', 'description', "IFNULL({row}.category, '') || ' ' || IFNULL({row}.date, '')"),
+    'customer': (4, 'customers', 'name', "IFNULL({row}.phone, '') || ' ' || IFNULL({row}.email, '') || ' ' || IFNULL({row}.address, '')"),
+    'supplier': (5, 'suppliers', 'name', "IFNULL({row}.phone, '') || ' ' || IFNULL({row}.email, '') || ' ' || IFNULL({row}.address, '')"),
+    'employee': (6, 'employees', 'name', "IFNULL({row}.role, '')"),
+}
+KIND_OF_CODE = {code: kind for kind, (code, *_) in SOURCES.items()}
+ROWID_STRIDE = 8
+MIN_FUZZY_LENGTH = 4
+
+Hit = namedtuple("Hit", "kind id title detail")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_vocabularies = {}
+_lock = threading.Lock()
+
+
+def rebuild(conn):
+    """Mengisi ulang indeks dari semua tabel sumber; mengembalikan jumlah baris."""
+    conn.execute("DELETE FROM search_index")
+    for kind, (code, table, title, detail) in SOURCES.items():
+        conn.execute(f"INSERT INTO search_index (rowid, title, detail) SELECT id * {ROWID_STRIDE} + {code}, {title}, {detail.format(row=table)} FROM {table}")
+    conn.execute("UPDATE app_meta SET value = value + 1 WHERE key = 'search_version'")
+    conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+    return conn.execute("SELECT COUNT(*) FROM search_index").fetchone()[0]
+
+
+def tokens(term):
+    return [token.lower() for token in _TOKEN.findall(term or "")]
+
+
+def _within(a, b, limit):
+    """True bila jarak edit Levenshtein a-b <= limit (DP dengan penghentian dini)."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+def _vocabulary(conn):
+    version = conn.execute("SELECT value FROM app_meta WHERE key = 'search_version'").fetchone()[0]
+    key = conn.execute("PRAGMA database_list").fetchone()[2]
+    cached = _vocabularies.get(key)
+    if cached is None or cached[0] != version:
+        with _lock:
+            cached = _vocabularies[key] = (version, [term for (term,) in conn.execute("SELECT term FROM search_vocab")])
+    return cached[1]
+
+
+def _similar_terms(vocabulary, token):
+    """Kata di kosakata yang mirip `token`: jarak edit ke kata utuh atau ke awalannya sepanjang token."""
+    limit = 1 if len(token) <= 5 else 2
+    return [term for term in vocabulary
+            if term != token and (_within(token, term, limit) or (len(term) > len(token) and _within(token, term[:len(token)], limit)))]
+
+
+def _match_expression(groups):
+    # Setiap kelompok = alternatif untuk satu kata yang diketik; antar kelompok AND
+    return " AND ".join("(" + " OR ".join(f'"{term}"*' for term in group) + ")" for group in groups)
+
+
+def _query(conn, expression, codes, limit):
+    where = "search_index MATCH ?"
+    params = [expression]
+    if codes:
+        where += f" AND rowid % {ROWID_STRIDE} IN ({','.join('?' * len(codes))})"
+        params += codes
+    rows = conn.execute(f"""
+        SELECT rowid, title, detail FROM search_index WHERE {where}
+        ORDER BY bm25(search_index, 10.0, 1.0) LIMIT ?
+    """, (*params, limit)).fetchall()
+    return [Hit(KIND_OF_CODE[rowid % ROWID_STRIDE], rowid // ROWID_STRIDE, title, detail) for rowid, title, detail in rows]
+
+
+def search(conn, term, kinds=None, limit=10, fuzzy=True):
+    """Hasil teratas untuk `term` ([Hit]), opsional hanya jenis tertentu ('product', 'ingredient', ...)."""
+    words = tokens(term)
+    if not words:
+        return []
+    codes = [SOURCES[kind][0] for kind in kinds] if kinds else []
+    hits = _query(conn, _match_expression([[word] for word in words]), codes, limit)
+    if hits or not fuzzy or not any(len(word) >= MIN_FUZZY_LENGTH for word in words):
+        return hits
+    vocabulary = _vocabulary(conn)
+    groups = [[word] + (_similar_terms(vocabulary, word) if len(word) >= MIN_FUZZY_LENGTH else []) for word in words]
+    if all(len(group) == 1 for group in groups):
+        return hits
+    return _query(conn, _match_expression(groups), codes, limit)
+
+
+def ids(conn, term, kind, limit=50):
+    """Id baris jenis `kind` yang cocok, urut relevansi."""
+    return [hit.id for hit in search(conn, term, [kind], limit)]
+
+
+if __name__ == "__main__":
+    import db
+    import migrations
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        raise SystemExit("Pemakaian: python search.py rebuild [path_db]")
+    pool = db.ConnectionPool(sys.argv[2] if len(sys.argv) > 2 else db.DB)
+    migrations.ensure_schema(pool)
+    with pool.transaction() as conn:
+        print(f"{rebuild(conn):,} baris diindeks.")
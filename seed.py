@@ -0,0 +1,268 @@
+"""Generator data sintetis realistis untuk skema aplikasi yang sebenarnya (migrations.py).
+
+    python seed.py -o pos_2th.db --items 500000 --days 730
+    python seed.py -o pos_besar.db --items 5000000 --force
+
+Isi: bagan akun standar, menu awal (catalog.INITIAL_PRODUCTS) dengan bahan & resep
+sesuai nama menu, karyawan dengan absensi per shift, transaksi penjualan dengan
+jam ramai dan produk favorit, pengeluaran bulanan, serta jurnal yang sama dengan
+yang ditulis sales.record_sale dan halaman Pengeluaran. `--items` adalah jumlah
+baris transaction_items (10 ribu s/d 5 juta). Rekap harian dan snapshot saldo
+dibangun di akhir, lalu ANALYZE.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import accounting
+import catalog as catalogs
+import db
+import migrations
+import rollups
+import stock
+import sales
+
+FLUSH_ITEMS = 50_000
+
+# (nama, satuan, berat kemasan, harga kemasan)
+INGREDIENTS = [
+    ("Biji Kopi Arabika", "gr", 1000, 180000), ("Susu UHT", "ml", 1000, 19000), ("Susu Kental Manis", "gr", 490, 13000),
+    ("Gula Aren Cair", "ml", 1000, 45000), ("Gula Pasir", "gr", 1000, 16000), ("Es Batu", "gr", 5000, 10000),
+    ("Cup Plastik 16oz", "pcs", 50, 32500), ("Sirup Caramel", "ml", 750, 95000), ("Sirup Vanilla", "ml", 750, 95000),
+    ("Sirup Hazelnut", "ml", 750, 95000), ("Sirup Butterscotch", "ml", 750, 95000), ("Sirup Tiramisu", "ml", 750, 95000),
+    ("Sirup Buah", "ml", 1000, 65000), ("Sirup Bubblegum", "ml", 750, 90000), ("Bubuk Coklat", "gr", 1000, 110000),
+    ("Bubuk Taro", "gr", 1000, 120000), ("Bubuk Matcha", "gr", 500, 150000), ("Bubuk Thai Tea", "gr", 500, 60000),
+    ("Teh Celup", "pcs", 100, 25000), ("Air Soda", "ml", 1500, 15000), ("Lemon", "pcs", 10, 20000),
+    ("Jeruk", "pcs", 10, 25000), ("Leci Kaleng", "gr", 565, 35000), ("Beras", "gr", 5000, 75000),
+    ("Telur", "pcs", 30, 55000), ("Ayam Fillet", "gr", 1000, 60000), ("Mie Telur", "gr", 1000, 30000),
+    ("Bihun", "gr", 500, 12000), ("Bumbu Dasar", "gr", 1000, 40000), ("Minyak Goreng", "ml", 2000, 36000),
+    ("Roti Tawar", "pcs", 20, 18000), ("Roti Burger", "pcs", 6, 15000), ("Keju Slice", "pcs", 10, 32000),
+    ("Selai", "gr", 1000, 55000), ("Mentega", "gr", 1000, 60000), ("Kentang Beku", "gr", 1000, 42000),
+    ("Nugget Beku", "gr", 1000, 55000), ("Sosis Beku", "gr", 1000, 50000), ("Tahu Tempe", "pcs", 20, 20000),
+    ("Sambal", "gr", 1000, 35000), ("Yakult", "pcs", 5, 10000), ("Air Mineral Botol", "pcs", 24, 60000),
+    ("Air Mineral Gelas", "pcs", 48, 20000),
+]
+
+# Kata kunci pada nama menu -> [(bahan, takaran)]; semua aturan yang cocok digabung
+RECIPE_RULES = [
+    (("Espresso", "Americano", "Latte", "Cappuccino", "Coffee", "Cocof", "Double Shoot"), [("Biji Kopi Arabika", 18)]),
+    (("Latte", "Cappuccino", "Susu", "Milk", "Cocof", "Bear"), [("Susu UHT", 150)]),
+    (("Spanish", "Cocof", "Susu", "Bear"), [("Susu Kental Manis", 25)]),
+    (("Gula Aren", "Cocof"), [("Gula Aren Cair", 25)]),
+    (("Caramel",), [("Sirup Caramel", 20)]), (("Vanilla",), [("Sirup Vanilla", 20)]),
+    (("Hazelnut",), [("Sirup Hazelnut", 20)]), (("Butterscotch",), [("Sirup Butterscotch", 20)]),
+    (("Tiramisu",), [("Sirup Tiramisu", 20)]), (("Bubblegum",), [("Sirup Bubblegum", 20)]),
+    (("Markisa", "Raspberry", "Strawberry", "Manggo", "Melon", "Blueberry", "Grenadine", "Banana", "Bluesky", "Blue"), [("Sirup Buah", 25)]),
+    (("Mocca", "Coklat", "Chocolate"), [("Bubuk Coklat", 20)]), (("Taro",), [("Bubuk Taro", 25)]),
+    (("Matcha", "Green Tea"), [("Bubuk Matcha", 10)]), (("Thai Tea",), [("Bubuk Thai Tea", 20)]),
+    (("Lemon Tea", "Lychee Tea", "Milk Tea"), [("Teh Celup", 1), ("Gula Pasir", 15)]),
+    (("Soda",), [("Air Soda", 150)]), (("Lemon",), [("Lemon", 0.5)]), (("Orange",), [("Jeruk", 1)]),
+    (("Lychee",), [("Leci Kaleng", 40)]),
+    (("Latte", "Coffee", "Americano", "Cappuccino", "Tea", "Susu", "Soda", "Cocof", "Sky"), [("Es Batu", 150), ("Cup Plastik 16oz", 1)]),
+    (("Nasi",), [("Beras", 120)]), (("Nasi Goreng", "Mie Goreng", "Bihun"), [("Bumbu Dasar", 20), ("Minyak Goreng", 15), ("Telur", 1)]),
+    (("Ayam",), [("Ayam Fillet", 100)]), (("Mie",), [("Mie Telur", 80)]), (("Bihun",), [("Bihun", 70)]),
+    (("Sambal", "Penyet"), [("Sambal", 30)]), (("Burger",), [("Roti Burger", 1), ("Mentega", 5)]),
+    (("Burger Telur", "+ Telur"), [("Telur", 1)]), (("Keju",), [("Keju Slice", 1)]),
+    (("Roti Bakar",), [("Roti Tawar", 3), ("Mentega", 10), ("Selai", 30)]),
+    (("Kentang", "Platter"), [("Kentang Beku", 150), ("Minyak Goreng", 20)]),
+    (("Nugget", "Platter"), [("Nugget Beku", 120), ("Minyak Goreng", 15)]),
+    (("Sosis", "Platter"), [("Sosis Beku", 120)]), (("Tahu/Tempe",), [("Tahu Tempe", 2), ("Minyak Goreng", 10)]),
+    (("Yakult",), [("Yakult", 1)]), (("Mineral Water Gelas",), [("Air Mineral Gelas", 1)]),
+    (("Mineral Water", "Le Mineralle"), [("Air Mineral Botol", 1)]),
+]
+
+# (nama, peran, gaji, periode)
+EMPLOYEES = [
+    ("Ayu", "Operator", 15000, "Per Jam"), ("Budi", "Operator", 15000, "Per Jam"), ("Citra", "Operator", 110000, "Per Hari"),
+    ("Dimas", "Operator", 110000, "Per Hari"), ("Eka", "Operator", 3200000, "Per Bulan"), ("Fajar", "Operator", 15000, "Per Jam"),
+    ("Gita", "Operator", 110000, "Per Hari"), ("Hendra", "Admin", 4500000, "Per Bulan"),
+]
+
+# Jam buka 08-22; bobot jumlah transaksi per jam (ramai saat makan siang & sore)
+HOUR_WEIGHTS = [2, 3, 4, 6, 9, 8, 5, 4, 6, 9, 10, 9, 6, 3]
+WEEKDAY_WEIGHTS = [0.85, 0.8, 0.85, 0.9, 1.1, 1.35, 1.25]
+PAYMENT_METHODS, PAYMENT_WEIGHTS = ["Cash", "Qris", "Card"], [50, 42, 8]
+# Pengeluaran rutin: (hari ke-, kategori, deskripsi, akun, jumlah, metode)
+MONTHLY_EXPENSES = [
+    (1, "Operasional", "Sewa tempat", "Beban Sewa", 3500000, "Transfer"),
+    (5, "Operasional", "Listrik & air", "Beban Listrik & Air", 1250000, "Transfer"),
+    (15, "Lainnya", "Perawatan mesin kopi", "Beban Lain-lain", 350000, "Cash"),
+]
+
+
+def recipe_for(product_name):
+    """[(bahan, takaran)] untuk satu menu berdasarkan kata kunci namanya."""
+    recipe = {}
+    for keywords, lines in RECIPE_RULES:
+        if any(keyword in product_name for keyword in keywords):
+            for ingredient, qty in lines:
+                recipe.setdefault(ingredient, qty)
+    return list(recipe.items())
+
+
+def seed_catalog(conn):
+    """Akun, karyawan, bahan, menu dan resep; mengembalikan id karyawan."""
+    conn.executemany("INSERT INTO accounts (account_code, account_name, account_type, normal_balance) VALUES (?, ?, ?, ?)", accounting.INITIAL_ACCOUNTS)
+    conn.executemany("INSERT INTO employees (name, role, wage_amount, wage_period, is_active) VALUES (?, ?, ?, ?, 1)", EMPLOYEES)
+    conn.executemany("INSERT INTO ingredients (name, unit, cost_per_unit, stock, pack_weight, pack_price) VALUES (?, ?, ?, ?, ?, ?)",
+                     [(name, unit, pack_price / pack_weight, pack_weight * 5, pack_weight, pack_price) for name, unit, pack_weight, pack_price in INGREDIENTS])
+    conn.executemany("INSERT INTO products (name, price) VALUES (?, ?)", catalogs.INITIAL_PRODUCTS)
+    conn.executemany("""
+        INSERT INTO recipes (product_id, ingredient_id, qty_per_unit)
+        VALUES ((SELECT id FROM products WHERE name = ?), (SELECT id FROM ingredients WHERE name = ?), ?)
+    """, [(product, ingredient, qty) for product, _ in catalogs.INITIAL_PRODUCTS for ingredient, qty in recipe_for(product)])
+    return [employee_id for (employee_id,) in conn.execute("SELECT id FROM employees ORDER BY id")]
+
+
+class _Batch:
+    """Penampung baris per tabel yang ditulis per FLUSH_ITEMS item dalam satu transaksi."""
+
+    TABLES = {
+        'transactions': "INSERT INTO transactions (id, transaction_date, total_amount, payment_method, employee_id) VALUES (?, ?, ?, ?, ?)",
+        'transaction_items': "INSERT INTO transaction_items (transaction_id, product_id, quantity, price_per_unit, unit_cost) VALUES (?, ?, ?, ?, ?)",
+        'expenses': "INSERT INTO expenses (id, date, category, description, amount, payment_method, account_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        'journal_entries': "INSERT INTO journal_entries (id, entry_date, description, transaction_id, expense_id) VALUES (?, ?, ?, ?, ?)",
+        'journal_items': "INSERT INTO journal_items (journal_entry_id, account_id, debit, kredit) VALUES (?, ?, ?, ?)",
+        'attendance': "INSERT INTO attendance (employee_id, check_in, check_out) VALUES (?, ?, ?)",
+    }
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.rows = {table: [] for table in self.TABLES}
+        self.written = dict.fromkeys(self.TABLES, 0)
+
+    def flush(self):
+        with self.pool.transaction() as conn:
+            for table, query in self.TABLES.items():
+                conn.executemany(query, self.rows[table])
+                self.written[table] += len(self.rows[table])
+                self.rows[table].clear()
+
+
+def _timestamp(day, rng, hour_cum):
+    hour = 8 + rng.choices(range(len(HOUR_WEIGHTS)), cum_weights=hour_cum)[0]
+    return datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60))
+
+
+def seed(path, items=100_000, days=730, end=None, seed=2024, progress=print):
+    """Membuat database `path` (harus belum ada) berisi ±`items` baris item penjualan selama `days` hari sampai `end`."""
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    pool = db.ConnectionPool(path)
+    migrations.ensure_schema(pool)
+    with pool.transaction() as conn:
+        employee_ids = seed_catalog(conn)
+        unit_costs = dict(conn.execute("SELECT product_id, unit_cost FROM product_costs"))
+        products = conn.execute("SELECT id, price FROM products ORDER BY id").fetchall()
+    registry = accounting.get_registry(pool)
+    cashier_ids = employee_ids[:-1]
+
+    # Popularitas menu mengikuti distribusi Zipf atas urutan acak
+    ranked = products[:]
+    rng.shuffle(ranked)
+    product_cum, total = [], 0.0
+    for rank in range(len(ranked)):
+        total += 1.0 / (rank + 1) ** 0.9
+        product_cum.append(total)
+    hour_cum = [sum(HOUR_WEIGHTS[:i + 1]) for i in range(len(HOUR_WEIGHTS))]
+    day_weights = [WEEKDAY_WEIGHTS[(start + timedelta(days=i)).weekday()] for i in range(days)]
+    lines_per_tx = 2.3  # rata-rata baris per transaksi setelah produk kembar digabung
+    tx_per_weight = items / lines_per_tx / sum(day_weights)
+
+    batch = _Batch(pool)
+    tx_id = entry_id = expense_id = 0
+    item_count, started = 0, time.perf_counter()
+    expense_accounts = {name: registry.id_of(name) for _, _, _, name, _, _ in MONTHLY_EXPENSES}
+    expense_accounts['Persediaan Bahan Baku'] = registry.role('inventory')
+
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        n_tx = max(1, round(rng.gauss(tx_per_weight * day_weights[offset], tx_per_weight * day_weights[offset] * 0.12)))
+        for sold_at in sorted(_timestamp(day, rng, hour_cum) for _ in range(n_tx)):
+            tx_id += 1
+            entry_id += 1
+            sold_at = sold_at.strftime("%Y-%m-%d %H:%M:%S")
+            n_lines = rng.choices((1, 2, 3, 4), (25, 30, 25, 20))[0]
+            chosen = {ranked[i][0]: ranked[i][1] for i in (rng.choices(range(len(ranked)), cum_weights=product_cum, k=n_lines))}
+            total_amount = cost = 0.0
+            for product_id, price in chosen.items():
+                qty = rng.choices((1, 2, 3), (70, 22, 8))[0]
+                unit_cost = unit_costs.get(product_id, 0.0)
+                batch.rows['transaction_items'].append((tx_id, product_id, qty, price, unit_cost))
+                total_amount += qty * price
+                cost += qty * unit_cost
+            item_count += len(chosen)
+            payment_method = rng.choices(PAYMENT_METHODS, PAYMENT_WEIGHTS)[0]
+            batch.rows['transactions'].append((tx_id, sold_at, total_amount, payment_method, rng.choice(cashier_ids)))
+            # Jurnal sama dengan sales.record_sale
+            batch.rows['journal_entries'].append((entry_id, sold_at, f"Penjualan Transaksi #{tx_id}", tx_id, None))
+            batch.rows['journal_items'] += [(entry_id, registry.role(sales.PAYMENT_ACCOUNTS[payment_method]), total_amount, 0),
+                                            (entry_id, registry.role('revenue'), 0, total_amount)]
+            if cost > 0:
+                batch.rows['journal_items'] += [(entry_id, registry.role('cogs'), cost, 0), (entry_id, registry.role('inventory'), 0, cost)]
+
+        # Dua shift per hari; karyawan bergilir, hari terakhir shift sore belum check-out
+        on_duty = rng.sample(cashier_ids, 3)
+        for employee_id, (shift_start, shift_hours) in zip(on_duty, ((7.5, 8), (13.5, 8.5), (10, 6))):
+            check_in = datetime.combine(day, datetime.min.time()) + timedelta(hours=shift_start, minutes=rng.randint(-10, 15))
+            check_out = check_in + timedelta(hours=shift_hours, minutes=rng.randint(-20, 40))
+            still_open = offset == days - 1 and shift_start > 12
+            batch.rows['attendance'].append((employee_id, check_in.strftime("%Y-%m-%d %H:%M:%S"), None if still_open else check_out.strftime("%Y-%m-%d %H:%M:%S")))
+
+        # Pengeluaran rutin bulanan + belanja bahan mingguan, dengan jurnal seperti halaman Pengeluaran
+        expenses = [(category, description, account, amount, method) for day_of_month, category, description, account, amount, method in MONTHLY_EXPENSES
+                    if day.day == day_of_month]
+        if day.weekday() == 0:
+            expenses.append(("Operasional", "Belanja bahan baku", "Persediaan Bahan Baku", round(rng.uniform(1.5e6, 3e6), -3), "Cash"))
+        for category, description, account, amount, method in expenses:
+            expense_id += 1
+            entry_id += 1
+            batch.rows['expenses'].append((expense_id, day.isoformat(), category, description, amount, method, expense_accounts[account]))
+            batch.rows['journal_entries'].append((entry_id, day.isoformat(), f"Pengeluaran: {description}", None, expense_id))
+            batch.rows['journal_items'] += [(entry_id, expense_accounts[account], amount, 0),
+                                            (entry_id, registry.role('cash' if method == 'Cash' else 'bank'), 0, amount)]
+
+        if len(batch.rows['transaction_items']) >= FLUSH_ITEMS:
+            batch.flush()
+            progress(f"  {day.isoformat()}: {item_count:,} item, {time.perf_counter() - started:.0f} s")
+    batch.flush()
+
+    with pool.transaction() as conn:
+        rollups.rebuild(conn)
+        # Buku mutasi stok dari penjualan di atas; stok bahan hasil seed menjadi saldo akhir
+        stock.reset_ledger_from_sales(conn)
+        accounting.ensure_snapshots(conn, end)
+    with pool.connection() as conn:
+        conn.execute("ANALYZE")
+    db.checkpoint(pool, "TRUNCATE")
+    pool.close()
+    return batch.written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", required=True, help="file database baru")
+    parser.add_argument("--items", type=int, default=100_000, help="jumlah baris item penjualan (10000 - 5000000)")
+    parser.add_argument("--days", type=int, default=730, help="rentang hari sampai --end")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="tanggal terakhir (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--force", action="store_true", help="timpa file yang sudah ada")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        if not args.force:
+            raise SystemExit(f"{args.output} sudah ada; pakai --force untuk menimpanya.")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.output + suffix):
+                os.remove(args.output + suffix)
+    started = time.perf_counter()
+    written = seed(args.output, args.items, args.days, args.end, args.seed)
+    print(", ".join(f"{count:,} {table}" for table, count in written.items()))
+    print(f"{args.output}: {os.path.getsize(args.output) / 1e6:,.1f} MB dalam {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Buku mutasi stok bahan (`stock_movements`) dengan saldo & snapshot harian yang dijaga trigger.
+
+Setiap perubahan stok dicatat sebagai baris mutasi yang tidak pernah diubah atau dihapus:
+penjualan (`sale`, negatif), pembatalan (`void`), penerimaan barang (`receipt`), penyesuaian
+hasil hitung fisik (`adjustment`) dan bahan terbuang (`waste`, negatif). Trigger migrasi #10
+meneruskan setiap mutasi ke saldo berjalan `ingredients.stock` (dibaca kasir, tidak lagi
+ditulis langsung) dan ke `stock_snapshots`, saldo penutupan per bahan per hari yang punya
+mutasi. "Stok per tanggal X" cukup satu lookup indeks per bahan; laporan pemakaian bahan
+adalah range scan di indeks `moved_at`.
+
+    python stock.py rebuild [path_db]            # susun ulang snapshot harian dari mutasi (mutasi tidak disentuh)
+    python stock.py check [path_db]              # cocokkan ingredients.stock, jumlah mutasi dan snapshot terakhir
+    python stock.py reset-from-sales [path_db]   # HAPUS semua mutasi lalu susun dari penjualan (minta konfirmasi)
+"""
+import sys
+from datetime import datetime, timedelta
+
+import db
+
+KINDS = {
+    'sale': "Penjualan",
+    'void': "Pembatalan",
+    'receipt': "Penerimaan",
+    'adjustment': "Penyesuaian",
+    'waste': "Terbuang",
+}
+
+_INSERT_MOVEMENT = "INSERT INTO stock_movements (ingredient_id, moved_at, kind, qty, transaction_id, note) VALUES (?, ?, ?, ?, ?, ?)"
+_TRIGGERS = ("trg_stock_movements_insert_balance",)  # tabel, indeks & trigger dibuat migrasi #10
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def record(conn, kind, quantities, moved_at=None, transaction_id=None, note=None):
+    """Mencatat mutasi {ingredient_id: qty bertanda} dalam satu executemany; saldo & snapshot ikut lewat trigger."""
+    moved_at = moved_at or _now()
+    conn.executemany(_INSERT_MOVEMENT, [(ingredient_id, moved_at, kind, qty, transaction_id, note)
+                                        for ingredient_id, qty in quantities.items() if qty])
+
+
+def set_levels(conn, levels, note="Penyesuaian stok", moved_at=None):
+    """Menyamakan stok ke angka hitung fisik {ingredient_id: stok}; selisihnya dicatat sebagai `adjustment`."""
+    if not levels:
+        return {}
+    placeholders = ",".join("?" * len(levels))
+    current = dict(conn.execute(f"SELECT id, IFNULL(stock, 0) FROM ingredients WHERE id IN ({placeholders})", list(levels)))
+    differences = {ingredient_id: level - current[ingredient_id] for ingredient_id, level in levels.items()
+                   if ingredient_id in current and abs(level - current[ingredient_id]) > 1e-9}
+    record(conn, 'adjustment', differences, moved_at, note=note)
+    return differences
+
+
+def void_sale(conn, transaction_id, moved_at=None):
+    """Mengembalikan bahan sebanyak yang benar-benar diambil penjualan itu (mutasi `void`)."""
+    conn.execute("""
+        INSERT INTO stock_movements (ingredient_id, moved_at, kind, qty, transaction_id, note)
+        SELECT ingredient_id, ?, 'void', -SUM(qty), transaction_id, 'Pembatalan transaksi #' || transaction_id
+        FROM stock_movements WHERE transaction_id = ? AND kind IN ('sale', 'void')
+        GROUP BY ingredient_id HAVING ABS(SUM(qty)) > 1e-9
+    """, (moved_at or _now(), transaction_id))
+
+
+def balances_as_of(conn, day):
+    """[(ingredient_id, nama, unit, stok)] di akhir hari `day` (date); satu lookup snapshot per bahan."""
+    return conn.execute("""
+        SELECT i.id, i.name, i.unit, IFNULL((
+            SELECT s.qty FROM stock_snapshots s WHERE s.ingredient_id = i.id AND s.day <= ? ORDER BY s.day DESC LIMIT 1), 0)
+        FROM ingredients i ORDER BY i.name
+    """, (day.isoformat(),)).fetchall()
+
+
+def consumption(conn, start, end):
+    """[(ingredient_id, nama, unit, {jenis: qty})] mutasi per jenis untuk start <= tanggal <= end."""
+    rows = conn.execute("""
+        SELECT m.ingredient_id, i.name, i.unit, m.kind, SUM(m.qty)
+        FROM stock_movements m JOIN ingredients i ON i.id = m.ingredient_id
+        WHERE m.moved_at >= ? AND m.moved_at < ?
+        GROUP BY m.ingredient_id, m.kind ORDER BY i.name
+    """, (start.isoformat(), (end + timedelta(days=1)).isoformat())).fetchall()
+    report = {}
+    for ingredient_id, name, unit, kind, qty in rows:
+        report.setdefault(ingredient_id, (ingredient_id, name, unit, {}))[3][kind] = qty
+    return list(report.values())
+
+
+def movements(conn, ingredient_id, limit=100):
+    """Mutasi terbaru satu bahan: [(waktu, jenis, qty, transaction_id, catatan)]."""
+    return conn.execute("""
+        SELECT moved_at, kind, qty, transaction_id, note FROM stock_movements
+        WHERE ingredient_id = ? ORDER BY moved_at DESC, id DESC LIMIT ?
+    """, (ingredient_id, limit)).fetchall()
+
+
+def rebuild_snapshots(conn):
+    """Menyusun ulang seluruh snapshot harian dari mutasi (jumlah kumulatif per bahan per hari)."""
+    conn.execute("DELETE FROM stock_snapshots")
+    conn.execute("""
+        INSERT INTO stock_snapshots (ingredient_id, day, qty)
+        SELECT ingredient_id, day, SUM(qty) OVER (PARTITION BY ingredient_id ORDER BY day)
+        FROM (SELECT ingredient_id, substr(moved_at, 1, 10) AS day, SUM(qty) AS qty FROM stock_movements GROUP BY 1, 2)
+    """)
+
+
+def reset_ledger_from_sales(conn):
+    """MENGHAPUS seluruh buku mutasi lalu menyusunnya dari riwayat penjualan; stok saat ini tidak berubah.
+
+    Penerimaan, bahan terbuang, penyesuaian dan pembatalan yang sudah tercatat hilang, jadi
+    hanya untuk data yang baru dibuat di luar aplikasi (seed.py, fixture bench.py).
+    Penjualan menjadi mutasi `sale` (resep saat ini x jumlah terjual), didahului satu
+    `adjustment` saldo awal per bahan = stok saat ini + total pemakaian, bertanggal hari
+    transaksi pertama. Trigger saldo dilepas selama penyusunan lalu dipasang kembali.
+    """
+    # Definisi trigger diambil dari skema (migrasi #10) supaya dipasang kembali persis sama
+    triggers = [sql for (sql,) in conn.execute(
+        f"SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({','.join('?' * len(_TRIGGERS))})", _TRIGGERS)]
+    for trigger in _TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DELETE FROM stock_movements")
+    first_sale = conn.execute("SELECT MIN(transaction_date) FROM transactions").fetchone()[0]
+    opening_at = f"{first_sale[:10]} 00:00:00" if first_sale else _now()
+    conn.execute("""
+        CREATE TEMP TABLE stock_rebuild_sales AS
+        SELECT t.id AS transaction_id, t.transaction_date AS moved_at, r.ingredient_id, -SUM(r.qty_per_unit * ti.quantity) AS qty
+        FROM transactions t
+        JOIN transaction_items ti ON ti.transaction_id = t.id
+        JOIN recipes r ON r.product_id = ti.product_id
+        GROUP BY t.id, r.ingredient_id
+    """)
+    conn.execute("""
+        INSERT INTO stock_movements (ingredient_id, moved_at, kind, qty, note)
+        SELECT i.id, ?, 'adjustment', IFNULL(i.stock, 0) - IFNULL(used.qty, 0), 'Saldo awal (disusun dari riwayat penjualan)'
+        FROM ingredients i LEFT JOIN (SELECT ingredient_id, SUM(qty) AS qty FROM stock_rebuild_sales GROUP BY ingredient_id) used
+            ON used.ingredient_id = i.id
+    """, (opening_at,))
+    conn.execute("""
+        INSERT INTO stock_movements (ingredient_id, moved_at, kind, qty, transaction_id)
+        SELECT ingredient_id, moved_at, 'sale', qty, transaction_id FROM stock_rebuild_sales ORDER BY moved_at, transaction_id
+    """)
+    conn.execute("DROP TABLE stock_rebuild_sales")
+    rebuild_snapshots(conn)
+    for sql in triggers:
+        conn.execute(sql)
+    return conn.execute("SELECT COUNT(*) FROM stock_movements").fetchone()[0]
+
+
+def check(conn):
+    """[(bahan, stok, jumlah mutasi, snapshot terakhir)] untuk bahan yang ketiganya tidak sama."""
+    return [row for row in conn.execute("""
+        SELECT i.name, IFNULL(i.stock, 0),
+               IFNULL((SELECT SUM(qty) FROM stock_movements m WHERE m.ingredient_id = i.id), 0),
+               IFNULL((SELECT qty FROM stock_snapshots s WHERE s.ingredient_id = i.id ORDER BY day DESC LIMIT 1), 0)
+        FROM ingredients i ORDER BY i.name
+    """) if not _close(row[1], row[2]) or not _close(row[2], row[3])]
+
+
+def _close(a, b):
+    return abs(a - b) <= 1e-6 * max(1.0, abs(a), abs(b))
+
+
+if __name__ == "__main__":
+    import migrations
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ("rebuild", "check", "reset-from-sales"):
+        raise SystemExit("Pemakaian: python stock.py rebuild|check|reset-from-sales [path_db]")
+    path = sys.argv[2] if len(sys.argv) > 2 else db.DB
+    pool = db.ConnectionPool(path)
+    migrations.ensure_schema(pool)
+    if sys.argv[1] == "rebuild":
+        with pool.transaction() as conn:
+            rebuild_snapshots(conn)
+            print(f"{conn.execute('SELECT COUNT(*) FROM stock_snapshots').fetchone()[0]:,} snapshot harian disusun ulang.")
+    elif sys.argv[1] == "reset-from-sales":
+        print(f"Semua mutasi stok di {path} (penerimaan, terbuang, penyesuaian, pembatalan) akan DIHAPUS "
+              "dan disusun ulang dari riwayat penjualan dengan resep saat ini.")
+        if input("Ketik HAPUS untuk melanjutkan: ").strip() != "HAPUS":
+            raise SystemExit("Dibatalkan.")
+        with pool.transaction() as conn:
+            print(f"{reset_ledger_from_sales(conn):,} mutasi stok disusun ulang.")
+    else:
+        with pool.connection() as conn:
+            differences = check(conn)
+        for name, level, total, snapshot in differences:
+            print(f"{name}: stok {level:,.4f}, jumlah mutasi {total:,.4f}, snapshot terakhir {snapshot:,.4f}")
+        print(f"{len(differences)} bahan berbeda.")
+        if differences:
+            raise SystemExit(1)
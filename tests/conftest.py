@@ -0,0 +1,31 @@
+"""Fixture bersama: database hasil seed.py kecil, disalin per test supaya test yang menulis tidak saling mengganggu."""
+import os
+import shutil
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import seed  # noqa: E402
+
+SEED_END = date(2024, 3, 15)
+SEED_DAYS = 75  # 2024-01-01 .. 2024-03-15, melewati dua batas bulan
+
+
+@pytest.fixture(scope="session")
+def seeded_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("seed") / "seed.db")
+    seed.seed(path, items=4000, days=SEED_DAYS, end=SEED_END, seed=7, progress=lambda *_: None)
+    return path
+
+
+@pytest.fixture
+def pool(seeded_path, tmp_path):
+    path = str(tmp_path / "kasir.db")
+    shutil.copy(seeded_path, path)
+    pool = db.ConnectionPool(path)
+    yield pool
+    pool.close()
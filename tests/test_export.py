@@ -0,0 +1,50 @@
+"""CLI export.py: mode file hasil dan tidak ada file sementara yang tertinggal."""
+import gzip
+import os
+
+import pytest
+
+import export
+
+
+@pytest.fixture
+def out_dir(tmp_path):
+    path = tmp_path / "ekspor"  # terpisah dari file database fixture `pool`
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def umask_022():
+    previous = os.umask(0o022)
+    yield
+    os.umask(previous)
+
+
+def test_main_writes_readable_file(pool, out_dir, umask_022):
+    output = out_dir / "jurnal.csv.gz"
+    export.main(["journal_items", "--start", "2024-02-01", "--end", "2024-02-29", "-o", str(output), "--db", pool.path])
+    assert os.stat(output).st_mode & 0o777 == 0o644
+    with gzip.open(output, "rt") as f:
+        assert len(f.readlines()) > 1
+    assert [p.name for p in out_dir.iterdir()] == ["jurnal.csv.gz"]
+
+
+def test_main_keeps_mode_of_existing_file(pool, out_dir, umask_022):
+    output = out_dir / "transaksi.csv"
+    output.write_text("lama")
+    os.chmod(output, 0o640)
+    export.main(["transactions", "-o", str(output), "--db", pool.path])
+    assert os.stat(output).st_mode & 0o777 == 0o640
+    assert output.read_text() != "lama"
+
+
+def test_main_removes_temp_file_on_failure(pool, out_dir, monkeypatch):
+    def failing_write(pool, dataset, out, *args, **kwargs):
+        out.write(b"setengah,jadi\n")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(export, "write_csv", failing_write)
+    with pytest.raises(KeyboardInterrupt):
+        export.main(["transactions", "-o", str(out_dir / "transaksi.csv"), "--db", pool.path])
+    assert list(out_dir.iterdir()) == []
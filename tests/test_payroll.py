@@ -0,0 +1,102 @@
+"""payroll.compute harus sama dengan loop gaji per karyawan versi lama di halaman Laporan."""
+from datetime import date, datetime
+
+import pytest
+
+import db
+import migrations
+import payroll
+
+START, END = date(2024, 1, 1), date(2024, 1, 31)
+
+EMPLOYEES = [  # (id, nama, upah, periode, aktif)
+    (10, 'Jam', 15000, 'Per Jam', 1),
+    (11, 'Harian', 120000, 'Per Hari', 1),
+    (12, 'Bulanan', 3000000, 'Per Bulan', 1),
+    (13, 'Jam Terbuka', 20000, 'Per Jam', 1),
+    (14, 'Nonaktif', 15000, 'Per Jam', 0),
+    (15, 'Tanpa Absen', 120000, 'Per Hari', 1),
+    (16, 'Periode Lain', 50000, 'Per Minggu', 1),
+]
+ATTENDANCE = [  # (karyawan, check_in, check_out); None/'' = belum check-out
+    (10, '2023-12-31 23:00:00', '2024-01-01 03:00:00'),  # sebelum rentang
+    (10, '2024-01-01 00:00:00', '2024-01-01 08:30:00'),
+    (10, '2024-01-15 09:00:00', '2024-01-15 17:15:30'),
+    (10, '2024-01-31 23:59:59', '2024-02-01 04:00:00'),  # check-in di detik terakhir rentang
+    (10, '2024-02-01 00:00:00', '2024-02-01 08:00:00'),  # sesudah rentang
+    (11, '2024-01-02 08:00:00', '2024-01-02 12:00:00'),
+    (11, '2024-01-02 13:00:00', '2024-01-02 17:00:00'),  # dua shift di hari yang sama
+    (11, '2024-01-03 08:00:00', None),
+    (11, '2024-01-20 08:00:00', '2024-01-20 16:00:00'),
+    (12, '2024-01-05 08:00:00', '2024-01-05 16:00:00'),
+    (13, '2024-01-06 08:00:00', None),
+    (13, '2024-01-07 08:00:00', ''),
+    (13, '2024-01-08 08:00:00', '2024-01-08 10:45:00'),
+    (14, '2024-01-09 08:00:00', '2024-01-09 16:00:00'),
+    (16, '2024-01-10 08:00:00', '2024-01-10 16:00:00'),
+]
+
+
+def legacy_payroll(conn, start_date, end_date):
+    """Port loop lama (filter DataFrame per karyawan) tanpa pandas: {employee_id: gaji}.
+
+    NaT dari check_out kosong tidak ikut dijumlahkan (skipna), tetapi tanggalnya tetap dihitung untuk Per Hari."""
+    start_datetime, end_datetime = datetime.combine(start_date, datetime.min.time()), datetime.combine(end_date, datetime.max.time())
+    employees = conn.execute("SELECT id, name, wage_amount, wage_period FROM employees WHERE is_active = 1").fetchall()
+    attendance = conn.execute("SELECT employee_id, check_in, check_out FROM attendance WHERE check_in BETWEEN ? AND ?",
+                              (start_datetime.strftime("%Y-%m-%d %H:%M:%S"), end_datetime.strftime("%Y-%m-%d %H:%M:%S"))).fetchall()
+    salaries = {}
+    for emp_id, _, wage_amount, wage_period in employees:
+        shifts = [(datetime.fromisoformat(check_in), datetime.fromisoformat(check_out) if check_out else None)
+                  for employee_id, check_in, check_out in attendance if employee_id == emp_id]
+        if not shifts:
+            continue
+        emp_salary = 0
+        if wage_period == 'Per Jam':
+            emp_salary = sum((check_out - check_in).total_seconds() / 3600 for check_in, check_out in shifts if check_out) * wage_amount
+        elif wage_period == 'Per Hari':
+            emp_salary = len({check_in.date() for check_in, _ in shifts}) * wage_amount
+        elif wage_period == 'Per Bulan':
+            emp_salary = (wage_amount / 30) * ((end_date - start_date).days + 1)
+        salaries[emp_id] = emp_salary
+    return salaries
+
+
+@pytest.fixture
+def attendance_pool(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / "payroll.db"))
+    migrations.ensure_schema(pool)
+    with pool.transaction() as conn:
+        conn.executemany("INSERT INTO employees (id, name, role, wage_amount, wage_period, is_active) VALUES (?, ?, 'Operator', ?, ?, ?)", EMPLOYEES)
+        conn.executemany("INSERT INTO attendance (employee_id, check_in, check_out) VALUES (?, ?, ?)", ATTENDANCE)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.parametrize("start, end", [(START, END), (date(2024, 1, 2), date(2024, 1, 2)), (date(2024, 1, 15), date(2024, 2, 14))])
+def test_compute_matches_legacy_loop(attendance_pool, start, end):
+    with attendance_pool.connection() as conn:
+        expected = legacy_payroll(conn, start, end)
+        lines = payroll.compute(conn, start, end)
+    assert {line.employee_id: line.salary for line in lines} == pytest.approx(expected)
+
+
+def test_compute_reports_open_shifts(attendance_pool):
+    with attendance_pool.connection() as conn:
+        lines = {line.employee_id: line for line in payroll.compute(conn, START, END)}
+    assert set(lines) == {10, 11, 12, 13, 16}
+    assert lines[10].hours == pytest.approx(8.5 + (8 * 3600 + 15 * 60 + 30) / 3600 + (4 * 3600 + 1) / 3600)
+    assert (lines[11].work_days, lines[11].open_shifts, lines[11].salary) == (3, 1, 360000)
+    assert (lines[13].open_shifts, lines[13].hours) == (2, pytest.approx(2.75))
+    assert lines[12].salary == pytest.approx(3000000 / 30 * 31)
+    assert lines[16].salary == 0
+
+
+def test_compute_matches_pandas_loop(attendance_pool):
+    """Pembanding asli dari bench.py (butuh pandas)."""
+    pytest.importorskip("pandas")
+    import bench
+
+    with attendance_pool.connection() as conn:
+        new = {line.employee_id: line.salary for line in payroll.compute(conn, START, END)}
+    assert new == pytest.approx(bench._legacy_payroll(attendance_pool, START, END))
@@ -0,0 +1,98 @@
+"""Rekap harian (rollups.py / reports.py) harus sama dengan agregasi langsung dari transaksi mentah."""
+from datetime import date, timedelta
+
+import pytest
+
+import db
+import reports
+import sales
+
+RANGES = {
+    'hari': (date(2024, 2, 10), date(2024, 2, 10)),
+    'bulan': (date(2024, 2, 1), date(2024, 2, 29)),
+    'lintas bulan': (date(2024, 1, 20), date(2024, 3, 5)),
+    'semua': (date(2024, 1, 1), date(2024, 3, 15)),
+}
+
+
+def _bounds(start, end):
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
+
+
+def direct_daily_totals(conn, start, end):
+    """[(day, revenue, tx_count, items_qty, cogs)] dihitung ulang dari transactions/transaction_items."""
+    items = {day: rest for day, *rest in conn.execute("""
+        SELECT substr(t.transaction_date, 1, 10), SUM(ti.quantity * ti.price_per_unit), SUM(ti.quantity), SUM(ti.quantity * IFNULL(ti.unit_cost, 0))
+        FROM transactions t JOIN transaction_items ti ON ti.transaction_id = t.id
+        WHERE t.transaction_date >= ? AND t.transaction_date < ?
+        GROUP BY 1
+    """, _bounds(start, end))}
+    counts = dict(conn.execute("""
+        SELECT substr(transaction_date, 1, 10), COUNT(*) FROM transactions
+        WHERE transaction_date >= ? AND transaction_date < ? GROUP BY 1
+    """, _bounds(start, end)))
+    return [(day, items[day][0], counts[day], items[day][1], items[day][2]) for day in sorted(items)]
+
+
+def direct_product_totals(conn, start, end):
+    """{nama produk: (qty, laba kotor)} dari transaction_items."""
+    return {name: (qty, profit) for name, qty, profit in conn.execute("""
+        SELECT p.name, SUM(ti.quantity), SUM(ti.quantity * (ti.price_per_unit - IFNULL(ti.unit_cost, 0)))
+        FROM transactions t JOIN transaction_items ti ON ti.transaction_id = t.id JOIN products p ON p.id = ti.product_id
+        WHERE t.transaction_date >= ? AND t.transaction_date < ?
+        GROUP BY p.id
+    """, _bounds(start, end))}
+
+
+def assert_rollups_match(conn, start, end):
+    rolled = reports.daily_totals(conn, start, end)
+    direct = direct_daily_totals(conn, start, end)
+    assert [row[0] for row in rolled] == [row[0] for row in direct]
+    for got, expected in zip(rolled, direct):
+        assert got[1:] == pytest.approx(expected[1:])
+
+    products = direct_product_totals(conn, start, end)
+    best = reports.best_sellers(conn, start, end, limit=len(products))
+    expected_best = sorted(((name, qty) for name, (qty, _) in products.items() if qty > 0), key=lambda row: (-row[1], row[0]))
+    assert best == expected_best
+    profitable = reports.most_profitable(conn, start, end, limit=len(products))
+    assert {name: profit for name, profit in profitable} == pytest.approx({name: profit for name, (_, profit) in products.items()})
+    assert [profit for _, profit in profitable] == sorted((profit for _, profit in profitable), reverse=True)
+
+
+@pytest.mark.parametrize("label", RANGES)
+def test_rollups_match_direct_aggregation(pool, label):
+    start, end = RANGES[label]
+    with pool.connection() as conn:
+        assert direct_daily_totals(conn, start, end), "data seed kosong di rentang ini"
+        assert_rollups_match(conn, start, end)
+
+
+def test_delete_sale_updates_rollups(pool):
+    day = RANGES['hari'][0]
+    with pool.connection() as conn:
+        transaction_id, revenue = conn.execute("""
+            SELECT t.id, SUM(ti.quantity * ti.price_per_unit) FROM transactions t JOIN transaction_items ti ON ti.transaction_id = t.id
+            WHERE t.transaction_date >= ? AND t.transaction_date < ? GROUP BY t.id ORDER BY t.id LIMIT 1
+        """, _bounds(day, day)).fetchone()
+        (_, revenue_before, count_before, _, _), = reports.daily_totals(conn, day, day)
+
+    db.run_in_transaction(pool, sales.delete_sale, transaction_id)
+
+    with pool.connection() as conn:
+        (_, revenue_after, count_after, _, _), = reports.daily_totals(conn, day, day)
+        assert revenue_after == pytest.approx(revenue_before - revenue)
+        assert count_after == count_before - 1
+        for start, end in RANGES.values():
+            assert_rollups_match(conn, start, end)
+
+
+def test_new_sale_updates_rollups(pool):
+    with pool.connection() as conn:
+        name, = conn.execute("SELECT p.name FROM products p JOIN product_costs c ON c.product_id = p.id ORDER BY p.id LIMIT 1").fetchone()
+    success, message, _, _ = sales.process_sale(pool, {name: 2}, 'Qris', 1, sold_at="2024-02-29 23:59:59")
+    assert success, message
+
+    with pool.connection() as conn:
+        for start, end in RANGES.values():
+            assert_rollups_match(conn, start, end)